@@ -1,7 +1,8 @@
 """API module for EarthMC integration."""
 
-from .earthmc import EarthMCAPI
+from .earthmc import EarthMCAPI, EarthMCAPIError
 from .batch import BatchQueryHandler
 from .cache import APICache
+from .models import Nation, Town
 
-__all__ = ['EarthMCAPI', 'BatchQueryHandler', 'APICache']
\ No newline at end of file
+__all__ = ['EarthMCAPI', 'EarthMCAPIError', 'BatchQueryHandler', 'APICache', 'Nation', 'Town']
\ No newline at end of file
@@ -2,11 +2,35 @@
 
 import logging
 from typing import List, Dict, Any
-from .earthmc import EarthMCAPI
+from .earthmc import EarthMCAPI, _normalize_batch
+from .models import Nation
 
 logger = logging.getLogger('EMCBot.API.Batch')
 
 
+def _dedupe_identifiers(identifiers: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Drop repeated identifier dicts, keeping the first occurrence.
+    
+    Args:
+        identifiers: List of identifier dicts
+        
+    Returns:
+        Identifiers in original order without duplicates
+    """
+    seen = set()
+    deduped = []
+    for identifier in identifiers:
+        key = tuple(sorted(identifier.items()))
+        if key not in seen:
+            seen.add(key)
+            deduped.append(identifier)
+    
+    if len(deduped) != len(identifiers):
+        logger.debug("Removed %s duplicate identifiers", len(identifiers) - len(deduped))
+    
+    return deduped
+
+
 class BatchQueryHandler:
     """Handles batch queries to the EarthMC API."""
     
@@ -27,16 +51,16 @@ class BatchQueryHandler:
         if not player_identifiers:
             return []
         
+        player_identifiers = _dedupe_identifiers(player_identifiers)
+        num_batches = (len(player_identifiers) + self.batch_size - 1) // self.batch_size
+        logger.debug("Querying %s player batches concurrently", num_batches)
+        
         results = []
-        for i in range(0, len(player_identifiers), self.batch_size):
-            batch = player_identifiers[i:i+self.batch_size]
-            logger.debug(f"Querying player batch {i//self.batch_size + 1} ({len(batch)} players)")
-            
-            batch_results = await self.api._post('/players', {'query': batch})
-            if batch_results:
-                results.extend(batch_results)
+        responses = await self.api._post_chunks('/players', player_identifiers, self.batch_size)
+        for batch_results in responses:
+            results.extend(_normalize_batch(batch_results))
         
-        logger.info(f"Queried {len(player_identifiers)} players, got {len(results)} results")
+        logger.info("Queried %s players, got %s results", len(player_identifiers), len(results))
         return results
     
     async def batch_town_queries(self, town_identifiers: List[Dict[str, str]]) -> List[Dict]:
@@ -51,16 +75,16 @@ class BatchQueryHandler:
         if not town_identifiers:
             return []
         
+        town_identifiers = _dedupe_identifiers(town_identifiers)
+        num_batches = (len(town_identifiers) + self.batch_size - 1) // self.batch_size
+        logger.debug("Querying %s town batches concurrently", num_batches)
+        
         results = []
-        for i in range(0, len(town_identifiers), self.batch_size):
-            batch = town_identifiers[i:i+self.batch_size]
-            logger.debug(f"Querying town batch {i//self.batch_size + 1} ({len(batch)} towns)")
-            
-            batch_results = await self.api._post('/towns', {'query': batch})
-            if batch_results:
-                results.extend(batch_results)
+        responses = await self.api._post_chunks('/towns', town_identifiers, self.batch_size)
+        for batch_results in responses:
+            results.extend(_normalize_batch(batch_results))
         
-        logger.info(f"Queried {len(town_identifiers)} towns, got {len(results)} results")
+        logger.info("Queried %s towns, got %s results", len(town_identifiers), len(results))
         return results
     
     async def batch_nation_queries(self, nation_identifiers: List[Dict[str, str]]) -> List[Dict]:
@@ -75,16 +99,16 @@ class BatchQueryHandler:
         if not nation_identifiers:
             return []
         
+        nation_identifiers = _dedupe_identifiers(nation_identifiers)
+        num_batches = (len(nation_identifiers) + self.batch_size - 1) // self.batch_size
+        logger.debug("Querying %s nation batches concurrently", num_batches)
+        
         results = []
-        for i in range(0, len(nation_identifiers), self.batch_size):
-            batch = nation_identifiers[i:i+self.batch_size]
-            logger.debug(f"Querying nation batch {i//self.batch_size + 1} ({len(batch)} nations)")
-            
-            batch_results = await self.api._post('/nations', {'query': batch})
-            if batch_results:
-                results.extend(batch_results)
+        responses = await self.api._post_chunks('/nations', nation_identifiers, self.batch_size)
+        for batch_results in responses:
+            results.extend(_normalize_batch(batch_results))
         
-        logger.info(f"Queried {len(nation_identifiers)} nations, got {len(results)} results")
+        logger.info("Queried %s nations, got %s results", len(nation_identifiers), len(results))
         return results
     
     async def get_all_verified_player_data(self, minecraft_uuids: List[str]) -> List[Dict]:
@@ -110,9 +134,8 @@ class BatchQueryHandler:
         """
         # First get nation data
         nation = await self.api.get_nation_by_uuid(nation_uuid)
-        if not nation or 'towns' not in nation:
+        if not nation:
             return []
         
-        # Then batch query all towns
-        town_queries = [{'uuid': uuid} for uuid in nation['towns']]
-        return await self.batch_town_queries(town_queries)
+        # Then fetch all towns, reusing cached ones and querying the rest concurrently
+        return await self.api.get_towns_cached(Nation.from_api(nation).towns)
@@ -1,25 +1,49 @@
 """API response caching."""
 
-import asyncio
 import logging
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional, Dict, Any, Tuple
 
 logger = logging.getLogger('EMCBot.API.Cache')
 
+# Stored for lookups the API answered with "not found"
+NOT_FOUND = object()
+
 
 class APICache:
-    """In-memory cache for API responses."""
+    """In-memory cache for API responses.
+    
+    Entries are stored as ``(data, expires_at)`` tuples using monotonic time.
+    All operations are single dict lookups with no await in between, so no
+    lock is needed on the event loop.
+    
+    The cache is bounded: once ``max_size`` entries are stored the least
+    recently used entry is evicted, and each write checks a few of the
+    oldest entries for expiry so stale keys don't pile up between sweeps.
+    """
+    
+    # Number of oldest entries checked for expiry on each write
+    SWEEP_SAMPLE = 8
     
-    def __init__(self, ttl_seconds: int = 300):
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        negative_ttl_seconds: int = 30,
+        max_size: int = 10000
+    ):
         """Initialize cache.
         
         Args:
             ttl_seconds: Time to live for cache entries in seconds (default 5 minutes)
+            negative_ttl_seconds: Time to live for "not found" entries (default 30 seconds)
+            max_size: Maximum number of entries kept (default 10000)
         """
-        self.ttl = timedelta(seconds=ttl_seconds)
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self._lock = asyncio.Lock()
+        self.ttl_seconds = float(ttl_seconds)
+        self.negative_ttl_seconds = float(negative_ttl_seconds)
+        self.max_size = max_size
+        self.cache: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
     
     def _make_key(self, endpoint: str, identifier: str) -> str:
         """Generate cache key."""
@@ -31,27 +55,26 @@ class APICache:
         Args:
             endpoint: API endpoint (e.g., 'players', 'towns')
             identifier: Resource identifier (UUID, name, etc.)
-            
+        
         Returns:
-            Cached data or None if not found/expired
+            Cached data, NOT_FOUND for a cached negative result,
+            or None if not found/expired
         """
-        async with self._lock:
-            key = self._make_key(endpoint, identifier)
-            
-            if key in self.cache:
-                entry = self.cache[key]
-                
-                # Check if expired
-                if datetime.now() - entry['timestamp'] < self.ttl:
-                    logger.debug(f"Cache hit: {key}")
-                    return entry['data']
-                else:
-                    # Remove expired entry
-                    del self.cache[key]
-                    logger.debug(f"Cache expired: {key}")
+        key = self._make_key(endpoint, identifier)
+        entry = self.cache.get(key)
+        
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.cache.move_to_end(key)
+                logger.debug("Cache hit: %s", key)
+                return entry[0]
             
-            logger.debug(f"Cache miss: {key}")
-            return None
+            # Remove expired entry
+            self.cache.pop(key, None)
+            logger.debug("Cache expired: %s", key)
+        
+        logger.debug("Cache miss: %s", key)
+        return None
     
     async def set(self, endpoint: str, identifier: str, data: Dict) -> None:
         """Store response in cache.
@@ -61,13 +84,40 @@ class APICache:
             identifier: Resource identifier
             data: Data to cache
         """
-        async with self._lock:
-            key = self._make_key(endpoint, identifier)
-            self.cache[key] = {
-                'data': data,
-                'timestamp': datetime.now()
-            }
-            logger.debug(f"Cached: {key}")
+        key = self._make_key(endpoint, identifier)
+        self._store(key, data, self.ttl_seconds)
+        logger.debug("Cached: %s", key)
+    
+    async def set_negative(self, endpoint: str, identifier: str) -> None:
+        """Remember that a resource was not found.
+        
+        Negative entries use a shorter TTL so newly created resources
+        are still noticed quickly.
+        
+        Args:
+            endpoint: API endpoint
+            identifier: Resource identifier
+        """
+        key = self._make_key(endpoint, identifier)
+        self._store(key, NOT_FOUND, self.negative_ttl_seconds)
+        logger.debug("Cached not found: %s", key)
+    
+    def _store(self, key: str, data: Any, ttl: float) -> None:
+        """Insert an entry, evicting expired and least recently used entries."""
+        now = time.monotonic()
+        self.cache[key] = (data, now + ttl)
+        self.cache.move_to_end(key)
+        
+        # Opportunistically drop expired entries from the old end
+        expired = [
+            old_key for old_key, entry in islice(self.cache.items(), self.SWEEP_SAMPLE)
+            if entry[1] <= now
+        ]
+        for old_key in expired:
+            del self.cache[old_key]
+        
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
     
     async def invalidate(self, endpoint: str, identifier: str) -> None:
         """Invalidate a cache entry.
@@ -76,18 +126,15 @@ class APICache:
             endpoint: API endpoint
             identifier: Resource identifier
         """
-        async with self._lock:
-            key = self._make_key(endpoint, identifier)
-            if key in self.cache:
-                del self.cache[key]
-                logger.debug(f"Invalidated: {key}")
+        key = self._make_key(endpoint, identifier)
+        if self.cache.pop(key, None) is not None:
+            logger.debug("Invalidated: %s", key)
     
     async def clear(self) -> None:
         """Clear all cache entries."""
-        async with self._lock:
-            count = len(self.cache)
-            self.cache.clear()
-            logger.info(f"Cleared {count} cache entries")
+        count = len(self.cache)
+        self.cache.clear()
+        logger.info("Cleared %s cache entries", count)
     
     async def cleanup_expired(self) -> int:
         """Remove expired entries from cache.
@@ -95,20 +142,19 @@ class APICache:
         Returns:
             Number of entries removed
         """
-        async with self._lock:
-            now = datetime.now()
-            expired_keys = [
-                key for key, entry in self.cache.items()
-                if now - entry['timestamp'] >= self.ttl
-            ]
-            
-            for key in expired_keys:
-                del self.cache[key]
-            
-            if expired_keys:
-                logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
-            
-            return len(expired_keys)
+        now = time.monotonic()
+        expired_keys = [
+            key for key, entry in self.cache.items()
+            if entry[1] <= now
+        ]
+        
+        for key in expired_keys:
+            del self.cache[key]
+        
+        if expired_keys:
+            logger.info("Cleaned up %s expired cache entries", len(expired_keys))
+        
+        return len(expired_keys)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics.
@@ -118,5 +164,7 @@ class APICache:
         """
         return {
             'entries': len(self.cache),
-            'ttl_seconds': self.ttl.total_seconds()
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'negative_ttl_seconds': self.negative_ttl_seconds
         }
@@ -2,177 +2,588 @@
 
 import aiohttp
 import asyncio
+import hashlib
+import json
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
+from typing import Optional, List, Dict, Any, Deque, Callable, Awaitable, Set, AsyncIterator
+
+from .cache import APICache, NOT_FOUND
+from .models import Nation
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger('EMCBot.API')
 
 
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    
+    _json_loads = json.loads
+
+
+def _json_serialize(obj: Any) -> str:
+    """Serializer for aiohttp's ``json=`` arguments."""
+    return _json_dumps(obj).decode('utf-8')
+
+
+def _normalize_batch(response: Any) -> List[Any]:
+    """Return the items of a batch response as a list.
+    
+    The API answers with either a list of objects or a dict keyed by UUID.
+    """
+    if type(response) is list:
+        return response
+    if type(response) is dict:
+        return list(response.values())
+    return []
+
+
+def _parse_retry_after(value: Optional[str], default: float = 60.0) -> float:
+    """Parse a Retry-After header given as seconds or an HTTP date."""
+    if not value:
+        return default
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter so concurrent retries spread out."""
+    return min(30.0, (2 ** attempt) * (1 + random.random()))
+
+
+class EarthMCAPIError(Exception):
+    """Raised when the API could not be reached after retrying.
+    
+    Distinguishes a failed request from a resource that doesn't exist,
+    so failures aren't cached or acted on as "not found".
+    """
+
+
 class EarthMCAPI:
     """Client for EarthMC API."""
     
-    def __init__(self, base_url: str, rate_limit: int = 180):
+    def __init__(
+        self,
+        base_url: str,
+        rate_limit: int = 180,
+        cache: Optional[APICache] = None
+    ):
         """Initialize API client.
         
         Args:
             base_url: Base URL for the API
             rate_limit: Max requests per minute (default 180)
+            cache: Optional response cache for single-resource lookups
         """
         self.base_url = base_url.rstrip('/')
         self.rate_limit = rate_limit
-        self.request_times: List[datetime] = []
+        self._urls = {
+            endpoint: f"{self.base_url}{endpoint}"
+            for endpoint in ('/players', '/towns', '/nations')
+        }
+        self.cache = cache
+        self.request_times: Deque[float] = deque()
         self.session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Per-endpoint buffers of single-UUID lookups waiting to be batched
+        self.coalesce_window = 0.010
+        self.batch_size = 100
+        self._pending_lookups: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+        
+        # Bounds how many batch chunks are in flight at once
+        self._chunk_sem = asyncio.Semaphore(8)
         
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
+        """Get or create aiohttp session.
+        
+        The session shares one keep-alive connector so repeated requests
+        reuse warm connections instead of paying for a new TCP/TLS handshake.
+        """
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            # Connectors must be created inside a running event loop
+            self._connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=75,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=aiohttp.ClientTimeout(total=30, connect=10),
+                json_serialize=_json_serialize,
+                headers={
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                }
+            )
         return self.session
     
     async def close(self):
-        """Close the aiohttp session."""
+        """Close the aiohttp session and its connector."""
+        for handle in self._flush_handles.values():
+            handle.cancel()
+        self._flush_handles.clear()
+        
+        # Batched lookups still in flight would fail on the closed session
+        for task in self._flush_tasks:
+            task.cancel()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        
+        # Lookups still buffered will never be sent; release their waiters
+        for pending in self._pending_lookups.values():
+            self._fail_lookups(pending, EarthMCAPIError("API client closed"))
+        self._pending_lookups.clear()
+        
         if self.session and not self.session.closed:
             await self.session.close()
+        self.session = None
+        self._connector = None
     
     async def _wait_for_rate_limit(self):
         """Wait if we're at the rate limit."""
-        now = datetime.now()
+        now = time.monotonic()
+        cutoff = now - 60.0
         
-        # Remove requests older than 1 minute
-        self.request_times = [
-            t for t in self.request_times 
-            if now - t < timedelta(minutes=1)
-        ]
+        # Remove requests older than 1 minute (timestamps are in order)
+        while self.request_times and self.request_times[0] < cutoff:
+            self.request_times.popleft()
         
         # If at limit, wait until oldest request is > 1 minute old
         if len(self.request_times) >= self.rate_limit:
-            oldest = self.request_times[0]
-            wait_time = 60 - (now - oldest).total_seconds()
+            wait_time = 60.0 - (now - self.request_times[0])
             if wait_time > 0:
-                logger.warning(f"Rate limit reached, waiting {wait_time:.1f}s")
+                logger.warning("Rate limit reached, waiting %.1fs", wait_time)
                 await asyncio.sleep(wait_time)
     
-    async def _request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict[Any, Any]]:
-        """Make an API request with rate limiting and retry logic."""
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Optional[Any]:
+        """Make an API request with rate limiting and retry logic.
+        
+        Returns:
+            Parsed response, an empty list on 404 (nothing matched), or None
+            if the request failed after retrying
+        """
         await self._wait_for_rate_limit()
         
-        url = f"{self.base_url}{endpoint}"
+        url = self._urls.get(endpoint) or f"{self.base_url}{endpoint}"
         session = await self._get_session()
         
         # Log the request for debugging
-        if 'json' in kwargs:
-            logger.debug(f"API Request: {method} {url} with data: {kwargs['json']}")
-        else:
-            logger.debug(f"API Request: {method} {url}")
+        logger.debug("API Request: %s %s", method, url)
         
         for attempt in range(3):  # 3 attempts with exponential backoff
             try:
-                self.request_times.append(datetime.now())
+                sent_at = time.monotonic()
+                self.request_times.append(sent_at)
                 
                 async with session.request(method, url, **kwargs) as response:
                     if response.status == 429:  # Rate limited
-                        retry_after = int(response.headers.get('Retry-After', 60))
-                        logger.warning(f"Rate limited, retrying after {retry_after}s")
-                        await asyncio.sleep(retry_after)
+                        # A rejected request shouldn't use up one of our slots
+                        try:
+                            self.request_times.remove(sent_at)
+                        except ValueError:
+                            pass
+                        
+                        retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                        logger.warning("Rate limited, retrying after %.1fs", retry_after)
+                        await asyncio.sleep(retry_after + random.uniform(0, 0.5))
                         continue
                     
                     if response.status == 200:
-                        return await response.json()
+                        return _json_loads(await response.read())
                     elif response.status == 404:
-                        logger.debug(f"Resource not found: {url}")
-                        return None
+                        # An empty result, not a failure
+                        logger.debug("Resource not found: %s", url)
+                        return []
                     else:
-                        # Get response text for debugging
+                        # Read only the start of the body for debugging
                         try:
-                            error_text = await response.text()
-                            logger.error(f"API error {response.status}: {url} - Response: {error_text[:200]}")
-                        except:
-                            logger.error(f"API error {response.status}: {url}")
+                            error_text = await response.content.read(200)
+                            logger.error(
+                                "API error %s: %s - Response: %s",
+                                response.status, url, error_text.decode('utf-8', 'replace')
+                            )
+                        except Exception:
+                            logger.error("API error %s: %s", response.status, url)
                         
                         if attempt < 2:
-                            await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                            await asyncio.sleep(_backoff_delay(attempt))
                             continue
                         return None
                         
             except aiohttp.ClientError as e:
-                logger.error(f"Request error: {e}")
+                logger.error("Request error: %s", e)
                 if attempt < 2:
-                    await asyncio.sleep(2 ** attempt)
+                    await asyncio.sleep(_backoff_delay(attempt))
                     continue
                 return None
             except Exception as e:
-                logger.error(f"Unexpected error: {e}")
+                logger.error("Unexpected error: %s", e)
                 return None
         
         return None
     
+    async def _single_flight(
+        self,
+        key: str,
+        coro_factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Share one in-flight request between concurrent callers.
+        
+        Args:
+            key: Request key in the form ``endpoint:identifier``
+            coro_factory: Callable returning the coroutine that performs the request
+            
+        Returns:
+            Result of the shared request
+        """
+        # The request runs in its own task and every caller, the first one
+        # included, waits on it through a shield: a caller being cancelled
+        # only stops that caller waiting, never the request the others share
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_factory())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._inflight_done, key))
+        return await asyncio.shield(task)
+    
+    def _inflight_done(self, key: str, task: asyncio.Future) -> None:
+        """Drop a finished shared request from the in-flight map."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark retrieved so a request every caller stopped waiting for
+        # doesn't log a warning
+        if not task.cancelled():
+            task.exception()
+    
+    async def _cached_lookup(
+        self,
+        endpoint: str,
+        identifier: str,
+        fetch: Callable[[], Awaitable[Optional[Dict]]],
+        use_cache: bool = True
+    ) -> Optional[Dict]:
+        """Look up a single resource through the cache and single-flight map.
+        
+        Args:
+            endpoint: Cache endpoint name (e.g. 'towns')
+            identifier: Resource identifier
+            fetch: Callable returning the coroutine that queries the API
+            use_cache: Whether a cached entry may be returned; the fetched
+                result is cached either way
+            
+        Returns:
+            Resource data or None if not found
+        """
+        if self.cache and use_cache:
+            cached = await self.cache.get(endpoint, identifier)
+            if cached is NOT_FOUND:
+                return None
+            if cached is not None:
+                return cached
+        
+        async def _fetch_and_store():
+            result = await fetch()
+            if self.cache:
+                if result is None:
+                    await self.cache.set_negative(endpoint, identifier)
+                else:
+                    await self.cache.set(endpoint, identifier, result)
+            return result
+        
+        return await self._single_flight(f"{endpoint}:{identifier}", _fetch_and_store)
+    
     async def _get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
         """Make a GET request."""
         return await self._request('GET', endpoint, params=params)
     
     async def _post(self, endpoint: str, data: Optional[Dict] = None) -> Optional[Dict]:
         """Make a POST request."""
-        # Log the exact data being sent
-        import json as json_module
-        if data:
-            logger.debug(f"POST data (raw): {data}")
-            logger.debug(f"POST data (JSON): {json_module.dumps(data)}")
-        
-        response = await self._request('POST', endpoint, json=data, headers={'Content-Type': 'application/json'})
-        
-        # Log response type and sample
-        if response:
-            logger.debug(f"POST response type: {type(response)}")
-            if isinstance(response, dict):
-                logger.debug(f"POST response has {len(response)} keys")
-            elif isinstance(response, list):
-                logger.debug(f"POST response has {len(response)} items")
+        # Encode once; the session already sends a JSON Content-Type
+        body = _json_dumps(data)
+        logger.debug("POST %s (%d bytes)", endpoint, len(body))
         
-        return response
+        return await self._request('POST', endpoint, data=body)
+    
+    async def _query_one(self, endpoint: str, identifier: str) -> Optional[Dict]:
+        """Query a single resource and return the first result.
+        
+        Raises:
+            EarthMCAPIError: If the request failed after retrying
+        """
+        # Send identifier directly as string, not as object
+        result = await self._post(endpoint, {'query': [identifier]})
+        if result is None:
+            raise EarthMCAPIError(f"Request to {endpoint} failed")
+        if result and isinstance(result, list) and len(result) > 0:
+            return result[0]
+        return None
+    
+    async def _post_chunks(
+        self,
+        endpoint: str,
+        identifiers: List[Any],
+        batch_size: int = 100
+    ) -> List[Any]:
+        """POST identifiers in chunks concurrently.
+        
+        Args:
+            endpoint: API endpoint (e.g. '/towns')
+            identifiers: Identifiers to send in the query arrays
+            batch_size: Maximum identifiers per request
+            
+        Returns:
+            Raw response of each chunk, in chunk order (None for failed chunks)
+        """
+        chunks = [
+            identifiers[i:i + batch_size]
+            for i in range(0, len(identifiers), batch_size)
+        ]
+        
+        async def _one(chunk):
+            async with self._chunk_sem:
+                return await self._post(endpoint, {'query': chunk})
+        
+        responses = await asyncio.gather(
+            *(_one(chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.error("Batch request to %s failed: %s", endpoint, response)
+        
+        return [
+            None if isinstance(response, Exception) else response
+            for response in responses
+        ]
+    
+    async def _iter_chunks(
+        self,
+        endpoint: str,
+        identifiers: List[Any],
+        batch_size: int = 100
+    ) -> AsyncIterator[Any]:
+        """POST identifiers in chunks concurrently, yielding responses as they arrive.
+        
+        Lets callers process one chunk while the others are still in flight.
+        
+        Args:
+            endpoint: API endpoint (e.g. '/towns')
+            identifiers: Identifiers to send in the query arrays
+            batch_size: Maximum identifiers per request
+            
+        Yields:
+            Raw response of each chunk in completion order (failed chunks are skipped)
+        """
+        async def _one(chunk):
+            async with self._chunk_sem:
+                return await self._post(endpoint, {'query': chunk})
+        
+        tasks = [
+            asyncio.ensure_future(_one(identifiers[i:i + batch_size]))
+            for i in range(0, len(identifiers), batch_size)
+        ]
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    response = await next_done
+                except Exception as e:
+                    logger.error("Batch request to %s failed: %s", endpoint, e)
+                    continue
+                yield response
+        finally:
+            # Don't leave requests running if the caller stops early
+            for task in tasks:
+                task.cancel()
+    
+    async def _coalesced_lookup(self, endpoint: str, identifier: str) -> Optional[Dict]:
+        """Look up one resource, batching it with other lookups made close together.
+        
+        Lookups issued within ``coalesce_window`` seconds of each other are sent
+        as a single POST of up to ``batch_size`` identifiers.
+        
+        Args:
+            endpoint: API endpoint (e.g. '/towns')
+            identifier: Resource UUID
+            
+        Returns:
+            Resource data or None if not found
+        """
+        pending = self._pending_lookups.setdefault(endpoint, {})
+        fut = pending.get(identifier)
+        
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            pending[identifier] = fut
+            
+            if len(pending) >= self.batch_size:
+                # Batch is full, send it now
+                self._start_flush(endpoint)
+            elif endpoint not in self._flush_handles:
+                self._flush_handles[endpoint] = loop.call_later(
+                    self.coalesce_window, self._start_flush, endpoint
+                )
+        
+        return await asyncio.shield(fut)
+    
+    def _start_flush(self, endpoint: str) -> None:
+        """Send the buffered lookups for an endpoint."""
+        handle = self._flush_handles.pop(endpoint, None)
+        if handle:
+            handle.cancel()
+        
+        pending = self._pending_lookups.pop(endpoint, None)
+        if not pending:
+            return
+        
+        task = asyncio.ensure_future(self._flush_lookups(endpoint, pending))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    @staticmethod
+    def _fail_lookups(pending: Dict[str, asyncio.Future], error: Exception) -> None:
+        """Fail every unresolved waiter of a batch with ``error``."""
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(error)
+                # Mark retrieved in case the waiter was cancelled meanwhile
+                fut.exception()
+    
+    async def _flush_lookups(self, endpoint: str, pending: Dict[str, asyncio.Future]) -> None:
+        """POST a batch of buffered lookups and resolve each waiter.
+        
+        A failed request fails the waiters with ``EarthMCAPIError`` rather than
+        resolving them to None, which would be cached as "not found".
+        """
+        try:
+            response = await self._post(endpoint, {'query': list(pending)})
+            if response is None:
+                raise EarthMCAPIError(f"Batched request to {endpoint} failed")
+            
+            found = {}
+            for item in _normalize_batch(response):
+                if isinstance(item, dict) and item.get('uuid'):
+                    found[item['uuid']] = item
+            
+            for identifier, fut in pending.items():
+                if not fut.done():
+                    fut.set_result(found.get(identifier))
+        except Exception as e:
+            self._fail_lookups(pending, e)
+        except BaseException:
+            # Cancelled by close(); the shielded waiters would otherwise hang
+            self._fail_lookups(pending, EarthMCAPIError(f"Batched request to {endpoint} was cancelled"))
+            raise
     
     # ========== PLAYER ENDPOINTS ==========
     
     async def get_player_by_discord(self, discord_id: str) -> Optional[Dict]:
         """Get player data by Discord ID."""
-        result = await self._post('/players', {'query': [discord_id]})
-        if result and isinstance(result, list) and len(result) > 0:
-            return result[0]
-        return None
+        return await self._cached_lookup(
+            'players_by_discord',
+            discord_id,
+            lambda: self._query_one('/players', discord_id)
+        )
     
     async def get_player_by_username(self, username: str) -> Optional[Dict]:
         """Get player data by Minecraft username."""
-        result = await self._post('/players', {'query': [username]})
-        if result and isinstance(result, list) and len(result) > 0:
-            return result[0]
-        return None
+        # Usernames are case-insensitive in Minecraft
+        return await self._cached_lookup(
+            'players_by_name',
+            username.lower(),
+            lambda: self._query_one('/players', username)
+        )
     
     async def get_player_by_uuid(self, uuid: str) -> Optional[Dict]:
         """Get player data by Minecraft UUID."""
-        result = await self._post('/players', {'query': [uuid]})
-        if result and isinstance(result, list) and len(result) > 0:
-            return result[0]
-        return None
+        return await self._cached_lookup(
+            'players',
+            uuid,
+            lambda: self._coalesced_lookup('/players', uuid)
+        )
+    
+    async def remember_player(self, player: Dict) -> None:
+        """Store fresh player data under every key it can be looked up by.
+        
+        Seeding the UUID, username and Discord ID entries from one response
+        lets a retried verification skip the API entirely.
+        
+        Args:
+            player: Player data as returned by the API
+        """
+        if not self.cache:
+            return
+        if player.get('uuid'):
+            await self.cache.set('players', player['uuid'], player)
+        if player.get('name'):
+            await self.cache.set('players_by_name', player['name'].lower(), player)
+        if player.get('discord'):
+            await self.cache.set('players_by_discord', player['discord'], player)
+    
+    async def invalidate_player(
+        self,
+        uuid: Optional[str] = None,
+        discord_id: Optional[str] = None,
+        username: Optional[str] = None
+    ) -> None:
+        """Drop cached player data so the next lookup hits the API.
+        
+        Args:
+            uuid: Minecraft UUID to invalidate
+            discord_id: Discord ID to invalidate
+            username: Minecraft username to invalidate
+        """
+        if not self.cache:
+            return
+        if uuid:
+            await self.cache.invalidate('players', uuid)
+        if discord_id:
+            await self.cache.invalidate('players_by_discord', discord_id)
+        if username:
+            await self.cache.invalidate('players_by_name', username.lower())
     
     async def get_players_by_uuids(self, uuids: List[str]) -> List[Dict]:
         """Get multiple players by UUIDs (batched)."""
         if not uuids:
             return []
         
-        # Batch requests (100 per request)
+        # Drop duplicates while keeping order
+        uuids = list(dict.fromkeys(uuids))
+        
+        # Batch requests (100 per request), processed as each one returns
         results = []
-        for i in range(0, len(uuids), 100):
-            batch = uuids[i:i+100]
-            # Send UUIDs directly in query array (strings, not objects)
-            batch_results = await self._post('/players', {'query': batch})
-            
-            if batch_results:
-                # Handle different response formats
-                if isinstance(batch_results, list):
-                    results.extend(batch_results)
-                elif isinstance(batch_results, dict):
-                    logger.debug(f"Players API returned dict with {len(batch_results)} keys")
-                    results.extend(batch_results.values())
+        async for batch_results in self._iter_chunks('/players', uuids):
+            results.extend(_normalize_batch(batch_results))
         
         return results
     
@@ -188,67 +599,119 @@ class EarthMCAPI:
     
     async def get_town_by_uuid(self, uuid: str) -> Optional[Dict]:
         """Get town data by UUID."""
-        # Send UUID directly as string, not as object
-        result = await self._post('/towns', {'query': [uuid]})
-        if result and isinstance(result, list) and len(result) > 0:
-            return result[0]
-        return None
+        return await self._cached_lookup(
+            'towns',
+            uuid,
+            lambda: self._coalesced_lookup('/towns', uuid)
+        )
     
     async def get_towns_by_uuids(self, uuids: List[str]) -> List[Dict]:
-        """Get multiple towns by UUIDs (batched)."""
+        """Get multiple towns by UUIDs (batched).
+        
+        Concurrent calls for the same set of towns share one set of requests.
+        """
         if not uuids:
             return []
         
+        # Drop duplicates while keeping order
+        uuids = list(dict.fromkeys(uuids))
+        
+        # Key on a fixed-size digest of the set rather than the joined UUIDs,
+        # which would be as long as the request itself
+        digest = hashlib.blake2b(
+            '\n'.join(sorted(frozenset(uuids))).encode(), digest_size=16
+        ).hexdigest()
+        
+        result = await self._single_flight(
+            f"/towns:{digest}",
+            lambda: self._fetch_towns(uuids)
+        )
+        # Each caller gets its own list so one can't modify another's result
+        return list(result)
+    
+    async def _fetch_towns(self, uuids: List[str]) -> List[Dict]:
+        """Query towns in concurrent chunks and collect the results."""
         results = []
-        for i in range(0, len(uuids), 100):
-            batch = uuids[i:i+100]
-            # Send UUIDs directly as strings, not as objects
-            batch_results = await self._post('/towns', {'query': batch})
-            
-            if batch_results:
-                # Detailed logging of response structure
-                logger.info(f"Towns batch response type: {type(batch_results)}")
-                logger.info(f"Towns batch response: {str(batch_results)[:500]}")
-                
-                # Handle different response formats
-                if isinstance(batch_results, list):
-                    # Response is already a list of town objects
-                    logger.info(f"Processing {len(batch_results)} towns from list response")
-                    for idx, item in enumerate(batch_results):
-                        logger.debug(f"Town {idx} type: {type(item)}, value: {str(item)[:100]}")
-                    results.extend(batch_results)
-                elif isinstance(batch_results, dict):
-                    # Response is a dict with UUIDs as keys, extract values
-                    logger.info(f"Processing {len(batch_results)} towns from dict response")
-                    for key, value in list(batch_results.items())[:3]:  # Log first 3
-                        logger.debug(f"Dict key type: {type(key)}, value type: {type(value)}")
-                        logger.debug(f"Key: {key}, Value: {str(value)[:100]}")
-                    results.extend(batch_results.values())
-                else:
-                    logger.error(f"Unexpected towns API response type: {type(batch_results)}")
+        async for batch_results in self._iter_chunks('/towns', uuids):
+            results.extend(_normalize_batch(batch_results))
         
-        logger.info(f"Returning {len(results)} total towns")
-        if results:
-            logger.info(f"First result type: {type(results[0])}, value: {str(results[0])[:200]}")
+        logger.debug("Returning %s total towns", len(results))
         
         return results
     
+    async def iter_towns_by_uuids(self, uuids: List[str]) -> AsyncIterator[Dict]:
+        """Get multiple towns by UUIDs, yielding each batch's towns as it arrives.
+        
+        Args:
+            uuids: Town UUIDs
+            
+        Yields:
+            Town data, in batch completion order
+        """
+        if not uuids:
+            return
+        
+        # Drop duplicates while keeping order
+        uuids = list(dict.fromkeys(uuids))
+        
+        async for batch_results in self._iter_chunks('/towns', uuids):
+            for town in _normalize_batch(batch_results):
+                yield town
+    
     async def get_towns_by_nation(self, nation_name: str) -> List[Dict]:
         """Get all towns in a nation."""
         # First get the nation to get town list
         nation = await self.get_nation_by_name(nation_name)
-        if not nation or 'towns' not in nation:
+        if not nation:
             return []
         
-        town_uuids = nation['towns']
-        return await self.get_towns_by_uuids(town_uuids)
+        return await self.get_towns_cached(Nation.from_api(nation).towns)
+    
+    async def get_towns_cached(self, town_uuids: List[str]) -> List[Dict]:
+        """Get towns, serving cached entries and fetching the rest concurrently.
+        
+        Args:
+            town_uuids: Town UUIDs
+            
+        Returns:
+            List of town data dictionaries in the order given
+        """
+        town_uuids = list(dict.fromkeys(town_uuids))
+        
+        if not self.cache:
+            return await self.get_towns_by_uuids(town_uuids)
+        
+        found: Dict[str, Dict] = {}
+        missing = []
+        for uuid in town_uuids:
+            cached = await self.cache.get('towns', uuid)
+            if cached is None or cached is NOT_FOUND:
+                missing.append(uuid)
+            else:
+                found[uuid] = cached
+        
+        if missing:
+            for town in await self.get_towns_by_uuids(missing):
+                if isinstance(town, dict) and town.get('uuid'):
+                    found[town['uuid']] = town
+                    await self.cache.set('towns', town['uuid'], town)
+        
+        return [found[uuid] for uuid in town_uuids if uuid in found]
     
     # ========== NATION ENDPOINTS ==========
     
-    async def get_nation_by_name(self, nation_name: str) -> Optional[Dict]:
-        """Get nation data by name."""
+    async def get_nation_by_name(self, nation_name: str, use_cache: bool = True) -> Optional[Dict]:
+        """Get nation data by name.
+        
+        Args:
+            nation_name: Nation name
+            use_cache: Whether a cached entry may be returned
+            
+        Returns:
+            Nation data or None if not found
+        """
         if not nation_name or not isinstance(nation_name, str):
-            logger.error(f"Invalid nation name: {nation_name} (type: {type(nation_name)})")
+            logger.error("Invalid nation name: %s (type: %s)", nation_name, type(nation_name))
             return None
         
         # Strip whitespace and ensure it's a string
@@ -258,49 +721,47 @@ class EarthMCAPI:
             logger.error("Nation name is empty after stripping")
             return None
         
-        logger.debug(f"Querying nation by name: '{nation_name}'")
+        logger.debug("Querying nation by name: '%s'", nation_name)
         
         try:
             # Send name directly as string in query array
-            result = await self._post('/nations', {'query': [nation_name]})
+            result = await self._cached_lookup(
+                'nations',
+                nation_name,
+                lambda: self._query_one('/nations', nation_name),
+                use_cache=use_cache
+            )
             
-            if result and isinstance(result, list) and len(result) > 0:
-                logger.debug(f"Found nation: {nation_name}")
-                return result[0]
+            if result:
+                logger.debug("Found nation: %s", nation_name)
+                return result
             
-            logger.debug(f"Nation not found: {nation_name}")
+            logger.debug("Nation not found: %s", nation_name)
             return None
             
         except Exception as e:
-            logger.error(f"Error querying nation {nation_name}: {e}")
+            logger.error("Error querying nation %s: %s", nation_name, e)
             return None
     
     async def get_nation_by_uuid(self, uuid: str) -> Optional[Dict]:
         """Get nation data by UUID."""
-        # Send UUID directly as string, not as object
-        result = await self._post('/nations', {'query': [uuid]})
-        if result and isinstance(result, list) and len(result) > 0:
-            return result[0]
-        return None
+        return await self._cached_lookup(
+            'nations',
+            uuid,
+            lambda: self._coalesced_lookup('/nations', uuid)
+        )
     
     async def get_nations_by_uuids(self, uuids: List[str]) -> List[Dict]:
         """Get multiple nations by UUIDs (batched)."""
         if not uuids:
             return []
         
+        # Drop duplicates while keeping order
+        uuids = list(dict.fromkeys(uuids))
+        
         results = []
-        for i in range(0, len(uuids), 100):
-            batch = uuids[i:i+100]
-            # Send UUIDs directly as strings, not as objects
-            batch_results = await self._post('/nations', {'query': batch})
-            
-            if batch_results:
-                # Handle different response formats
-                if isinstance(batch_results, list):
-                    results.extend(batch_results)
-                elif isinstance(batch_results, dict):
-                    logger.debug(f"Nations API returned dict with {len(batch_results)} keys")
-                    results.extend(batch_results.values())
+        async for batch_results in self._iter_chunks('/nations', uuids):
+            results.extend(_normalize_batch(batch_results))
         
         return results
     
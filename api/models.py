@@ -0,0 +1,92 @@
+"""Typed views of EarthMC API responses."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True)
+class Nation:
+    """Nation fields used when walking a nation's towns."""
+    uuid: Optional[str]
+    name: Optional[str]
+    towns: List[str] = field(default_factory=list)
+    
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Nation':
+        """Build from a raw nation response.
+        
+        The API may list towns as objects like {"uuid": "...", "name": "..."}
+        or as plain UUID strings; both are normalized to UUID strings here.
+        """
+        towns = []
+        for town in data.get('towns') or []:
+            if isinstance(town, dict):
+                uuid = town.get('uuid')
+                if uuid:
+                    towns.append(uuid)
+            elif isinstance(town, str):
+                towns.append(town)
+        
+        return cls(uuid=data.get('uuid'), name=data.get('name'), towns=towns)
+
+
+@dataclass(slots=True)
+class Town:
+    """Town fields stored in the town cache and compared between scans."""
+    uuid: Optional[str]
+    name: Optional[str]
+    nation_uuid: Optional[str] = None
+    mayor_uuid: Optional[str] = None
+    board: str = ''
+    residents: List[str] = field(default_factory=list)
+    is_public: Optional[bool] = None
+    is_open: Optional[bool] = None
+    is_overclaimed: Optional[bool] = None
+    is_for_sale: Optional[bool] = None
+    has_overclaim_shield: Optional[bool] = None
+    num_town_blocks: Optional[int] = None
+    num_residents: Optional[int] = None
+    balance: Optional[float] = None
+    
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Town':
+        """Build from a raw town response.
+        
+        Nested objects are flattened to the fields above, and residents,
+        listed as objects or plain UUID strings, to UUID strings.
+        """
+        nation = data.get('nation')
+        mayor = data.get('mayor')
+        status = data.get('status') or {}
+        stats = data.get('stats') or {}
+        
+        residents = data.get('residents')
+        if isinstance(residents, list):
+            resident_uuids = [
+                uuid for uuid in (
+                    resident.get('uuid') if isinstance(resident, dict)
+                    else resident if isinstance(resident, str)
+                    else None
+                    for resident in residents
+                )
+                if uuid
+            ]
+        else:
+            resident_uuids = []
+        
+        return cls(
+            uuid=data.get('uuid'),
+            name=data.get('name'),
+            nation_uuid=nation.get('uuid') if isinstance(nation, dict) else None,
+            mayor_uuid=mayor.get('uuid') if isinstance(mayor, dict) else None,
+            board=data.get('board') or '',
+            residents=resident_uuids,
+            is_public=status.get('isPublic'),
+            is_open=status.get('isOpen'),
+            is_overclaimed=status.get('isOverClaimed'),
+            is_for_sale=status.get('isForSale'),
+            has_overclaim_shield=status.get('hasOverclaimShield'),
+            num_town_blocks=stats.get('numTownBlocks'),
+            num_residents=stats.get('numResidents'),
+            balance=stats.get('balance')
+        )
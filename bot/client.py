@@ -2,21 +2,51 @@
 
 import discord
 from discord.ext import commands
+import asyncio
 import logging
 import yaml
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, Any, FrozenSet, Optional, Set, Tuple
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 from database import DatabaseManager, init_database
 from api import EarthMCAPI, BatchQueryHandler, APICache
 
 logger = logging.getLogger('EMCBot')
 
 
+def _write_config_atomic(config_path: str, config: Dict[str, Any]) -> None:
+    """Write configuration to a temp file and swap it into place.
+    
+    Args:
+        config_path: Path to config file
+        config: Configuration dictionary
+    """
+    tmp_path = f"{config_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        yaml.dump(config, f, Dumper=SafeDumper, default_flow_style=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, config_path)
+
+
 class EMCBot(commands.Bot):
     """EarthMC Verification Bot."""
     
+    # Seconds an admin check result is reused before re-checking, and the
+    # number of users whose results are kept
+    ADMIN_CHECK_TTL = 30.0
+    ADMIN_CHECK_CACHE_SIZE = 1024
+    
+    # Maximum number of audit log entries written in one transaction
+    AUDIT_BATCH_SIZE = 50
+    
     def __init__(self, config_path: str = "config.yaml"):
         """Initialize the bot.
         
@@ -29,6 +59,16 @@ class EMCBot(commands.Bot):
         
         # Load configuration
         self.config = self._load_config(self.config_path)
+        self._admin_user_ids: FrozenSet[str] = frozenset()
+        self._admin_role_ids: FrozenSet[str] = frozenset()
+        self.blacklist_discord_ids: Set[str] = set()
+        self.blacklist_minecraft_uuids: Set[str] = set()
+        self._admin_check_cache: Dict[int, Tuple[float, bool]] = {}
+        self.refresh_config_cache()
+        
+        # Audit log entries waiting to be written by the background writer
+        self.audit_queue: asyncio.Queue = asyncio.Queue()
+        self._audit_writer_task: Optional[asyncio.Task] = None
         
         # Set up intents
         intents = discord.Intents.default()
@@ -47,9 +87,11 @@ class EMCBot(commands.Bot):
         self.api: EarthMCAPI = None
         self.batch_handler: BatchQueryHandler = None
         self.api_cache: APICache = None
+        self._api_warmup_task: Optional[asyncio.Task] = None
         
         # Guild reference
         self.guild: discord.Guild = None
+        self._fetched_channels: Dict[int, discord.abc.GuildChannel] = {}
         
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from YAML file.
@@ -62,13 +104,41 @@ class EMCBot(commands.Bot):
         """
         try:
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=SafeLoader)
             logger.info(f"Loaded configuration from {config_path}")
             return config
         except Exception as e:
             logger.error(f"Error loading configuration: {e}")
             raise
     
+    async def save_config(self) -> None:
+        """Write the in-memory configuration back to disk without blocking the loop.
+        
+        The blacklist sets are the source of truth at runtime, so they are
+        written back as sorted lists to keep the file diff stable.
+        """
+        blacklist = self.config.setdefault('blacklist', {})
+        blacklist['discord_ids'] = sorted(self.blacklist_discord_ids)
+        blacklist['minecraft_uuids'] = sorted(self.blacklist_minecraft_uuids)
+        
+        await asyncio.to_thread(_write_config_atomic, self.config_path, self.config)
+        logger.info(f"Saved configuration to {self.config_path}")
+    
+    def refresh_config_cache(self) -> None:
+        """Rebuild the admin and blacklist lookup sets from the current config.
+        
+        Must be called whenever ``self.config`` is replaced or its admin or
+        blacklist sections change.
+        """
+        admins = self.config.get('admins') or {}
+        blacklist = self.config.get('blacklist') or {}
+        
+        self._admin_user_ids = frozenset(map(str, admins.get('user_ids') or []))
+        self._admin_role_ids = frozenset(map(str, admins.get('role_ids') or []))
+        self.blacklist_discord_ids = set(map(str, blacklist.get('discord_ids') or []))
+        self.blacklist_minecraft_uuids = set(map(str, blacklist.get('minecraft_uuids') or []))
+        self._admin_check_cache.clear()
+    
     async def setup_hook(self):
         """Called when bot is starting up."""
         logger.info("Setting up bot...")
@@ -77,18 +147,24 @@ class EMCBot(commands.Bot):
         db_path = os.path.join(self.bot_dir, "database.db")
         await init_database(db_path)
         self.db = DatabaseManager(db_path)
+        await self.db.connect()
         logger.info(f"Database initialized at: {db_path}")
+        self._audit_writer_task = asyncio.create_task(self._audit_log_writer())
         
         # Initialize API client
         api_config = self.config.get('api', {})
+        self.api_cache = APICache(ttl_seconds=300, negative_ttl_seconds=30)
         self.api = EarthMCAPI(
             base_url=api_config.get('base_url'),
-            rate_limit=api_config.get('rate_limit', 180)
+            rate_limit=api_config.get('rate_limit', 180),
+            cache=self.api_cache
         )
         self.batch_handler = BatchQueryHandler(self.api)
-        self.api_cache = APICache(ttl_seconds=300)
         logger.info("API client initialized")
         
+        # Open the API connection in the background so the first command doesn't pay for it
+        self._api_warmup_task = asyncio.create_task(self._warm_api_connection())
+        
         # Load cogs
         await self._load_cogs()
         
@@ -99,6 +175,69 @@ class EMCBot(commands.Bot):
         await self.tree.sync(guild=guild)
         logger.info(f"Commands synced to guild {guild_id}")
     
+    async def _warm_api_connection(self, attempts: int = 3):
+        """Resolve DNS and open a pooled connection to the EarthMC API."""
+        for attempt in range(attempts):
+            try:
+                if await self.api.health_check():
+                    logger.info("API connection warmed up")
+                    return
+            except Exception as e:
+                logger.warning(f"API warm-up attempt {attempt + 1} failed: {e}")
+            
+            await asyncio.sleep(2 ** attempt)
+        
+        logger.warning("Could not warm up API connection; continuing without it")
+    
+    def queue_audit_log(self, log_data: dict) -> None:
+        """Queue an audit log entry for the background writer.
+        
+        Args:
+            log_data: Entry in the format accepted by ``add_audit_log``
+        """
+        self.audit_queue.put_nowait(log_data)
+    
+    async def _audit_log_writer(self):
+        """Write queued audit log entries in batches.
+        
+        Runs until it takes the None sentinel queued by ``_flush_audit_logs``.
+        """
+        while True:
+            batch = [await self.audit_queue.get()]
+            while len(batch) < self.AUDIT_BATCH_SIZE:
+                try:
+                    batch.append(self.audit_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            stop = None in batch
+            batch = [entry for entry in batch if entry is not None]
+            if batch:
+                await self.db.add_audit_logs_bulk(batch)
+            if stop:
+                return
+    
+    async def _flush_audit_logs(self):
+        """Stop the audit log writer and write anything still queued.
+        
+        Called once the cogs are unloaded, so nothing queues entries after
+        the drain. The writer is stopped with a sentinel rather than
+        cancelled, so a batch it is writing isn't lost.
+        """
+        if self._audit_writer_task and not self._audit_writer_task.done():
+            self.audit_queue.put_nowait(None)
+            await self._audit_writer_task
+        self._audit_writer_task = None
+        
+        batch = []
+        while not self.audit_queue.empty():
+            entry = self.audit_queue.get_nowait()
+            if entry is not None:
+                batch.append(entry)
+        
+        if batch:
+            await self.db.add_audit_logs_bulk(batch)
+    
     async def _load_cogs(self):
         """Load all cogs."""
         cogs = [
@@ -134,11 +273,21 @@ class EMCBot(commands.Bot):
         """Clean up when bot is shutting down."""
         logger.info("Shutting down bot...")
         
-        # Close API session
+        # Unload the cogs and stop their task loops first, so nothing uses
+        # the database or API client once they are closed below
+        await super().close()
+        
+        # Write any pending audit log entries, then close the database
+        if self.db:
+            await self._flush_audit_logs()
+            await self.db.close()
+        
+        # Close API session, stopping a warm-up that is still retrying first
+        if self._api_warmup_task and not self._api_warmup_task.done():
+            self._api_warmup_task.cancel()
         if self.api:
             await self.api.close()
         
-        await super().close()
         logger.info("Bot shut down complete")
     
     def is_admin(self, user_id: int) -> bool:
@@ -150,9 +299,39 @@ class EMCBot(commands.Bot):
         Returns:
             True if user is admin, False otherwise
         """
+        now = time.monotonic()
+        cached = self._admin_check_cache.get(user_id)
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        result = self._check_admin(user_id)
+        if len(self._admin_check_cache) >= self.ADMIN_CHECK_CACHE_SIZE:
+            self._prune_admin_checks(now)
+        self._admin_check_cache[user_id] = (now + self.ADMIN_CHECK_TTL, result)
+        return result
+    
+    def _prune_admin_checks(self, now: float) -> None:
+        """Drop expired admin check results, or all of them if none have expired."""
+        expired = [user_id for user_id, (expires, _) in self._admin_check_cache.items() if expires <= now]
+        if expired:
+            for user_id in expired:
+                del self._admin_check_cache[user_id]
+        else:
+            self._admin_check_cache.clear()
+    
+    def invalidate_admin_check(self, user_id: int) -> None:
+        """Drop the cached admin check result for a user."""
+        self._admin_check_cache.pop(user_id, None)
+    
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Re-check admin status after a member's roles change."""
+        if before.roles != after.roles:
+            self.invalidate_admin_check(after.id)
+    
+    def _check_admin(self, user_id: int) -> bool:
+        """Check admin status against the config and the member's roles."""
         # Check if user ID is in admin list
-        admin_user_ids = self.config.get('admins', {}).get('user_ids', [])
-        if str(user_id) in admin_user_ids:
+        if str(user_id) in self._admin_user_ids:
             return True
         
         # Check if user has admin role
@@ -163,12 +342,10 @@ class EMCBot(commands.Bot):
         if not member:
             return False
         
-        admin_role_ids = self.config.get('admins', {}).get('role_ids', [])
-        for role in member.roles:
-            if str(role.id) in admin_role_ids:
-                return True
+        if not self._admin_role_ids:
+            return False
         
-        return False
+        return any(str(role.id) in self._admin_role_ids for role in member.roles)
     
     def is_blacklisted_discord(self, discord_id: str) -> bool:
         """Check if Discord ID is blacklisted.
@@ -179,8 +356,7 @@ class EMCBot(commands.Bot):
         Returns:
             True if blacklisted, False otherwise
         """
-        blacklist = self.config.get('blacklist', {}).get('discord_ids', [])
-        return discord_id in blacklist
+        return discord_id in self.blacklist_discord_ids
     
     def is_blacklisted_minecraft(self, minecraft_uuid: str) -> bool:
         """Check if Minecraft UUID is blacklisted.
@@ -191,8 +367,7 @@ class EMCBot(commands.Bot):
         Returns:
             True if blacklisted, False otherwise
         """
-        blacklist = self.config.get('blacklist', {}).get('minecraft_uuids', [])
-        return minecraft_uuid in blacklist
+        return minecraft_uuid in self.blacklist_minecraft_uuids
     
     async def get_logging_channel(self) -> discord.TextChannel:
         """Get the logging channel.
@@ -204,7 +379,7 @@ class EMCBot(commands.Bot):
         if not channel_id:
             return None
         
-        return self.guild.get_channel(int(channel_id))
+        return await self._resolve_channel(int(channel_id))
     
     async def get_notification_channel(self, channel_type: str) -> discord.TextChannel:
         """Get a notification channel.
@@ -221,4 +396,26 @@ class EMCBot(commands.Bot):
         if not channel_id:
             return None
         
-        return self.guild.get_channel(int(channel_id))
\ No newline at end of file
+        return await self._resolve_channel(int(channel_id))
+    
+    async def _resolve_channel(self, channel_id: int) -> Optional[discord.abc.GuildChannel]:
+        """Get a channel from the client cache, fetching it only on a cold cache.
+        
+        Args:
+            channel_id: Discord channel ID
+            
+        Returns:
+            Channel or None if it doesn't exist or can't be accessed
+        """
+        channel = self.get_channel(channel_id) or self._fetched_channels.get(channel_id)
+        if channel is not None:
+            return channel
+        
+        try:
+            channel = await self.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"Could not fetch channel {channel_id}: {e}")
+            return None
+        
+        self._fetched_channels[channel_id] = channel
+        return channel
\ No newline at end of file
@@ -3,9 +3,119 @@
 import discord
 from discord.ext import commands
 import logging
+from typing import Callable, Dict
 
 logger = logging.getLogger('EMCBot.Events')
 
+# User-facing error messages
+_ERR_NO_PERMS = "❌ You don't have permission to use this command."
+_ERR_GENERIC = "❌ An error occurred while executing the command."
+_ERR_COOLDOWN_FMT = "⏰ This command is on cooldown. Try again in {:.1f}s"
+
+
+async def _ignore_command_error(ctx: commands.Context, error: commands.CommandError):
+    """Ignore errors for unknown commands."""
+
+
+async def _command_missing_permissions(ctx: commands.Context, error: commands.CommandError):
+    """Tell the user they lack permission."""
+    await ctx.send(_ERR_NO_PERMS)
+
+
+async def _command_missing_argument(ctx: commands.Context, error: commands.CommandError):
+    """Tell the user which argument is missing."""
+    await ctx.send(f"❌ Missing required argument: {error.param.name}")
+
+
+async def _command_bad_argument(ctx: commands.Context, error: commands.CommandError):
+    """Tell the user an argument was invalid."""
+    await ctx.send(f"❌ Invalid argument: {error}")
+
+
+async def _command_unexpected(ctx: commands.Context, error: commands.CommandError):
+    """Log an unexpected command error."""
+    logger.error("Command error: %s", error, exc_info=error)
+    await ctx.send(_ERR_GENERIC)
+
+
+async def _app_command_cooldown(
+    interaction: discord.Interaction,
+    error: discord.app_commands.AppCommandError
+):
+    """Tell the user how long the cooldown lasts."""
+    await interaction.response.send_message(
+        _ERR_COOLDOWN_FMT.format(error.retry_after),
+        ephemeral=True
+    )
+
+
+async def _app_command_no_permission(
+    interaction: discord.Interaction,
+    error: discord.app_commands.AppCommandError
+):
+    """Tell the user they lack permission."""
+    await interaction.response.send_message(
+        _ERR_NO_PERMS,
+        ephemeral=True
+    )
+
+
+async def _app_command_unexpected(
+    interaction: discord.Interaction,
+    error: discord.app_commands.AppCommandError
+):
+    """Log an unexpected app command error."""
+    logger.error("App command error: %s", error, exc_info=error)
+    
+    if not interaction.response.is_done():
+        await interaction.response.send_message(
+            _ERR_GENERIC,
+            ephemeral=True
+        )
+    else:
+        await interaction.followup.send(
+            _ERR_GENERIC,
+            ephemeral=True
+        )
+
+
+# Error handlers keyed by exception type. Subclasses are resolved through
+# the MRO on first sight and remembered, so later lookups are a single get.
+_COMMAND_ERROR_HANDLERS: Dict[type, Callable] = {
+    commands.CommandNotFound: _ignore_command_error,
+    commands.MissingPermissions: _command_missing_permissions,
+    commands.MissingRequiredArgument: _command_missing_argument,
+    commands.BadArgument: _command_bad_argument,
+}
+
+_APP_COMMAND_ERROR_HANDLERS: Dict[type, Callable] = {
+    discord.app_commands.CommandOnCooldown: _app_command_cooldown,
+    discord.app_commands.MissingPermissions: _app_command_no_permission,
+    discord.app_commands.CheckFailure: _app_command_no_permission,
+}
+
+
+def _resolve_handler(handlers: Dict[type, Callable], error: Exception, default: Callable) -> Callable:
+    """Find the handler for an error type.
+    
+    Args:
+        handlers: Dispatch table to look up and update
+        error: Raised error
+        default: Handler used when no base class is registered
+        
+    Returns:
+        Handler coroutine function
+    """
+    error_type = type(error)
+    handler = handlers.get(error_type)
+    if handler is None:
+        handler = next(
+            (handlers[base] for base in error_type.__mro__ if base in handlers),
+            default
+        )
+        handlers[error_type] = handler
+    return handler
+
 
 def setup_events(bot: commands.Bot):
     """Set up bot event handlers.
@@ -17,21 +127,8 @@ def setup_events(bot: commands.Bot):
     @bot.event
     async def on_command_error(ctx: commands.Context, error: commands.CommandError):
         """Handle command errors."""
-        if isinstance(error, commands.CommandNotFound):
-            return  # Ignore command not found errors
-        
-        elif isinstance(error, commands.MissingPermissions):
-            await ctx.send("❌ You don't have permission to use this command.")
-        
-        elif isinstance(error, commands.MissingRequiredArgument):
-            await ctx.send(f"❌ Missing required argument: {error.param.name}")
-        
-        elif isinstance(error, commands.BadArgument):
-            await ctx.send(f"❌ Invalid argument: {error}")
-        
-        else:
-            logger.error(f"Command error: {error}", exc_info=error)
-            await ctx.send("❌ An error occurred while executing the command.")
+        handler = _resolve_handler(_COMMAND_ERROR_HANDLERS, error, _command_unexpected)
+        await handler(ctx, error)
     
     @bot.event
     async def on_app_command_error(
@@ -39,55 +136,26 @@ def setup_events(bot: commands.Bot):
         error: discord.app_commands.AppCommandError
     ):
         """Handle application command errors."""
-        if isinstance(error, discord.app_commands.CommandOnCooldown):
-            await interaction.response.send_message(
-                f"⏰ This command is on cooldown. Try again in {error.retry_after:.1f}s",
-                ephemeral=True
-            )
-        
-        elif isinstance(error, discord.app_commands.MissingPermissions):
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-        
-        elif isinstance(error, discord.app_commands.CheckFailure):
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-        
-        else:
-            logger.error(f"App command error: {error}", exc_info=error)
-            
-            if not interaction.response.is_done():
-                await interaction.response.send_message(
-                    "❌ An error occurred while executing the command.",
-                    ephemeral=True
-                )
-            else:
-                await interaction.followup.send(
-                    "❌ An error occurred while executing the command.",
-                    ephemeral=True
-                )
+        handler = _resolve_handler(_APP_COMMAND_ERROR_HANDLERS, error, _app_command_unexpected)
+        await handler(interaction, error)
     
     @bot.event
     async def on_error(event: str, *args, **kwargs):
         """Handle general errors."""
-        logger.error(f"Error in event {event}", exc_info=True)
+        logger.error("Error in event %s", event, exc_info=True)
     
     @bot.event
     async def on_guild_join(guild: discord.Guild):
         """Called when bot joins a guild."""
-        logger.info(f"Joined guild: {guild.name} (ID: {guild.id})")
+        logger.info("Joined guild: %s (ID: %s)", guild.name, guild.id)
     
     @bot.event
     async def on_guild_remove(guild: discord.Guild):
         """Called when bot leaves a guild."""
-        logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
+        logger.info("Left guild: %s (ID: %s)", guild.name, guild.id)
     
     @bot.event
     async def on_member_remove(member: discord.Member):
         """Called when a member leaves the guild."""
-        logger.info(f"Member left: {member.display_name} (ID: {member.id})")
+        logger.info("Member left: %s (ID: %s)", member.display_name, member.id)
         # Note: Don't delete from database - they might rejoin
@@ -3,11 +3,11 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+import asyncio
 import logging
 from typing import Literal, Optional
-import yaml
 
-from utils import create_purge_confirmation_embed, create_scan_status_embed
+from utils import create_purge_confirmation_embed, create_scan_status_embed, is_admin_check
 from utils.roles import remove_verification_roles
 from utils.nicknames import reset_nickname
 
@@ -39,14 +39,51 @@ class PurgeConfirmView(discord.ui.View):
 class AdminCog(commands.Cog):
     """Administrative commands."""
     
+    # Seconds to wait after a config change before writing it to disk
+    CONFIG_WRITE_DELAY = 2.0
+    
     def __init__(self, bot):
         self.bot = bot
+        self._config_dirty = asyncio.Event()
+        self._config_writer_task: Optional[asyncio.Task] = None
+        self._config_save: Optional[asyncio.Future] = None
+        self._listcogs_embed: Optional[discord.Embed] = None
+    
+    async def cog_load(self):
+        """Start the background config writer."""
+        self._config_writer_task = asyncio.create_task(self._config_writer())
+    
+    async def cog_unload(self):
+        """Stop the config writer and flush any pending change."""
+        if self._config_writer_task:
+            self._config_writer_task.cancel()
+            try:
+                await self._config_writer_task
+            except asyncio.CancelledError:
+                pass
         
-    def is_admin_check():
-        """Check if user is admin."""
-        async def predicate(interaction: discord.Interaction) -> bool:
-            return interaction.client.is_admin(interaction.user.id)
-        return app_commands.check(predicate)
+        # Let an in-progress write finish before starting another
+        if self._config_save and not self._config_save.done():
+            await self._config_save
+        
+        if self._config_dirty.is_set():
+            self._config_dirty.clear()
+            await self.bot.save_config()
+    
+    async def _config_writer(self):
+        """Write config changes to disk, coalescing changes made close together."""
+        while True:
+            await self._config_dirty.wait()
+            await asyncio.sleep(self.CONFIG_WRITE_DELAY)
+            self._config_dirty.clear()
+            
+            try:
+                self._config_save = asyncio.ensure_future(self.bot.save_config())
+                await asyncio.shield(self._config_save)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error saving config: %s", e, exc_info=True)
     
     # ========== TEXT COMMANDS (for when slash commands aren't working) ==========
     
@@ -67,6 +104,9 @@ class AdminCog(commands.Cog):
             await ctx.send("❌ You must be an admin to use this command.")
             return
         
+        # Registered commands may change below
+        self._listcogs_embed = None
+        
         try:
             if scope == "clear":
                 # Clear guild commands
@@ -77,37 +117,36 @@ class AdminCog(commands.Cog):
             
             elif scope == "global":
                 # Global sync (takes ~1 hour to propagate)
-                await ctx.send("🔄 Syncing commands globally... (This takes ~1 hour to propagate)")
+                status = await ctx.send("🔄 Syncing commands globally... (This takes ~1 hour to propagate)")
                 synced = await self.bot.tree.sync()
-                await ctx.send(f"✅ Synced {len(synced)} commands globally.\n⏰ Wait up to 1 hour for changes to appear.")
                 
-                # List synced commands
+                content = f"✅ Synced {len(synced)} commands globally.\n⏰ Wait up to 1 hour for changes to appear."
                 if synced:
-                    cmd_list = "\n".join([f"  • /{cmd.name}" for cmd in synced])
-                    await ctx.send(f"**Synced commands:**\n{cmd_list}")
+                    cmd_list = "\n".join(f"  • /{cmd.name}" for cmd in synced)
+                    content += f"\n\n**Synced commands:**\n{cmd_list}"
+                await status.edit(content=content)
             
             else:
                 # Guild sync (fast, ~10 seconds)
-                await ctx.send("🔄 Syncing commands to this guild...")
+                status = await ctx.send("🔄 Syncing commands to this guild...")
                 
                 # Copy global commands to guild and sync
                 guild_obj = discord.Object(id=ctx.guild.id)
                 self.bot.tree.copy_global_to(guild=guild_obj)
                 synced = await self.bot.tree.sync(guild=guild_obj)
                 
-                await ctx.send(f"✅ Synced {len(synced)} commands to **{ctx.guild.name}**\n⏰ Wait 5-10 minutes and restart Discord (Ctrl+R).")
-                
-                # List synced commands
+                content = f"✅ Synced {len(synced)} commands to **{ctx.guild.name}**\n⏰ Wait 5-10 minutes and restart Discord (Ctrl+R)."
                 if synced:
-                    cmd_list = "\n".join([f"  • /{cmd.name}" for cmd in synced])
-                    await ctx.send(f"**Synced commands:**\n{cmd_list}")
+                    cmd_list = "\n".join(f"  • /{cmd.name}" for cmd in synced)
+                    content += f"\n\n**Synced commands:**\n{cmd_list}"
                 else:
-                    await ctx.send("⚠️ No commands were synced. Check that cogs are loaded correctly.")
+                    content += "\n\n⚠️ No commands were synced. Check that cogs are loaded correctly."
+                await status.edit(content=content)
             
-            logger.info(f"Commands synced by {ctx.author} (scope: {scope})")
+            logger.info("Commands synced by %s (scope: %s)", ctx.author, scope)
             
         except Exception as e:
-            logger.error(f"Error syncing commands: {e}", exc_info=True)
+            logger.error("Error syncing commands: %s", e, exc_info=True)
             await ctx.send(f"❌ Error syncing commands: {e}")
     
     @commands.command(name="listcogs")
@@ -118,6 +157,14 @@ class AdminCog(commands.Cog):
             await ctx.send("❌ You must be an admin to use this command.")
             return
         
+        # The listing only changes on sync/reloadcog, so reuse the last one
+        if self._listcogs_embed is None:
+            self._listcogs_embed = self._build_listcogs_embed()
+        
+        await ctx.send(embed=self._listcogs_embed)
+    
+    def _build_listcogs_embed(self) -> discord.Embed:
+        """Build the embed listing loaded cogs and their commands."""
         embed = discord.Embed(
             title="📦 Loaded Cogs & Commands",
             color=discord.Color.blue()
@@ -127,14 +174,14 @@ class AdminCog(commands.Cog):
         cogs = list(self.bot.cogs.keys())
         embed.add_field(
             name=f"Loaded Cogs ({len(cogs)})",
-            value="\n".join([f"  • {cog}" for cog in cogs]) if cogs else "None",
+            value="\n".join(f"  • {cog}" for cog in cogs) if cogs else "None",
             inline=False
         )
         
         # List slash commands
         slash_commands = self.bot.tree.get_commands()
         if slash_commands:
-            cmd_list = "\n".join([f"  • /{cmd.name} - {cmd.description}" for cmd in slash_commands])
+            cmd_list = "\n".join(f"  • /{cmd.name} - {cmd.description}" for cmd in slash_commands)
             embed.add_field(
                 name=f"Slash Commands ({len(slash_commands)})",
                 value=cmd_list,
@@ -150,14 +197,14 @@ class AdminCog(commands.Cog):
         # List text commands
         text_commands = [cmd for cmd in self.bot.commands if not cmd.hidden]
         if text_commands:
-            cmd_list = "\n".join([f"  • !{cmd.name}" for cmd in text_commands])
+            cmd_list = "\n".join(f"  • !{cmd.name}" for cmd in text_commands)
             embed.add_field(
                 name=f"Text Commands ({len(text_commands)})",
                 value=cmd_list,
                 inline=False
             )
         
-        await ctx.send(embed=embed)
+        return embed
     
     @commands.command(name="reloadcog")
     async def reload_cog(self, ctx: commands.Context, cog_name: str):
@@ -170,18 +217,20 @@ class AdminCog(commands.Cog):
             await ctx.send("❌ You must be an admin to use this command.")
             return
         
+        self._listcogs_embed = None
+        
         try:
             await self.bot.reload_extension(cog_name)
             await ctx.send(f"✅ Reloaded cog: {cog_name}")
-            logger.info(f"Cog {cog_name} reloaded by {ctx.author}")
+            logger.info("Cog %s reloaded by %s", cog_name, ctx.author)
         except Exception as e:
             await ctx.send(f"❌ Error reloading cog: {e}")
-            logger.error(f"Error reloading cog {cog_name}: {e}", exc_info=True)
+            logger.error("Error reloading cog %s: %s", cog_name, e, exc_info=True)
     
     # ========== SLASH COMMANDS ==========
     
     @app_commands.command(name="purge", description="Remove a user's verification")
-    @is_admin_check()
+    @is_admin_check
     @app_commands.describe(
         type="Type of identifier",
         identifier="Discord ID or Minecraft UUID"
@@ -217,20 +266,31 @@ class AdminCog(commands.Cog):
                 await interaction.followup.send("❌ User not found in database.")
                 return
             
-            # Get Discord member
+            # Get Discord member, fetching it if it isn't cached
             discord_id = user_data['discord_id']
-            member = interaction.guild.get_member(int(discord_id))
+            member_id = int(discord_id)
+            member = interaction.guild.get_member(member_id)
+            if member is None:
+                try:
+                    member = await interaction.guild.fetch_member(member_id)
+                except discord.NotFound:
+                    member = None
             
-            # Remove roles and nickname
+            # Remove roles and nickname; separate requests, so sent together
             if member:
-                await remove_verification_roles(member, self.bot.config)
-                await reset_nickname(member)
+                await asyncio.gather(
+                    remove_verification_roles(member, self.bot.config),
+                    reset_nickname(member)
+                )
             
-            # Remove from database
+            # Remove from database, and forget cached EMC data so a rejoin is checked fresh
             await self.bot.db.delete_user(discord_id)
+            await self.bot.api.invalidate_player(
+                user_data['minecraft_uuid'], discord_id, user_data['minecraft_ign']
+            )
             
             # Log to audit
-            await self.bot.db.add_audit_log({
+            self.bot.queue_audit_log({
                 'action_type': 'purge',
                 'actor_id': str(interaction.user.id),
                 'target_discord_id': discord_id,
@@ -245,11 +305,11 @@ class AdminCog(commands.Cog):
             await interaction.followup.send(f"✅ Successfully purged user **{user_data['minecraft_ign']}**")
             
         except Exception as e:
-            logger.error(f"Error in purge command: {e}", exc_info=True)
+            logger.error("Error in purge command: %s", e, exc_info=True)
             await interaction.followup.send("❌ An error occurred during purge.")
     
     @app_commands.command(name="scan", description="Manually trigger user and nation scans")
-    @is_admin_check()
+    @is_admin_check
     async def scan(self, interaction: discord.Interaction):
         """Manually trigger scans."""
         await interaction.response.defer(thinking=True)
@@ -263,34 +323,51 @@ class AdminCog(commands.Cog):
             
             await interaction.followup.send("🔄 Starting scans...")
             
-            # Run user scan
-            user_result = await scanner_cog.run_user_scan()
-            user_embed = create_scan_status_embed(
-                "User",
-                user_result['scanned'],
-                user_result['changes'],
-                user_result['duration']
+            # Run both scans concurrently so their API waits overlap
+            results = await asyncio.gather(
+                scanner_cog.run_user_scan(),
+                scanner_cog.run_nation_scan(),
+                return_exceptions=True
             )
-            await interaction.followup.send(embed=user_embed)
             
-            # Run nation scan
-            nation_result = await scanner_cog.run_nation_scan()
-            nation_embed = create_scan_status_embed(
-                "Nation",
-                nation_result['scanned'],
-                nation_result['changes'],
-                nation_result['duration']
-            )
-            await interaction.followup.send(embed=nation_embed)
+            # Scans can outlast the interaction token; nobody would see the results
+            if interaction.is_expired():
+                logger.info("Scan finished after the interaction expired; not reporting results")
+                return
             
-            await interaction.followup.send("✅ Scans complete!")
+            # Report both scans in a single edit of the status message
+            embeds = []
+            failed = []
+            for scan_type, result in zip(("User", "Nation"), results):
+                if isinstance(result, Exception):
+                    logger.error("Error in %s scan: %s", scan_type.lower(), result, exc_info=result)
+                    failed.append(scan_type)
+                    continue
+                
+                embeds.append(create_scan_status_embed(
+                    scan_type,
+                    result['scanned'],
+                    result['changes'],
+                    result['duration']
+                ))
+            
+            if failed:
+                content = f"⚠️ Scans complete, {' and '.join(failed).lower()} scan failed."
+            else:
+                content = "✅ Scans complete!"
+            
+            try:
+                await interaction.edit_original_response(content=content, embeds=embeds)
+            except discord.NotFound:
+                logger.info("Scan status message is gone; not reporting results")
             
         except Exception as e:
-            logger.error(f"Error in scan command: {e}", exc_info=True)
-            await interaction.followup.send("❌ An error occurred during scan.")
+            logger.error("Error in scan command: %s", e, exc_info=True)
+            if not interaction.is_expired():
+                await interaction.followup.send("❌ An error occurred during scan.")
     
     @app_commands.command(name="blacklist", description="Manage blacklist")
-    @is_admin_check()
+    @is_admin_check
     @app_commands.describe(
         action="Action to perform",
         discord_id="Discord user ID (optional)",
@@ -307,12 +384,10 @@ class AdminCog(commands.Cog):
         await interaction.response.defer(thinking=True)
         
         try:
-            config_path = "./config.yaml"
-            
             if action == "list":
                 # Show current blacklist
-                discord_blacklist = self.bot.config.get('blacklist', {}).get('discord_ids', [])
-                minecraft_blacklist = self.bot.config.get('blacklist', {}).get('minecraft_uuids', [])
+                discord_blacklist = sorted(self.bot.blacklist_discord_ids)
+                minecraft_blacklist = sorted(self.bot.blacklist_minecraft_uuids)
                 
                 embed = discord.Embed(
                     title="🚫 Blacklist",
@@ -337,55 +412,52 @@ class AdminCog(commands.Cog):
                 await interaction.followup.send("❌ Please provide either a Discord ID or Minecraft UUID.")
                 return
             
-            # Load config
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
+            # The bot's sets are the source of truth; they are written back
+            # to the config file as sorted lists on save
+            discord_ids = self.bot.blacklist_discord_ids
+            minecraft_uuids = self.bot.blacklist_minecraft_uuids
             
-            if 'blacklist' not in config:
-                config['blacklist'] = {'discord_ids': [], 'minecraft_uuids': []}
-            
-            # Perform action
             if action == "add":
                 if discord_id:
-                    if discord_id not in config['blacklist']['discord_ids']:
-                        config['blacklist']['discord_ids'].append(discord_id)
+                    before = len(discord_ids)
+                    discord_ids.add(discord_id)
+                    if len(discord_ids) != before:
                         message = f"Added Discord ID `{discord_id}` to blacklist"
                     else:
                         message = f"Discord ID `{discord_id}` already in blacklist"
                 
                 if minecraft_uuid:
-                    if minecraft_uuid not in config['blacklist']['minecraft_uuids']:
-                        config['blacklist']['minecraft_uuids'].append(minecraft_uuid)
+                    before = len(minecraft_uuids)
+                    minecraft_uuids.add(minecraft_uuid)
+                    if len(minecraft_uuids) != before:
                         message = f"Added Minecraft UUID `{minecraft_uuid}` to blacklist"
                     else:
                         message = f"Minecraft UUID `{minecraft_uuid}` already in blacklist"
             
             elif action == "remove":
                 if discord_id:
-                    if discord_id in config['blacklist']['discord_ids']:
-                        config['blacklist']['discord_ids'].remove(discord_id)
+                    before = len(discord_ids)
+                    discord_ids.discard(discord_id)
+                    if len(discord_ids) != before:
                         message = f"Removed Discord ID `{discord_id}` from blacklist"
                     else:
                         message = f"Discord ID `{discord_id}` not in blacklist"
                 
                 if minecraft_uuid:
-                    if minecraft_uuid in config['blacklist']['minecraft_uuids']:
-                        config['blacklist']['minecraft_uuids'].remove(minecraft_uuid)
+                    before = len(minecraft_uuids)
+                    minecraft_uuids.discard(minecraft_uuid)
+                    if len(minecraft_uuids) != before:
                         message = f"Removed Minecraft UUID `{minecraft_uuid}` from blacklist"
                     else:
                         message = f"Minecraft UUID `{minecraft_uuid}` not in blacklist"
             
-            # Save config
-            with open(config_path, 'w') as f:
-                yaml.safe_dump(config, f, default_flow_style=False)
-            
-            # Reload bot config
-            self.bot.config = config
+            # Schedule a config write
+            self._config_dirty.set()
             
             await interaction.followup.send(f"✅ {message}")
             
         except Exception as e:
-            logger.error(f"Error in blacklist command: {e}", exc_info=True)
+            logger.error("Error in blacklist command: %s", e, exc_info=True)
             await interaction.followup.send("❌ An error occurred managing blacklist.")
 
 
@@ -2,7 +2,11 @@
 
 import discord
 from discord.ext import commands
+import asyncio
 import logging
+import time
+from collections import OrderedDict
+from typing import Any, Coroutine, Dict, Optional, Sequence, Set, Tuple
 
 from utils import (
     create_verification_embed,
@@ -12,147 +16,181 @@ from utils import (
 )
 from utils.roles import assign_roles
 from utils.nicknames import set_nickname
+from utils.data_processor import extract_player_fields
 
 logger = logging.getLogger('EMCBot.AutoVerify')
 
+# Fixed fields of the audit entries written by this cog
+_AUTO_VERIFY_AUDIT = {'action_type': 'auto_verify', 'actor_id': None, 'success': True}
+_REVERIFY_AUDIT = {'action_type': 'rejoin_reverify', 'actor_id': None, 'success': True}
+
+
+def _log_failures(context: str, labels: Sequence[str], results: Sequence) -> None:
+    """Log any exceptions returned by ``asyncio.gather(..., return_exceptions=True)``.
+    
+    Args:
+        context: What the gathered operations were part of
+        labels: Name of each operation, in gather order
+        results: Results returned by gather
+    """
+    for label, result in zip(labels, results):
+        if isinstance(result, BaseException):
+            logger.error("%s: %s failed: %s", context, label, result, exc_info=result)
+
 
 class AutoVerifyCog(commands.Cog):
     """Automatic verification on member join."""
     
+    # Most recent verification messages remembered for lazy thread creation
+    PENDING_THREADS_MAX = 500
+    
+    # Seconds a join with no linked EMC account skips the lookup on rejoin
+    UNLINKED_TTL = 300.0
+    UNLINKED_MAX = 1000
+    
     def __init__(self, bot):
         self.bot = bot
+        self._guild_id = int(bot.config['bot']['guild_id'])
+        # Accounts younger than this skip the EMC lookup (0 disables the check)
+        self._min_account_age = float(bot.config['bot'].get('min_account_age_seconds', 0))
+        # Discord IDs recently found with no linked EMC account -> expiry
+        self._unlinked: Dict[str, float] = {}
+        # Join handling in progress, by Discord ID
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Logging channel messages without a thread yet: message ID -> IGN
+        self._pending_threads: "OrderedDict[int, str]" = OrderedDict()
+        # Detached work that doesn't affect the member; referenced so it isn't collected
+        self._background_tasks: Set[asyncio.Task] = set()
         
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Handle member join event."""
-        # Only process if in the configured guild
-        if member.guild.id != int(self.bot.config['bot']['guild_id']):
+        # Only process if in the configured guild. This is the first thing done
+        # with the event: an int compare against the ID parsed once at load.
+        # The gateway payload is already parsed into a Member by the time any
+        # listener runs, raw or not, so there is nothing earlier to hook.
+        if member.guild.id != self._guild_id:
             return
         
-        logger.info(f"Member joined: {member.display_name} (ID: {member.id})")
+        logger.info("Member joined: %s (ID: %s)", member.display_name, member.id)
+        
+        discord_id = str(member.id)
         
+        # A duplicate join event for the same user shares the running handler
+        task = self._inflight.get(discord_id)
+        if task is None:
+            task = asyncio.create_task(self._handle_join(member, discord_id))
+            self._inflight[discord_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(discord_id, None))
+        else:
+            logger.info("Join for %s already being processed", member.id)
+        
+        await asyncio.shield(task)
+    
+    async def _handle_join(self, member: discord.Member, discord_id: str):
+        """Blacklist-check and verify or reverify a joining member."""
         try:
-            # Check blacklist
-            if self.bot.is_blacklisted_discord(str(member.id)):
-                logger.warning(f"Blacklisted user attempted to join: {member.id}")
+            # Check blacklist (set lookup kept in sync by the blacklist command)
+            if discord_id in self.bot.blacklist_discord_ids:
+                logger.warning("Blacklisted user attempted to join: %s", member.id)
                 return
             
             # Check if already verified in database (rejoin case)
-            existing_user = await self.bot.db.get_user_by_discord(str(member.id))
+            existing_user = await self.bot.db.get_user_with_county(discord_id)
             
             if existing_user:
                 # User rejoined - reverify with current EMC status
-                logger.info(f"Rejoining user detected: {member.display_name}")
+                logger.info("Rejoining user detected: %s", member.display_name)
                 await self._reverify_user(member, existing_user)
                 return
             
-            # Query EMC API for Discord-linked account
-            player_data = await self.bot.api.get_player_by_discord(str(member.id))
+            # A brand-new Discord account can't have been linked on EMC yet;
+            # its age comes from the snowflake, so this costs no request
+            if self._min_account_age:
+                account_age = (discord.utils.utcnow() - member.created_at).total_seconds()
+                if account_age < self._min_account_age:
+                    logger.info("Skipping EMC lookup for new account %s (%.0fs old)", member.id, account_age)
+                    return
+            
+            # Skip users who rejoin shortly after we found no linked account
+            now = time.monotonic()
+            if self._unlinked.get(discord_id, 0.0) > now:
+                logger.info("No EMC account linked for %s (recently checked)", member.display_name)
+                return
+            
+            # Query EMC API for Discord-linked account. The client already
+            # retries rate limits and server errors, so a failure here is final
+            player_data = await self.bot.api.get_player_by_discord(discord_id)
             
             if not player_data:
                 # No linked account - do nothing
-                logger.info(f"No EMC account linked for {member.display_name}")
+                logger.info("No EMC account linked for %s", member.display_name)
+                self._remember_unlinked(discord_id, now)
                 return
             
             # Check if Minecraft account is blacklisted
             mc_uuid = player_data.get('uuid')
-            if self.bot.is_blacklisted_minecraft(mc_uuid):
-                logger.warning(f"User has blacklisted Minecraft account: {member.id}")
+            if mc_uuid in self.bot.blacklist_minecraft_uuids:
+                logger.warning("User has blacklisted Minecraft account: %s", member.id)
                 return
             
             # Auto-verify the user
             await self._auto_verify(member, player_data)
             
         except Exception as e:
-            logger.error(f"Error in on_member_join: {e}", exc_info=True)
+            logger.error("Error in on_member_join: %s", e, exc_info=True)
     
     async def _auto_verify(self, member: discord.Member, player_data: dict):
         """Automatically verify a new member."""
         try:
-            # Extract data
-            minecraft_uuid = player_data.get('uuid')
-            minecraft_ign = player_data.get('name')
-            town = player_data.get('town', {})
-            nation = player_data.get('nation', {})
-            
-            town_uuid = town.get('uuid')
-            town_name = town.get('name')
-            nation_uuid = nation.get('uuid')
-            nation_name = nation.get('name')
-            
-            # EMC verified (Discord is linked)
-            emc_verified = True
-            
-            # Determine roles
-            role_ids = determine_roles(nation_name, town_uuid, self.bot.config)
-            
-            # Get county if in main nation
-            county_uuid = None
-            if is_main_nation(nation_name, self.bot.config) and town_uuid:
-                county_data = await self.bot.db.get_county_for_town(town_uuid)
-                if county_data:
-                    county_uuid = county_data.get('county_uuid')
-            
-            # Assign roles
-            await assign_roles(member, role_ids, member.guild)
-            
-            # Apply nickname
-            nickname_text = format_nickname(
-                minecraft_ign,
-                town_name,
-                nation_name,
-                is_main_nation(nation_name, self.bot.config)
+            # Roles/nickname and the logging channel lookup are independent
+            membership, logging_channel = await asyncio.gather(
+                self._apply_membership(member, player_data, "Auto-verify"),
+                self.bot.get_logging_channel(),
+                return_exceptions=True
             )
-            await set_nickname(member, nickname_text)
+            if isinstance(membership, BaseException):
+                raise membership
+            _log_failures("Auto-verify", ("logging channel",), (logging_channel,))
+            if isinstance(logging_channel, BaseException):
+                logging_channel = None
+            
+            minecraft_uuid = membership['minecraft_uuid']
+            minecraft_ign = membership['minecraft_ign']
             
             # Save to database
             user_data = {
                 'discord_id': str(member.id),
-                'minecraft_uuid': minecraft_uuid,
-                'minecraft_ign': minecraft_ign,
-                'town_uuid': town_uuid,
-                'town_name': town_name,
-                'nation_uuid': nation_uuid,
-                'nation_name': nation_name,
-                'county_uuid': county_uuid,
-                'emc_verified': emc_verified,
+                **membership,
+                'emc_verified': True,  # EMC verified (Discord is linked)
                 'verified_by': None  # Auto-verified
             }
             
-            await self.bot.db.add_user(user_data)
+            # Create verification embed
+            embed = create_verification_embed(user_data, member, self.bot.config)
             
-            # Log to audit
-            await self.bot.db.add_audit_log({
-                'action_type': 'auto_verify',
-                'actor_id': None,
-                'target_discord_id': str(member.id),
+            # Posting to the logging channel doesn't need to hold up the join
+            self._spawn_background(
+                self._post_verification_log(logging_channel, embed, minecraft_ign),
+                "logging channel post"
+            )
+            
+            # Persist user and audit log in one transaction
+            await self.bot.db.add_user_with_audit(user_data, _AUTO_VERIFY_AUDIT | {
+                'target_discord_id': user_data['discord_id'],
                 'target_minecraft_uuid': minecraft_uuid,
                 'details': {
                     'minecraft_ign': minecraft_ign,
-                    'town': town_name,
-                    'nation': nation_name,
+                    'town': membership['town_name'],
+                    'nation': membership['nation_name'],
                     'trigger': 'member_join'
-                },
-                'success': True
+                }
             })
             
-            # Create verification embed
-            embed = create_verification_embed(user_data, member, self.bot.config)
-            
-            # Send to logging channel and create thread
-            logging_channel = await self.bot.get_logging_channel()
-            if logging_channel:
-                message = await logging_channel.send(embed=embed)
-                thread = await message.create_thread(
-                    name=f"Auto-Verification: {minecraft_ign}",
-                    auto_archive_duration=1440
-                )
-                await thread.send(f"Automatically verified on join")
-            
-            logger.info(f"Auto-verified {member.display_name} as {minecraft_ign}")
+            logger.info("Auto-verified %s as %s", member.display_name, minecraft_ign)
             
         except Exception as e:
-            logger.error(f"Error in auto-verify: {e}", exc_info=True)
+            logger.error("Error in auto-verify: %s", e, exc_info=True)
     
     async def _reverify_user(self, member: discord.Member, existing_user: dict):
         """Re-verify a returning member with current EMC status."""
@@ -162,69 +200,190 @@ class AutoVerifyCog(commands.Cog):
             player_data = await self.bot.api.get_player_by_uuid(minecraft_uuid)
             
             if not player_data:
-                logger.warning(f"Could not find EMC data for returning user {member.display_name}")
+                logger.warning("Could not find EMC data for returning user %s", member.display_name)
                 return
             
-            # Update with current data
-            town = player_data.get('town', {})
-            nation = player_data.get('nation', {})
-            
-            town_uuid = town.get('uuid')
-            town_name = town.get('name')
-            nation_uuid = nation.get('uuid')
-            nation_name = nation.get('name')
-            
-            # Determine roles
-            role_ids = determine_roles(nation_name, town_uuid, self.bot.config)
-            
-            # Get county if in main nation
-            county_uuid = None
-            if is_main_nation(nation_name, self.bot.config) and town_uuid:
-                county_data = await self.bot.db.get_county_for_town(town_uuid)
-                if county_data:
-                    county_uuid = county_data.get('county_uuid')
-            
-            # Assign roles
-            await assign_roles(member, role_ids, member.guild)
-            
-            # Apply nickname
-            minecraft_ign = player_data.get('name')
-            nickname_text = format_nickname(
-                minecraft_ign,
-                town_name,
-                nation_name,
-                is_main_nation(nation_name, self.bot.config)
+            # Update roles and nickname with current data; the stored town's
+            # county came with the user row
+            membership = await self._apply_membership(
+                member,
+                player_data,
+                "Reverify",
+                known_county=(existing_user['town_uuid'], existing_user['town_county_uuid'])
             )
-            await set_nickname(member, nickname_text)
             
-            # Update database
+            # Update database; the audit entry goes through the batched writer
             updates = {
-                'town_uuid': town_uuid,
-                'town_name': town_name,
-                'nation_uuid': nation_uuid,
-                'nation_name': nation_name,
-                'county_uuid': county_uuid
+                'town_uuid': membership['town_uuid'],
+                'town_name': membership['town_name'],
+                'nation_uuid': membership['nation_uuid'],
+                'nation_name': membership['nation_name'],
+                'county_uuid': membership['county_uuid']
             }
-            await self.bot.db.update_user(str(member.id), updates)
-            
-            # Log to audit
-            await self.bot.db.add_audit_log({
-                'action_type': 'rejoin_reverify',
-                'actor_id': None,
+            await self.bot.db.update_user_membership(str(member.id), updates)
+            self.bot.queue_audit_log(_REVERIFY_AUDIT | {
                 'target_discord_id': str(member.id),
                 'target_minecraft_uuid': minecraft_uuid,
                 'details': {
-                    'minecraft_ign': minecraft_ign,
-                    'town': town_name,
-                    'nation': nation_name
-                },
-                'success': True
+                    'minecraft_ign': membership['minecraft_ign'],
+                    'town': membership['town_name'],
+                    'nation': membership['nation_name']
+                }
             })
             
-            logger.info(f"Re-verified returning user {member.display_name}")
+            logger.info("Re-verified returning user %s", member.display_name)
             
         except Exception as e:
-            logger.error(f"Error in reverify: {e}", exc_info=True)
+            logger.error("Error in reverify: %s", e, exc_info=True)
+    
+    async def _apply_membership(
+        self,
+        member: discord.Member,
+        player_data: dict,
+        context: str,
+        known_county: Optional[Tuple[Optional[str], Optional[str]]] = None
+    ) -> Dict[str, Any]:
+        """Assign roles and nickname for a member's current town and nation.
+        
+        The county lookup, role assignment and nickname change run concurrently.
+        
+        Args:
+            member: Discord member
+            player_data: EMC player data
+            context: Name of the calling flow, used in failure logs
+            known_county: (town UUID, county UUID) already loaded from the
+                database; used instead of a lookup if the town is unchanged
+            
+        Returns:
+            Player and membership fields to store for the user
+        """
+        (
+            minecraft_uuid, minecraft_ign,
+            town_uuid, town_name,
+            nation_uuid, nation_name
+        ) = extract_player_fields(player_data)
+        
+        config = self.bot.config
+        main_nation = is_main_nation(nation_name, config)
+        role_ids = determine_roles(nation_name, town_uuid, config)
+        nickname_text = format_nickname(
+            minecraft_ign,
+            town_name,
+            nation_name,
+            main_nation
+        )
+        
+        county_uuid, *results = await asyncio.gather(
+            self._get_county_uuid(main_nation, town_uuid, known_county),
+            assign_roles(member, role_ids, member.guild),
+            set_nickname(member, nickname_text),
+            return_exceptions=True
+        )
+        _log_failures(context, ("county lookup", "assign roles", "set nickname"), (county_uuid, *results))
+        if isinstance(county_uuid, BaseException):
+            county_uuid = None
+        
+        return {
+            'minecraft_uuid': minecraft_uuid,
+            'minecraft_ign': minecraft_ign,
+            'town_uuid': town_uuid,
+            'town_name': town_name,
+            'nation_uuid': nation_uuid,
+            'nation_name': nation_name,
+            'county_uuid': county_uuid
+        }
+    
+    async def _get_county_uuid(
+        self,
+        main_nation: bool,
+        town_uuid: Optional[str],
+        known_county: Optional[Tuple[Optional[str], Optional[str]]] = None
+    ) -> Optional[str]:
+        """Look up the county of a town in a main nation.
+        
+        Args:
+            main_nation: Whether the town's nation is a main nation
+            town_uuid: Town UUID
+            known_county: (town UUID, county UUID) already loaded, if any
+            
+        Returns:
+            County UUID, or None if the town is not in a county
+        """
+        if not (main_nation and town_uuid):
+            return None
+        
+        if known_county and known_county[0] == town_uuid:
+            return known_county[1]
+        
+        county_data = await self.bot.db.get_county_for_town(town_uuid)
+        return county_data.get('county_uuid') if county_data else None
+    
+    def _remember_unlinked(self, discord_id: str, now: float) -> None:
+        """Record that a Discord ID has no linked EMC account, pruning expired entries."""
+        if len(self._unlinked) >= self.UNLINKED_MAX:
+            self._unlinked = {
+                key: expiry for key, expiry in self._unlinked.items()
+                if expiry > now
+            }
+        self._unlinked[discord_id] = now + self.UNLINKED_TTL
+    
+    def _spawn_background(self, coro: Coroutine, label: str) -> None:
+        """Run a coroutine detached from the caller, logging any failure.
+        
+        Args:
+            coro: Coroutine to run
+            label: Name of the operation, used in failure logs
+        """
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        
+        def _done(task: asyncio.Task):
+            self._background_tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                _log_failures("Background task", (label,), (task.exception(),))
+        
+        task.add_done_callback(_done)
+    
+    async def _post_verification_log(
+        self,
+        logging_channel: Optional[discord.TextChannel],
+        embed: discord.Embed,
+        minecraft_ign: str
+    ):
+        """Send the verification embed to the logging channel.
+        
+        A discussion thread is only opened once a moderator reacts to the
+        message, which saves two REST calls per join.
+        """
+        if not logging_channel:
+            return
+        
+        message = await logging_channel.send("Automatically verified on join", embed=embed)
+        
+        self._pending_threads[message.id] = minecraft_ign
+        while len(self._pending_threads) > self.PENDING_THREADS_MAX:
+            self._pending_threads.popitem(last=False)
+    
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """Open a thread on an auto-verification message when a moderator reacts to it."""
+        minecraft_ign = self._pending_threads.get(payload.message_id)
+        if minecraft_ign is None or not self.bot.is_admin(payload.user_id):
+            return
+        
+        del self._pending_threads[payload.message_id]
+        
+        channel = self.bot.get_channel(payload.channel_id)
+        if channel is None:
+            return
+        
+        try:
+            await channel.get_partial_message(payload.message_id).create_thread(
+                name=f"Auto-Verification: {minecraft_ign}",
+                auto_archive_duration=1440
+            )
+        except discord.HTTPException as e:
+            logger.warning("Could not create verification thread: %s", e)
 
 
 async def setup(bot):
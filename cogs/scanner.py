@@ -1,39 +1,99 @@
 """Periodic scanning cog."""
 
 import discord
+import asyncio
 from discord.ext import commands, tasks
 import logging
+import random
 import time
-from typing import Dict, List, Any
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from utils import (
     create_notification_embed,
+    scan_timestamps,
     determine_roles,
     format_nickname,
     is_main_nation,
-    compare_lists,
     detect_milestone
 )
 from utils.roles import update_roles
 from utils.nicknames import set_nickname
 from utils.data_processor import prepare_town_for_cache
+from api import Nation, Town
 
 logger = logging.getLogger('EMCBot.Scanner')
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Town status flags, named as both Town attributes and town_cache columns
+_STATUS_KEYS = (
+    'is_public',
+    'is_open',
+    'is_overclaimed',
+    'is_for_sale',
+    'has_overclaim_shield',
+)
+
+
+def _extract_uuid_set(residents: Any) -> FrozenSet[str]:
+    """Collect resident UUIDs from a list of UUID strings or resident objects.
+    
+    Args:
+        residents: Resident list from the API or the town cache
+        
+    Returns:
+        Set of non-empty resident UUIDs
+    """
+    if not isinstance(residents, list):
+        return frozenset()
+    return frozenset(
+        uuid for uuid in (r.get('uuid') if isinstance(r, dict) else r for r in residents)
+        if uuid and isinstance(uuid, str)
+    )
+
 
 class ScannerCog(commands.Cog):
     """Periodic scanning tasks."""
     
+    # Changed users updated at once during a user scan; keeps role and
+    # nickname edits within Discord's rate limits
+    USER_UPDATE_CONCURRENCY = 10
+    
+    # Users read from the database and looked up on EMC per step of a user scan
+    USER_SCAN_BATCH = 500
+    
+    # Main nations scanned at once during a nation scan
+    NATION_SCAN_CONCURRENCY = 4
+    
+    # Nation scan interval in seconds: grows while scans find no changes and
+    # resets on the first change; jitter keeps runs from settling into lockstep
+    NATION_SCAN_MIN_INTERVAL = 10.0
+    NATION_SCAN_MAX_INTERVAL = 120.0
+    NATION_SCAN_BACKOFF = 1.5
+    NATION_SCAN_JITTER = 2.0
+    
     def __init__(self, bot):
         self.bot = bot
+        # Keep the periodic and manually triggered runs of a scan from overlapping
+        self._user_scan_lock = asyncio.Lock()
+        self._nation_scan_lock = asyncio.Lock()
+        self._nation_scan_semaphore = asyncio.Semaphore(self.NATION_SCAN_CONCURRENCY)
+        self._nation_scan_interval = self.NATION_SCAN_MIN_INTERVAL
         self.user_scan_task.start()
         self.nation_scan_task.start()
+        self.maintenance_task.start()
         
     def cog_unload(self):
         """Stop tasks when cog is unloaded."""
         self.user_scan_task.cancel()
         self.nation_scan_task.cancel()
+        self.maintenance_task.cancel()
     
     @tasks.loop(seconds=10800)  # 3 hours
     async def user_scan_task(self):
@@ -49,63 +109,128 @@ class ScannerCog(commands.Cog):
         await self.bot.wait_until_ready()
         logger.info("User scan task started")
     
-    @tasks.loop(seconds=10)  # 3 hours
+    @tasks.loop(seconds=10)  # Adjusted after each run, see _adapt_nation_scan_interval
     async def nation_scan_task(self):
         """Periodic nation scan task."""
         try:
-            await self.run_nation_scan()
+            result = await self.run_nation_scan()
+            self._adapt_nation_scan_interval(result['changes'])
         except Exception as e:
             logger.error(f"Error in nation scan task: {e}", exc_info=True)
     
+    def _adapt_nation_scan_interval(self, changes: int):
+        """Back off the nation scan while idle and reset it on changes.
+        
+        Args:
+            changes: Number of towns with changes in the last scan
+        """
+        if changes:
+            self._nation_scan_interval = self.NATION_SCAN_MIN_INTERVAL
+        else:
+            self._nation_scan_interval = min(
+                self._nation_scan_interval * self.NATION_SCAN_BACKOFF,
+                self.NATION_SCAN_MAX_INTERVAL
+            )
+        self.nation_scan_task.change_interval(
+            seconds=self._nation_scan_interval + random.uniform(0, self.NATION_SCAN_JITTER)
+        )
+    
     @nation_scan_task.before_loop
     async def before_nation_scan(self):
         """Wait until bot is ready before starting task."""
         await self.bot.wait_until_ready()
         logger.info("Nation scan task started")
     
+    @tasks.loop(hours=24)
+    async def maintenance_task(self):
+        """Daily full refresh of the database's query planner statistics."""
+        try:
+            await self.bot.db.analyze()
+        except Exception as e:
+            logger.error(f"Error in maintenance task: {e}", exc_info=True)
+    
+    @maintenance_task.before_loop
+    async def before_maintenance(self):
+        """Wait until bot is ready before starting task."""
+        await self.bot.wait_until_ready()
+        logger.info("Maintenance task started")
+    
     async def run_user_scan(self) -> Dict[str, Any]:
         """Run user verification scan."""
+        async with self._user_scan_lock:
+            return await self._run_user_scan()
+    
+    async def _run_user_scan(self) -> Dict[str, Any]:
+        """Scan verified users for town/nation changes."""
         logger.info("Starting user scan...")
         start_time = time.time()
         changes_detected = 0
         
         try:
-            # Get all verified users from database
-            users = await self.bot.db.get_all_verified_users()
-            logger.info(f"Scanning {len(users)} verified users")
-            
-            # Get current EMC data for all users
-            uuids = [user['minecraft_uuid'] for user in users]
-            current_data = await self.bot.batch_handler.get_all_verified_player_data(uuids)
-            
-            # Create lookup dict
-            current_lookup = {p['uuid']: p for p in current_data}
-            
-            # Check each user for changes
-            for user in users:
-                mc_uuid = user['minecraft_uuid']
-                discord_id = user['discord_id']
-                
-                # Get current EMC data
-                current = current_lookup.get(mc_uuid)
+            # Stream verified users from the database a batch at a time,
+            # collecting those whose town or nation changed
+            scanned = 0
+            changed_users = []
+            async for users in self.bot.db.iter_verified_users_for_scan(self.USER_SCAN_BATCH):
+                scanned += len(users)
                 
-                if not current:
-                    # Player no longer exists on EMC (unlikely)
-                    logger.warning(f"Player {user['minecraft_ign']} no longer on EMC")
-                    continue
+                # Get current EMC data for the batch
+                uuids = [user['minecraft_uuid'] for user in users]
+                current_data = await self.bot.batch_handler.get_all_verified_player_data(uuids)
                 
-                # Check for changes
-                changed = await self._check_user_changes(user, current)
+                # Create lookup dict
+                current_lookup = {p['uuid']: p for p in current_data}
                 
-                if changed:
-                    changes_detected += 1
-                    await self._update_user(discord_id, current)
+                for user in users:
+                    # Get current EMC data
+                    current = current_lookup.get(user['minecraft_uuid'])
+                    
+                    if not current:
+                        # Player no longer exists on EMC (unlikely)
+                        logger.warning(f"Player {user['minecraft_ign']} no longer on EMC")
+                        continue
+                    
+                    # Check for changes
+                    if await self._check_user_changes(user, current):
+                        changed_users.append((user, current))
+            
+            logger.info(f"Scanned {scanned} verified users")
+            
+            changes_detected = len(changed_users)
+            
+            # Look up counties for all new main nation towns in one query
+            new_town_uuids = [
+                (current.get('town') or {}).get('uuid')
+                for _, current in changed_users
+                if is_main_nation((current.get('nation') or {}).get('name'), self.bot.config)
+            ]
+            county_map = await self.bot.db.get_counties_for_towns(
+                [town_uuid for town_uuid in new_town_uuids if town_uuid]
+            )
+            
+            semaphore = asyncio.Semaphore(self.USER_UPDATE_CONCURRENCY)
+            membership_updates: List[Tuple[str, dict]] = []
+            
+            async def update(user: dict, current: dict):
+                async with semaphore:
+                    await self._update_user(user, current, county_map, membership_updates)
+            
+            results = await asyncio.gather(
+                *(update(user, current) for user, current in changed_users),
+                return_exceptions=True
+            )
+            for (user, _), result in zip(changed_users, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Error updating user {user['discord_id']}: {result}", exc_info=result)
+            
+            # Every changed user's row is written in one transaction
+            await self.bot.db.bulk_update_user_membership(membership_updates)
             
             duration = time.time() - start_time
-            logger.info(f"User scan complete: {len(users)} scanned, {changes_detected} changes in {duration:.2f}s")
+            logger.info(f"User scan complete: {scanned} scanned, {changes_detected} changes in {duration:.2f}s")
             
             return {
-                'scanned': len(users),
+                'scanned': scanned,
                 'changes': changes_detected,
                 'duration': duration
             }
@@ -135,17 +260,29 @@ class ScannerCog(commands.Cog):
         
         return changed
     
-    async def _update_user(self, discord_id: str, player_data: dict):
-        """Update a user's data and roles."""
+    async def _update_user(
+        self,
+        stored_user: dict,
+        player_data: dict,
+        county_map: Dict[str, str],
+        membership_updates: List[Tuple[str, dict]]
+    ):
+        """Update a user's roles and nickname and queue their database update.
+        
+        Args:
+            stored_user: User row as loaded at the start of the scan
+            player_data: Current EMC player data
+            county_map: Town UUID -> county UUID for the scan's changed towns
+            membership_updates: Collects (Discord ID, updates) pairs for the
+                scan to write in one transaction
+        """
+        discord_id = stored_user['discord_id']
         try:
             member = self.bot.guild.get_member(int(discord_id))
             if not member:
                 logger.warning(f"Could not find member {discord_id}")
                 return
             
-            # Get stored data
-            stored_user = await self.bot.db.get_user_by_discord(discord_id)
-            
             # Extract current data
             town = player_data.get('town', {})
             nation = player_data.get('nation', {})
@@ -170,12 +307,12 @@ class ScannerCog(commands.Cog):
                 self.bot.config
             )
             
+            main_nation = is_main_nation(nation_name, self.bot.config)
+            
             # Get county if in main nation
             county_uuid = None
-            if is_main_nation(nation_name, self.bot.config) and town_uuid:
-                county_data = await self.bot.db.get_county_for_town(town_uuid)
-                if county_data:
-                    county_uuid = county_data.get('county_uuid')
+            if main_nation and town_uuid:
+                county_uuid = county_map.get(town_uuid)
             
             # Update roles
             await update_roles(member, old_role_ids, new_role_ids, self.bot.guild)
@@ -185,11 +322,11 @@ class ScannerCog(commands.Cog):
                 minecraft_ign,
                 town_name,
                 nation_name,
-                is_main_nation(nation_name, self.bot.config)
+                main_nation
             )
             await set_nickname(member, nickname_text)
             
-            # Update database
+            # Queue the database update
             updates = {
                 'minecraft_ign': minecraft_ign,
                 'town_uuid': town_uuid,
@@ -198,10 +335,10 @@ class ScannerCog(commands.Cog):
                 'nation_name': nation_name,
                 'county_uuid': county_uuid
             }
-            await self.bot.db.update_user(discord_id, updates)
+            membership_updates.append((discord_id, updates))
             
-            # Log to audit
-            await self.bot.db.add_audit_log({
+            # Log to audit; the bot's writer inserts queued entries in batches
+            self.bot.queue_audit_log({
                 'action_type': 'scan_update',
                 'actor_id': None,
                 'target_discord_id': discord_id,
@@ -222,9 +359,13 @@ class ScannerCog(commands.Cog):
     
     async def run_nation_scan(self) -> Dict[str, Any]:
         """Run nation/town scan."""
+        async with self._nation_scan_lock:
+            return await self._run_nation_scan()
+    
+    async def _run_nation_scan(self) -> Dict[str, Any]:
+        """Scan main nation towns for changes."""
         logger.info("Starting nation scan...")
         start_time = time.time()
-        changes_detected = 0
         
         try:
             # Get main nations from config
@@ -238,122 +379,28 @@ class ScannerCog(commands.Cog):
                     'duration': 0
                 }
             
-            towns_scanned = 0
+            # Nations are scanned concurrently, a few at a time; their nation
+            # cache rows are collected and written together afterwards. All
+            # notifications from this scan carry the same timestamp
+            nation_rows: List[dict] = []
+            with scan_timestamps():
+                results = await asyncio.gather(
+                    *(self._scan_nation_limited(nation_config, nation_rows) for nation_config in main_nations),
+                    return_exceptions=True
+                )
+            await self.bot.db.bulk_upsert_nation_cache(nation_rows)
             
-            for nation_config in main_nations:
-                # Validate nation config
-                if not isinstance(nation_config, dict):
-                    logger.error(f"Invalid nation config: {nation_config} (type: {type(nation_config)})")
-                    continue
-                
-                nation_name = nation_config.get('name')
-                
-                # Validate nation name
-                if not nation_name:
-                    logger.warning("Nation name is empty or missing - skipping")
-                    continue
-                
-                if not isinstance(nation_name, str):
-                    logger.error(f"Nation name is not a string: {nation_name} (type: {type(nation_name)})")
-                    continue
-                
-                nation_name = nation_name.strip()
-                
-                if not nation_name:
-                    logger.warning("Nation name is empty after stripping - skipping")
-                    continue
-                
-                logger.info(f"Processing nation: '{nation_name}'")
-                
-                try:
-                    # Get current nation data
-                    logger.debug(f"Querying nation: {nation_name}")
-                    nation_data = await self.bot.api.get_nation_by_name(nation_name)
-                    
-                    if not nation_data:
-                        logger.warning(f"Could not find nation {nation_name} - it may not exist on the server")
-                        continue
-                    
-                    nation_uuid = nation_data.get('uuid')
-                    if not nation_uuid:
-                        logger.warning(f"Nation {nation_name} has no UUID")
-                        continue
-                    
-                    # Update nation cache
-                    await self.bot.db.upsert_nation_cache({
-                        'uuid': nation_uuid,
-                        'name': nation_name
-                    })
-                    
-                    # Get all towns in nation - extract UUIDs from town objects
-                    town_data_list = nation_data.get('towns', [])
-                    
-                    # Extract UUID strings from town objects
-                    # The API may return town objects like {"uuid": "...", "name": "..."}
-                    # or just UUID strings, so we handle both cases
-                    town_uuids = []
-                    for town in town_data_list:
-                        if isinstance(town, dict):
-                            # Town is an object with uuid field
-                            uuid = town.get('uuid')
-                            if uuid:
-                                town_uuids.append(uuid)
-                        elif isinstance(town, str):
-                            # Town is already a UUID string
-                            town_uuids.append(town)
-                    
-                    towns_scanned += len(town_uuids)
-                    
-                    if not town_uuids:
-                        logger.info(f"Nation {nation_name} has no towns")
-                        continue
-                    
-                    logger.debug(f"Querying {len(town_uuids)} towns for {nation_name}")
-                    
-                    # Batch query all towns - now with proper UUID strings
-                    current_towns = await self.bot.api.get_towns_by_uuids(town_uuids)
-                    
-                    if not current_towns:
-                        logger.warning(f"Could not get town data for {nation_name}")
-                        continue
-                    
-                    # Check each town for changes
-                    for town_data in current_towns:
-                        try:
-                            # Defensive check: ensure town_data is a dict
-                            if not isinstance(town_data, dict):
-                                logger.error(f"Town data is not a dict! Type: {type(town_data)}, Value: {str(town_data)[:200]}")
-                                continue
-                            
-                            town_uuid = town_data.get('uuid')
-                            if not town_uuid:
-                                logger.warning(f"Town data has no uuid: {str(town_data)[:200]}")
-                                continue
-                            
-                            town_name = town_data.get('name', 'unknown')
-                            
-                            # Get cached town data
-                            cached = await self.bot.db.get_town_cache(town_uuid)
-                            
-                            # Detect changes
-                            changes = self._detect_town_changes(cached, town_data)
-                            
-                            if changes:
-                                changes_detected += 1
-                                await self._send_notifications(town_data, changes)
-                            
-                            # Update cache - use data processor to format correctly
-                            processed_town_data = prepare_town_for_cache(town_data)
-                            await self.bot.db.upsert_town_cache(processed_town_data)
-                        except Exception as e:
-                            town_name = town_data.get('name', 'unknown') if isinstance(town_data, dict) else str(town_data)[:50]
-                            logger.error(f"Error processing town {town_name}: {e}")
-                            logger.error(f"Town data type: {type(town_data)}, value: {str(town_data)[:200]}")
-                            continue
-                    
-                except Exception as e:
-                    logger.error(f"Error scanning nation {nation_name}: {e}", exc_info=True)
+            # The scan rewrote town rows; keep planner statistics current
+            await self.bot.db.optimize()
+            
+            towns_scanned = 0
+            changes_detected = 0
+            for nation_config, result in zip(main_nations, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Error scanning nation {nation_config}: {result}", exc_info=result)
                     continue
+                towns_scanned += result[0]
+                changes_detected += result[1]
             
             duration = time.time() - start_time
             logger.info(f"Nation scan complete: {towns_scanned} towns scanned, {changes_detected} changes in {duration:.2f}s")
@@ -372,21 +419,182 @@ class ScannerCog(commands.Cog):
                 'duration': time.time() - start_time
             }
     
-    def _detect_town_changes(self, cached: dict, current: dict) -> Dict[str, Any]:
-        """Detect changes in town data."""
+    async def _scan_nation_limited(self, nation_config: Any, nation_rows: List[dict]) -> Tuple[int, int]:
+        """Scan one nation while holding a nation scan slot."""
+        async with self._nation_scan_semaphore:
+            return await self._scan_nation(nation_config, nation_rows)
+    
+    async def _scan_nation(self, nation_config: Any, nation_rows: List[dict]) -> Tuple[int, int]:
+        """Scan one main nation's towns for changes.
+        
+        Args:
+            nation_config: Nation entry from the ``main_nations`` config
+            nation_rows: Nation cache rows for the scan, appended to
+            
+        Returns:
+            Tuple of (towns scanned, towns with changes)
+        """
+        # Validate nation config
+        if not isinstance(nation_config, dict):
+            logger.error(f"Invalid nation config: {nation_config} (type: {type(nation_config)})")
+            return 0, 0
+        
+        nation_name = nation_config.get('name')
+        
+        # Validate nation name
+        if not nation_name:
+            logger.warning("Nation name is empty or missing - skipping")
+            return 0, 0
+        
+        if not isinstance(nation_name, str):
+            logger.error(f"Nation name is not a string: {nation_name} (type: {type(nation_name)})")
+            return 0, 0
+        
+        nation_name = nation_name.strip()
+        
+        if not nation_name:
+            logger.warning("Nation name is empty after stripping - skipping")
+            return 0, 0
+        
+        logger.info(f"Processing nation: '{nation_name}'")
+        
+        towns_scanned = 0
+        changes_detected = 0
+        
+        try:
+            # Get current nation data. The scan runs far more often than the
+            # nation cache expires, so a cached entry would hide town changes
+            logger.debug(f"Querying nation: {nation_name}")
+            nation_data = await self.bot.api.get_nation_by_name(nation_name, use_cache=False)
+            
+            if not nation_data:
+                logger.warning(f"Could not find nation {nation_name} - it may not exist on the server")
+                return 0, 0
+            
+            nation_uuid = nation_data.get('uuid')
+            if not nation_uuid:
+                logger.warning(f"Nation {nation_name} has no UUID")
+                return 0, 0
+            
+            # Update nation cache
+            nation_rows.append({
+                'uuid': nation_uuid,
+                'name': nation_name
+            })
+            
+            # Get all town UUIDs in nation (handles object and string forms)
+            town_uuids = Nation.from_api(nation_data).towns
+            
+            towns_scanned = len(town_uuids)
+            
+            if not town_uuids:
+                logger.info(f"Nation {nation_name} has no towns")
+                return towns_scanned, 0
+            
+            logger.debug(f"Querying {len(town_uuids)} towns for {nation_name}")
+            
+            # The cached towns are read while the towns are fetched. Cached
+            # residents are not loaded; they are only needed when the
+            # residents hash differs
+            cache_read = asyncio.ensure_future(
+                self.bot.db.get_town_caches(town_uuids, parse_residents=False)
+            )
+            cached_map = None
+            towns_received = 0
+            malformed = []
+            
+            # Cache rows are written together after the nation's towns;
+            # only towns whose data changed are rewritten
+            cache_rows = []
+            
+            # Check each town for changes as its batch arrives
+            async for town_data in self.bot.api.iter_towns_by_uuids(town_uuids):
+                towns_received += 1
+                
+                # Malformed entries are counted and reported once below
+                if not (isinstance(town_data, dict) and town_data.get('uuid')):
+                    malformed.append(town_data)
+                    continue
+                
+                if cached_map is None:
+                    cached_map = await cache_read
+                try:
+                    # Get cached town data
+                    cached = cached_map.get(town_data['uuid'])
+                    
+                    # Parsed once; the cache row and the change checks share it
+                    town = Town.from_api(town_data)
+                    
+                    # Format for the cache - use data processor to format correctly
+                    cache_row = prepare_town_for_cache(town)
+                    
+                    # Nothing stored changed: no diff and no cache write needed
+                    if cached and cached.get('payload_hash') == cache_row['payload_hash']:
+                        continue
+                    
+                    # Load the cached residents only when they changed
+                    if cached and cached.get('residents_hash') != cache_row['residents_hash']:
+                        cached['residents'] = await self.bot.db.get_town_residents(town_data['uuid'])
+                    
+                    # Detect changes
+                    changes = self._detect_town_changes(cached, town, cache_row['residents_hash'])
+                    
+                    if changes:
+                        changes_detected += 1
+                        await self._send_notifications(town_data, changes)
+                    
+                    # Update cache
+                    cache_rows.append(cache_row)
+                except Exception as e:
+                    logger.error(f"Error processing town {town_data.get('name', 'unknown')}: {e}", exc_info=True)
+            
+            await cache_read
+            
+            if malformed:
+                logger.warning(
+                    f"Skipped {len(malformed)} town entries without a uuid for {nation_name}; "
+                    f"first: {str(malformed[0])[:200]}"
+                )
+            
+            if not towns_received:
+                logger.warning(f"Could not get town data for {nation_name}")
+                return towns_scanned, 0
+            
+            await self.bot.db.bulk_upsert_town_cache(cache_rows)
+            
+        except Exception as e:
+            logger.error(f"Error scanning nation {nation_name}: {e}", exc_info=True)
+        
+        return towns_scanned, changes_detected
+    
+    def _detect_town_changes(
+        self,
+        cached: dict,
+        current: Town,
+        current_residents_hash: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Detect changes in town data.
+        
+        Args:
+            cached: Cached town row; its residents must be loaded unless
+                ``current_residents_hash`` matches the cached hash
+            current: Current town, parsed from the API
+            current_residents_hash: Hash of the current residents, if known.
+                When it matches the cached hash the resident diff is skipped
+            
+        Returns:
+            Dict of detected changes
+        """
         if not cached:
             return {}  # New town, don't send notifications
         
         changes = {}
         
         # Government changes
-        current_mayor = current.get('mayor', {})
-        current_mayor_uuid = current_mayor.get('uuid') if isinstance(current_mayor, dict) else None
-        
-        if cached.get('mayor_uuid') != current_mayor_uuid:
+        if cached.get('mayor_uuid') != current.mayor_uuid:
             changes['mayor'] = (
                 cached.get('mayor_uuid'),
-                current_mayor_uuid
+                current.mayor_uuid
             )
         
         # Board changes - Note: 'board' in API is a string (town motto/message)
@@ -394,19 +602,54 @@ class ScannerCog(commands.Cog):
         # Skip board member tracking for now as API structure differs from expected
         
         # Resident changes
+        if current_residents_hash is None or cached.get('residents_hash') != current_residents_hash:
+            self._detect_resident_changes(cached, current, changes)
+        
+        # Status changes
+        for column in _STATUS_KEYS:
+            old_value = cached.get(column)
+            new_value = getattr(current, column)
+            if old_value != new_value:
+                changes[column] = (old_value, new_value)
+        
+        # Milestone changes
+        thresholds = self.bot.config.get('thresholds', {})
+        
+        # Population milestone
+        old_pop = cached.get('num_residents', 0)
+        new_pop = current.num_residents or 0
+        pop_milestone = detect_milestone(old_pop, new_pop, thresholds.get('population', []))
+        if pop_milestone:
+            changes['population'] = pop_milestone
+        
+        # Balance milestone
+        old_balance = cached.get('balance', 0)
+        new_balance = current.balance or 0
+        balance_milestone = detect_milestone(old_balance, new_balance, thresholds.get('balance', []))
+        if balance_milestone:
+            changes['balance'] = balance_milestone
+        
+        return changes
+    
+    def _detect_resident_changes(self, cached: dict, current: Town, changes: Dict[str, Any]):
+        """Add resident additions and removals to ``changes``.
+        
+        Args:
+            cached: Cached town row
+            current: Current town, parsed from the API
+            changes: Detected changes, updated in place
+        """
         cached_residents = cached.get('residents', [])
         
         # Handle different cached formats safely
         if isinstance(cached_residents, str):
             # Cached data is a JSON string, parse it
-            import json
-            
             # Check if empty, whitespace, or None
             if not cached_residents or not cached_residents.strip():
                 cached_residents = []
             else:
                 try:
-                    cached_residents = json.loads(cached_residents)
+                    cached_residents = _json_loads(cached_residents)
                 except (json.JSONDecodeError, ValueError) as e:
                     logger.warning(f"Failed to parse cached residents JSON: {e}")
                     logger.debug(f"Cached residents value: '{cached_residents}'")
@@ -419,80 +662,16 @@ class ScannerCog(commands.Cog):
             logger.warning(f"Cached residents not a list: {type(cached_residents)}")
             cached_residents = []
         
-        # MIGRATION: Handle old cached format where residents were full objects
-        # Extract UUIDs from old format if needed
-        migrated_cached = []
-        for item in cached_residents:
-            if isinstance(item, dict):
-                # Old format: full resident object
-                uuid = item.get('uuid')
-                if uuid and isinstance(uuid, str):
-                    migrated_cached.append(uuid)
-            elif isinstance(item, str):
-                # New format: UUID string
-                migrated_cached.append(item)
-        cached_residents = migrated_cached
-        
-        # Extract resident UUIDs from current data
-        current_residents_data = current.get('residents', [])
-        current_residents = []
-        
-        if isinstance(current_residents_data, list):
-            for r in current_residents_data:
-                if isinstance(r, dict):
-                    uuid = r.get('uuid')
-                    if uuid and isinstance(uuid, str):
-                        current_residents.append(uuid)
-                elif isinstance(r, str):
-                    current_residents.append(r)
-        
-        # Final defensive check: ensure all items are strings
-        cached_residents = [str(x) for x in cached_residents if x]
-        current_residents = [str(x) for x in current_residents if x]
-        
-        try:
-            resident_diff = compare_lists(cached_residents, current_residents)
-            
-            if resident_diff['added']:
-                changes['residents_added'] = resident_diff['added']
-            if resident_diff['removed']:
-                changes['residents_removed'] = resident_diff['removed']
-        except TypeError as e:
-            if 'unhashable' in str(e):
-                logger.error(f"Unhashable type error in residents comparison")
-                logger.error(f"Cached residents types: {[type(x).__name__ for x in cached_residents[:5]]}")
-                logger.error(f"Current residents types: {[type(x).__name__ for x in current_residents[:5]]}")
-            else:
-                raise
-        except Exception as e:
-            logger.error(f"Error comparing residents: {e}")
+        # Old cached rows stored full resident objects; both forms are accepted
+        cached_set = _extract_uuid_set(cached_residents)
+        current_set = frozenset(current.residents)
         
-        # Status changes
-        status = current.get('status', {})
-        for key in ['isPublic', 'isOpen', 'isOverClaimed', 'isForSale', 'hasOverclaimShield']:
-            snake_key = key[0].lower() + ''.join(['_' + c.lower() if c.isupper() else c for c in key[1:]])
-            if cached.get(snake_key) != status.get(key):
-                changes[snake_key] = (cached.get(snake_key), status.get(key))
-        
-        # Milestone changes
-        stats = current.get('stats', {})
-        thresholds = self.bot.config.get('thresholds', {})
-        
-        # Population milestone
-        old_pop = cached.get('num_residents', 0)
-        new_pop = stats.get('numResidents', 0)
-        pop_milestone = detect_milestone(old_pop, new_pop, thresholds.get('population', []))
-        if pop_milestone:
-            changes['population'] = pop_milestone
-        
-        # Balance milestone
-        old_balance = cached.get('balance', 0)
-        new_balance = stats.get('balance', 0)
-        balance_milestone = detect_milestone(old_balance, new_balance, thresholds.get('balance', []))
-        if balance_milestone:
-            changes['balance'] = balance_milestone
-        
-        return changes
+        added = current_set - cached_set
+        removed = cached_set - current_set
+        if added:
+            changes['residents_added'] = list(added)
+        if removed:
+            changes['residents_removed'] = list(removed)
     
     async def _send_notifications(self, town_data: dict, changes: Dict[str, Any]):
         """Send notifications for town changes."""
@@ -1,10 +1,11 @@
 """Verification command cog."""
 
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
 import logging
-from typing import Optional
+from typing import Optional, Set, Coroutine
 from datetime import datetime
 
 from utils import (
@@ -12,47 +13,70 @@ from utils import (
     determine_roles,
     format_nickname,
     validate_minecraft_username,
-    is_main_nation
+    is_main_nation,
+    is_admin_check
 )
 from utils.roles import assign_roles
 from utils.nicknames import set_nickname
+from utils.data_processor import extract_player_fields
 
 logger = logging.getLogger('EMCBot.Verification')
 
 
 class VerificationDecisionView(discord.ui.View):
-    """View for verification decision panel."""
+    """View for verification decision panel.
     
-    def __init__(self, cog, interaction, user, discord_data, minecraft_data, apply_nickname):
+    Only the decision is kept; the caller holds the account data while it
+    waits, so a pending panel doesn't pin the API payloads or interaction.
+    """
+    
+    def __init__(self):
         super().__init__(timeout=300)
-        self.cog = cog
-        self.original_interaction = interaction
-        self.user = user
-        self.discord_data = discord_data
-        self.minecraft_data = minecraft_data
-        self.apply_nickname = apply_nickname
-        self.choice = None
+        self.choice: Optional[str] = None
+        self.message: Optional[discord.Message] = None
+    
+    def _disable_buttons(self):
+        """Disable every button on the panel."""
+        for item in self.children:
+            item.disabled = True
+    
+    async def _choose(self, interaction: discord.Interaction, choice: str):
+        """Record a decision and disable the panel.
+        
+        Editing the message is the interaction's acknowledgement, so the
+        buttons are disabled before a second click can land.
+        """
+        if self.choice is not None:
+            await interaction.response.defer()
+            return
+        self.choice = choice
+        self._disable_buttons()
+        await interaction.response.edit_message(view=self)
+        self.stop()
+    
+    async def on_timeout(self):
+        """Disable the panel once no decision was made in time."""
+        self._disable_buttons()
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
         
     @discord.ui.button(label="Approve with Discord Account", style=discord.ButtonStyle.green)
     async def approve_discord(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Approve using Discord account link."""
-        await interaction.response.defer()
-        self.choice = "discord"
-        self.stop()
+        await self._choose(interaction, "discord")
         
     @discord.ui.button(label="Approve with Minecraft Account", style=discord.ButtonStyle.green)
     async def approve_minecraft(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Approve using Minecraft username link."""
-        await interaction.response.defer()
-        self.choice = "minecraft"
-        self.stop()
+        await self._choose(interaction, "minecraft")
         
     @discord.ui.button(label="Reject", style=discord.ButtonStyle.red)
     async def reject(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Reject verification."""
-        await interaction.response.defer()
-        self.choice = "reject"
-        self.stop()
+        await self._choose(interaction, "reject")
 
 
 class VerificationCog(commands.Cog):
@@ -60,26 +84,44 @@ class VerificationCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        
-    def is_admin_check():
-        """Check if user is admin."""
-        async def predicate(interaction: discord.Interaction) -> bool:
-            return interaction.client.is_admin(interaction.user.id)
-        return app_commands.check(predicate)
+        # Detached work the admin doesn't wait on; referenced so it isn't collected
+        self._background_tasks: Set[asyncio.Task] = set()
     
+    def _spawn_background(self, coro: Coroutine, label: str) -> None:
+        """Run a coroutine detached from the caller, logging any failure.
+        
+        Args:
+            coro: Coroutine to run
+            label: Name of the operation, used in failure logs
+        """
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        
+        def _done(task: asyncio.Task):
+            self._background_tasks.discard(task)
+            if task.cancelled():
+                return
+            exc = task.exception()
+            if exc is not None:
+                logger.error("Error in %s: %s", label, exc, exc_info=exc)
+        
+        task.add_done_callback(_done)
+        
     @app_commands.command(name="verify", description="Manually verify a user")
-    @is_admin_check()
+    @is_admin_check
     @app_commands.describe(
         user="The Discord user to verify",
         minecraft_username="The Minecraft username",
-        nickname="Whether to apply nickname (default: True)"
+        nickname="Whether to apply nickname (default: True)",
+        force="Re-run verification even if the user is already verified (default: False)"
     )
     async def verify(
         self,
         interaction: discord.Interaction,
         user: discord.Member,
         minecraft_username: str,
-        nickname: bool = True
+        nickname: bool = True,
+        force: bool = False
     ):
         """Manually verify a user."""
         await interaction.response.defer(thinking=True)
@@ -95,9 +137,22 @@ class VerificationCog(commands.Cog):
                 await interaction.followup.send("❌ This Discord user is blacklisted.")
                 return
             
+            # Re-running for a user already verified as this account changes
+            # nothing, so skip the EMC lookups and writes unless forced
+            if not force:
+                existing = await self.bot.db.get_user_by_discord(str(user.id))
+                if existing and existing['minecraft_ign'].lower() == minecraft_username.lower():
+                    await interaction.followup.send(
+                        f"ℹ️ {user.mention} is already verified as **{existing['minecraft_ign']}**. "
+                        "Use `force: True` to verify again."
+                    )
+                    return
+            
             # Query EMC API for both accounts
-            discord_data = await self.bot.api.get_player_by_discord(str(user.id))
-            minecraft_data = await self.bot.api.get_player_by_username(minecraft_username)
+            discord_data, minecraft_data = await asyncio.gather(
+                self.bot.api.get_player_by_discord(str(user.id)),
+                self.bot.api.get_player_by_username(minecraft_username)
+            )
             
             if not minecraft_data:
                 await interaction.followup.send(f"❌ Minecraft user '{minecraft_username}' not found on EarthMC.")
@@ -193,11 +248,12 @@ class VerificationCog(commands.Cog):
             )
         
         # Create view with buttons
-        view = VerificationDecisionView(self, interaction, user, discord_data, minecraft_data, apply_nickname)
+        view = VerificationDecisionView()
         
-        await interaction.followup.send(embed=embed, view=view)
+        view.message = await interaction.followup.send(embed=embed, view=view)
         
-        # Wait for decision
+        # Wait for decision. The view times out after 5 minutes, well inside
+        # the 15 minutes the interaction's followup token stays valid
         await view.wait()
         
         if view.choice == "discord" and discord_data:
@@ -206,6 +262,8 @@ class VerificationCog(commands.Cog):
             await self._complete_verification(interaction, user, minecraft_data, apply_nickname)
         elif view.choice == "reject":
             await interaction.followup.send("❌ Verification rejected.")
+        elif view.choice is None:
+            await interaction.followup.send("⏰ No decision was made; verification cancelled.")
     
     async def _complete_verification(
         self,
@@ -217,43 +275,38 @@ class VerificationCog(commands.Cog):
         """Complete the verification process."""
         try:
             # Extract data
-            minecraft_uuid = player_data.get('uuid')
-            minecraft_ign = player_data.get('name')
-            town = player_data.get('town', {})
-            nation = player_data.get('nation', {})
-            
-            town_uuid = town.get('uuid')
-            town_name = town.get('name')
-            nation_uuid = nation.get('uuid')
-            nation_name = nation.get('name')
+            (
+                minecraft_uuid, minecraft_ign,
+                town_uuid, town_name,
+                nation_uuid, nation_name
+            ) = extract_player_fields(player_data)
             
             # Check if linked on EMC
             emc_verified = player_data.get('discord') == str(user.id)
             
             # Determine roles
             role_ids = determine_roles(nation_name, town_uuid, self.bot.config)
+            main_nation = is_main_nation(nation_name, self.bot.config)
             
-            # Get county if in main nation
-            county_uuid = None
-            if is_main_nation(nation_name, self.bot.config) and town_uuid:
-                county_data = await self.bot.db.get_county_for_town(town_uuid)
-                if county_data:
-                    county_uuid = county_data.get('county_uuid')
-            
-            # Assign roles
-            success = await assign_roles(user, role_ids, interaction.guild)
-            if not success:
-                await interaction.followup.send("⚠️ Could not assign roles (insufficient permissions or higher role).")
-            
-            # Apply nickname
+            # County lookup, roles and nickname don't depend on each other,
+            # so run them together
+            steps = [
+                self._get_county_uuid(main_nation, town_uuid),
+                assign_roles(user, role_ids, interaction.guild)
+            ]
             if apply_nickname:
                 nickname_text = format_nickname(
                     minecraft_ign,
                     town_name,
                     nation_name,
-                    is_main_nation(nation_name, self.bot.config)
+                    main_nation
                 )
-                await set_nickname(user, nickname_text)
+                steps.append(set_nickname(user, nickname_text))
+            
+            county_uuid, success, *_ = await asyncio.gather(*steps)
+            
+            if not success:
+                await interaction.followup.send("⚠️ Could not assign roles (insufficient permissions or higher role).")
             
             # Save to database
             user_data = {
@@ -269,15 +322,11 @@ class VerificationCog(commands.Cog):
                 'verified_by': str(interaction.user.id)
             }
             
-            # Check if user already exists
-            existing = await self.bot.db.get_user_by_discord(str(user.id))
-            if existing:
-                await self.bot.db.update_user(str(user.id), user_data)
-            else:
-                await self.bot.db.add_user(user_data)
+            # Keep the fresh EMC response cached so a retry skips the API
+            await self.bot.api.remember_player(player_data)
             
-            # Log to audit
-            await self.bot.db.add_audit_log({
+            # The user row and its audit entry are committed together
+            await self.bot.db.upsert_user_with_audit(user_data, {
                 'action_type': 'verify',
                 'actor_id': str(interaction.user.id),
                 'target_discord_id': str(user.id),
@@ -294,22 +343,50 @@ class VerificationCog(commands.Cog):
             # Create verification embed
             embed = create_verification_embed(user_data, user, self.bot.config)
             
-            # Send to logging channel and create thread
-            logging_channel = await self.bot.get_logging_channel()
-            if logging_channel:
-                message = await logging_channel.send(embed=embed)
-                thread = await message.create_thread(
-                    name=f"Verification: {minecraft_ign}",
-                    auto_archive_duration=1440
-                )
-                await thread.send(f"Verified by {interaction.user.mention}")
-            
-            # Confirm to admin
+            # The logging channel post (message, thread, thread message) doesn't
+            # affect the result, so the admin isn't kept waiting on it
+            self._spawn_background(
+                self._post_verification_log(embed, minecraft_ign, interaction.user),
+                "verification log post"
+            )
             await interaction.followup.send(f"✅ Successfully verified {user.mention} as **{minecraft_ign}**!")
             
         except Exception as e:
             logger.error(f"Error completing verification: {e}", exc_info=True)
             await interaction.followup.send("❌ An error occurred while completing verification.")
+    
+    async def _get_county_uuid(self, main_nation: bool, town_uuid: Optional[str]) -> Optional[str]:
+        """Look up the county of a town in a main nation.
+        
+        Args:
+            main_nation: Whether the town's nation is a main nation
+            town_uuid: Town UUID
+            
+        Returns:
+            County UUID, or None if the town is not in a county
+        """
+        if not (main_nation and town_uuid):
+            return None
+        
+        county_data = await self.bot.db.get_county_for_town(town_uuid)
+        return county_data.get('county_uuid') if county_data else None
+    
+    async def _post_verification_log(self, embed: discord.Embed, minecraft_ign: str, verifier: discord.abc.User):
+        """Send the verification embed to the logging channel with a thread.
+        
+        Args:
+            embed: Verification embed
+            minecraft_ign: Verified player's IGN, used in the thread name
+            verifier: Admin who ran the verification
+        """
+        logging_channel = await self.bot.get_logging_channel()
+        if logging_channel:
+            message = await logging_channel.send(embed=embed)
+            thread = await message.create_thread(
+                name=f"Verification: {minecraft_ign}",
+                auto_archive_duration=1440
+            )
+            await thread.send(f"Verified by {verifier.mention}")
 
 
 async def setup(bot):
@@ -1,80 +1,299 @@
 """Database manager for all database operations."""
 
 import aiosqlite
+import asyncio
 import json
 import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from .models import User, County, TownCache, NationCache, AuditLog
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger('EMCBot.Database')
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps_details(details: Any) -> str:
+    """Serialize audit log details to a JSON string.
+    
+    Already-serialized strings are passed through unchanged.
+    """
+    if isinstance(details, str):
+        return details
+    if orjson is not None:
+        return orjson.dumps(details).decode('utf-8')
+    # Compact separators, matching orjson's output
+    return json.dumps(details, separators=(',', ':'))
+
 
 class DatabaseManager:
     """Manages all database operations."""
     
+    # Town -> county lookups are cached since assignments rarely change
+    COUNTY_CACHE_TTL = 300.0
+    COUNTY_CACHE_SIZE = 512
+    
+    # Keys per "IN (...)" query, kept under SQLite's bound parameter limit
+    IN_QUERY_CHUNK = 500
+    
+    # Result sets larger than this are JSON-decoded in a worker thread
+    THREAD_PARSE_THRESHOLD = 500
+    
+    # Applied once when each connection opens. WAL lets reads proceed
+    # during a write and, with synchronous=NORMAL, fsyncs at checkpoints
+    # instead of on every commit. busy_timeout waits out the brief locks
+    # taken during checkpoints instead of failing with "database is locked",
+    # and cache_size (negative means KiB) keeps 64 MiB of pages in memory
+    CONNECTION_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=67108864",
+        "PRAGMA wal_autocheckpoint=1000",
+    )
+    
+    # Read-only connections kept next to the writer. Under WAL they read
+    # while a write is in progress, and each keeps its own warm page cache
+    READ_POOL_SIZE = 2
+    
+    # Rows sampled per index when PRAGMA optimize refreshes statistics,
+    # bounding its cost on large tables
+    ANALYSIS_LIMIT = 1000
+    
     def __init__(self, db_path: str = "./discadian/database.db"):
         """Initialize database manager."""
         self.db_path = db_path
+        self._county_cache: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        
+        # One connection is kept open for the bot's lifetime; writes are
+        # serialized so transactions on it never interleave
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
         
+        # Idle read-only connections, and every one opened so close() finds
+        # those still borrowed
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        
+        # Set by close(); connections are never reopened after it
+        self._closed = False
+    
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Open a connection with the standard PRAGMAs applied."""
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        for pragma in self.CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        if read_only:
+            await conn.execute("PRAGMA query_only=ON")
+        return conn
+    
+    async def _get_connection(self) -> aiosqlite.Connection:
+        """Get the shared connection, opening it on first use."""
+        if self._conn is None:
+            async with self._connect_lock:
+                if self._closed:
+                    raise RuntimeError("Database manager is closed")
+                if self._conn is None:
+                    self._conn = await self._open_connection()
+        return self._conn
+    
+    async def _get_readers(self) -> asyncio.Queue:
+        """Get the read connection pool, opening it on first use."""
+        if self._readers is None:
+            # The writer goes first so the database is already in WAL mode
+            await self._get_connection()
+            async with self._connect_lock:
+                if self._closed:
+                    raise RuntimeError("Database manager is closed")
+                if self._readers is None:
+                    readers: asyncio.Queue = asyncio.Queue()
+                    for _ in range(self.READ_POOL_SIZE):
+                        conn = await self._open_connection(read_only=True)
+                        self._reader_conns.append(conn)
+                        readers.put_nowait(conn)
+                    self._readers = readers
+        return self._readers
+    
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool."""
+        readers = await self._get_readers()
+        conn = await readers.get()
+        try:
+            yield conn
+        finally:
+            readers.put_nowait(conn)
+    
+    async def connect(self) -> None:
+        """Open the shared connection and read pool now rather than on the first query."""
+        await self._get_readers()
+    
+    async def close(self) -> None:
+        """Close the shared connection and the read pool.
+        
+        Final: later queries raise instead of reopening a connection that
+        nothing would close.
+        """
+        self._closed = True
+        for conn in self._reader_conns:
+            await conn.close()
+        self._reader_conns.clear()
+        self._readers = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+    
+    @asynccontextmanager
+    async def _transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Run statements in one transaction, committing on success."""
+        db = await self._get_connection()
+        async with self._write_lock:
+            try:
+                yield db
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+    
     async def _execute(self, query: str, params: tuple = ()) -> aiosqlite.Cursor:
         """Execute a query."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(query, params)
-            await db.commit()
-            return cursor
+        async with self._transaction() as db:
+            return await db.execute(query, params)
     
     async def _fetchone(self, query: str, params: tuple = ()) -> Optional[dict]:
         """Execute query and fetch one result."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(query, params)
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        async with self._reader() as db:
+            async with db.execute(query, params) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
     
     async def _fetchall(self, query: str, params: tuple = ()) -> List[dict]:
         """Execute query and fetch all results."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
+        async with self._reader() as db:
+            # One hop to the connection's thread instead of execute + fetchall
+            rows = await db.execute_fetchall(query, params)
             return [dict(row) for row in rows]
     
     # ========== USER OPERATIONS ==========
     
+    _USER_INSERT = """
+        INSERT INTO users (
+            discord_id, minecraft_uuid, minecraft_ign, town_uuid, town_name,
+            nation_uuid, nation_name, county_uuid, emc_verified, verified_by
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _user_params(user_data: dict) -> tuple:
+        """Build insert parameters for a user row."""
+        return (
+            user_data['discord_id'],
+            user_data['minecraft_uuid'],
+            user_data['minecraft_ign'],
+            user_data.get('town_uuid'),
+            user_data.get('town_name'),
+            user_data.get('nation_uuid'),
+            user_data.get('nation_name'),
+            user_data.get('county_uuid'),
+            user_data.get('emc_verified', False),
+            user_data.get('verified_by')
+        )
+    
     async def add_user(self, user_data: dict) -> bool:
         """Add a new user to the database."""
         try:
-            query = """
-                INSERT INTO users (
-                    discord_id, minecraft_uuid, minecraft_ign, town_uuid, town_name,
-                    nation_uuid, nation_name, county_uuid, emc_verified, verified_by
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            params = (
-                user_data['discord_id'],
-                user_data['minecraft_uuid'],
-                user_data['minecraft_ign'],
-                user_data.get('town_uuid'),
-                user_data.get('town_name'),
-                user_data.get('nation_uuid'),
-                user_data.get('nation_name'),
-                user_data.get('county_uuid'),
-                user_data.get('emc_verified', False),
-                user_data.get('verified_by')
-            )
-            await self._execute(query, params)
+            await self._execute(self._USER_INSERT, self._user_params(user_data))
             logger.info(f"Added user {user_data['discord_id']} ({user_data['minecraft_ign']})")
             return True
         except Exception as e:
             logger.error(f"Error adding user: {e}")
             return False
     
+    # Re-verifying a known user keeps its original verified_at
+    _USER_UPSERT = _USER_INSERT + """
+        ON CONFLICT(discord_id) DO UPDATE SET
+            minecraft_uuid = excluded.minecraft_uuid,
+            minecraft_ign = excluded.minecraft_ign,
+            town_uuid = excluded.town_uuid,
+            town_name = excluded.town_name,
+            nation_uuid = excluded.nation_uuid,
+            nation_name = excluded.nation_name,
+            county_uuid = excluded.county_uuid,
+            emc_verified = excluded.emc_verified,
+            verified_by = excluded.verified_by,
+            last_updated = CURRENT_TIMESTAMP
+    """
+    
+    async def upsert_user(self, user_data: dict) -> bool:
+        """Add a user, or update them if the Discord ID is already stored."""
+        try:
+            await self._execute(self._USER_UPSERT, self._user_params(user_data))
+            logger.info(f"Saved user {user_data['discord_id']} ({user_data['minecraft_ign']})")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving user {user_data['discord_id']}: {e}")
+            return False
+    
+    async def upsert_user_with_audit(self, user_data: dict, log_data: dict) -> bool:
+        """Add or update a user and write its audit log entry in one transaction.
+        
+        Either both rows are written or neither is.
+        """
+        try:
+            async with self._transaction() as db:
+                await db.execute(self._USER_UPSERT, self._user_params(user_data))
+                await db.execute(self._AUDIT_LOG_INSERT, self._audit_log_params(log_data))
+            logger.info(f"Saved user {user_data['discord_id']} ({user_data['minecraft_ign']})")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving user {user_data['discord_id']} with audit log: {e}")
+            return False
+    
+    async def add_user_with_audit(self, user_data: dict, log_data: dict) -> bool:
+        """Add a new user and its audit log entry in one transaction.
+        
+        Either both rows are written or neither is.
+        """
+        try:
+            async with self._transaction() as db:
+                await db.execute(self._USER_INSERT, self._user_params(user_data))
+                await db.execute(self._AUDIT_LOG_INSERT, self._audit_log_params(log_data))
+            logger.info(f"Added user {user_data['discord_id']} ({user_data['minecraft_ign']})")
+            return True
+        except Exception as e:
+            logger.error(f"Error adding user with audit log: {e}")
+            return False
+    
     async def get_user_by_discord(self, discord_id: str) -> Optional[dict]:
         """Get user by Discord ID."""
         query = "SELECT * FROM users WHERE discord_id = ?"
         return await self._fetchone(query, (discord_id,))
     
+    async def get_user_with_county(self, discord_id: str) -> Optional[dict]:
+        """Get user by Discord ID along with the current county of their stored town.
+        
+        The county is returned as ``town_county_uuid`` (None if the town is in
+        no county), saving a separate county lookup when the town is unchanged.
+        """
+        query = """
+            SELECT u.*, ct.county_uuid AS town_county_uuid FROM users u
+            LEFT JOIN county_towns ct ON ct.town_uuid = u.town_uuid
+            WHERE u.discord_id = ?
+        """
+        return await self._fetchone(query, (discord_id,))
+    
     async def get_user_by_uuid(self, minecraft_uuid: str) -> Optional[dict]:
         """Get user by Minecraft UUID."""
         query = "SELECT * FROM users WHERE minecraft_uuid = ?"
@@ -84,7 +303,7 @@ class DatabaseManager:
         """Update user information."""
         try:
             # Build UPDATE query dynamically
-            set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
+            set_clause = ", ".join(f"{key} = ?" for key in updates.keys())
             set_clause += ", last_updated = CURRENT_TIMESTAMP"
             
             query = f"UPDATE users SET {set_clause} WHERE discord_id = ?"
@@ -97,6 +316,79 @@ class DatabaseManager:
             logger.error(f"Error updating user {discord_id}: {e}")
             return False
     
+    # Fixed text, so SQLite's per-connection statement cache reuses the
+    # prepared statement across every scan update
+    _USER_MEMBERSHIP_UPDATE = """
+        UPDATE users SET
+            minecraft_ign = COALESCE(?, minecraft_ign),
+            town_uuid = ?,
+            town_name = ?,
+            nation_uuid = ?,
+            nation_name = ?,
+            county_uuid = ?,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE discord_id = ?
+    """
+    
+    async def update_user_membership(self, discord_id: str, membership: dict) -> bool:
+        """Update a user's town, nation, county and optionally IGN.
+        
+        Args:
+            discord_id: Discord ID of the user
+            membership: Dict with town_uuid, town_name, nation_uuid,
+                nation_name and county_uuid, plus an optional minecraft_ign
+                (left unchanged when missing)
+                
+        Returns:
+            True if the update ran
+        """
+        try:
+            await self._execute(
+                self._USER_MEMBERSHIP_UPDATE,
+                self._user_membership_params(discord_id, membership)
+            )
+            logger.info(f"Updated user {discord_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating user {discord_id}: {e}")
+            return False
+    
+    async def bulk_update_user_membership(self, updates: List[Tuple[str, dict]]) -> bool:
+        """Update the membership of many users in one transaction.
+        
+        Args:
+            updates: (Discord ID, membership) pairs, see ``update_user_membership``
+            
+        Returns:
+            True if all updates were written
+        """
+        if not updates:
+            return True
+        try:
+            async with self._transaction() as db:
+                await db.executemany(
+                    self._USER_MEMBERSHIP_UPDATE,
+                    [self._user_membership_params(discord_id, membership) for discord_id, membership in updates]
+                )
+            logger.info(f"Updated {len(updates)} users")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating {len(updates)} users: {e}")
+            return False
+    
+    @staticmethod
+    def _user_membership_params(discord_id: str, membership: dict) -> tuple:
+        """Build parameters for the membership update of a user."""
+        return (
+            membership.get('minecraft_ign'),
+            membership.get('town_uuid'),
+            membership.get('town_name'),
+            membership.get('nation_uuid'),
+            membership.get('nation_name'),
+            membership.get('county_uuid'),
+            discord_id
+        )
+    
     async def delete_user(self, discord_id: str) -> bool:
         """Delete a user from the database."""
         try:
@@ -113,6 +405,35 @@ class DatabaseManager:
         query = "SELECT * FROM users ORDER BY verified_at DESC"
         return await self._fetchall(query)
     
+    # Columns the user scan compares and rewrites
+    _USER_SCAN_COLUMNS = (
+        "discord_id, minecraft_uuid, minecraft_ign, town_uuid, town_name, "
+        "nation_uuid, nation_name, county_uuid"
+    )
+    
+    async def iter_verified_users_for_scan(self, batch_size: int = 500) -> AsyncIterator[List[dict]]:
+        """Stream the membership columns of every verified user, unordered.
+        
+        Skips the verification metadata and the verified_at sort that
+        ``get_all_verified_users`` pays for, and never holds more than one
+        batch of rows.
+        
+        Args:
+            batch_size: Rows per yielded batch
+            
+        Yields:
+            Lists of user rows
+        """
+        # Read on the writer connection: the scan holds this cursor across API
+        # calls, and a long-borrowed reader would shrink the pool meanwhile
+        db = await self._get_connection()
+        async with db.execute(f"SELECT {self._USER_SCAN_COLUMNS} FROM users") as cursor:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+    
     async def get_users_by_town(self, town_uuid: str) -> List[dict]:
         """Get all users in a specific town."""
         query = "SELECT * FROM users WHERE town_uuid = ?"
@@ -172,6 +493,7 @@ class DatabaseManager:
                 VALUES (?, ?)
             """
             await self._execute(query, (county_uuid, town_uuid))
+            self._county_cache.pop(town_uuid, None)
             logger.info(f"Added town {town_uuid} to county {county_uuid}")
             return True
         except Exception as e:
@@ -183,6 +505,7 @@ class DatabaseManager:
         try:
             query = "DELETE FROM county_towns WHERE county_uuid = ? AND town_uuid = ?"
             await self._execute(query, (county_uuid, town_uuid))
+            self._county_cache.pop(town_uuid, None)
             logger.info(f"Removed town {town_uuid} from county {county_uuid}")
             return True
         except Exception as e:
@@ -190,13 +513,51 @@ class DatabaseManager:
             return False
     
     async def get_county_for_town(self, town_uuid: str) -> Optional[dict]:
-        """Get the county that a town belongs to."""
+        """Get the county that a town belongs to.
+        
+        Results (including "no county") are cached for ``COUNTY_CACHE_TTL``
+        seconds and dropped when the town's county assignment changes.
+        """
+        now = time.monotonic()
+        cached = self._county_cache.get(town_uuid)
+        if cached and cached[0] > now:
+            self._county_cache.move_to_end(town_uuid)
+            return cached[1]
+        
         query = """
             SELECT c.* FROM counties c
             JOIN county_towns ct ON c.county_uuid = ct.county_uuid
             WHERE ct.town_uuid = ?
         """
-        return await self._fetchone(query, (town_uuid,))
+        county = await self._fetchone(query, (town_uuid,))
+        
+        self._county_cache[town_uuid] = (now + self.COUNTY_CACHE_TTL, county)
+        self._county_cache.move_to_end(town_uuid)
+        while len(self._county_cache) > self.COUNTY_CACHE_SIZE:
+            self._county_cache.popitem(last=False)
+        
+        return county
+    
+    async def get_counties_for_towns(self, town_uuids: List[str]) -> Dict[str, str]:
+        """Get the counties of many towns at once.
+        
+        Args:
+            town_uuids: Town UUIDs to look up
+            
+        Returns:
+            Dict of town UUID to county UUID; towns in no county are omitted
+        """
+        unique = list(dict.fromkeys(town_uuids))
+        counties: Dict[str, str] = {}
+        for i in range(0, len(unique), self.IN_QUERY_CHUNK):
+            chunk = unique[i:i + self.IN_QUERY_CHUNK]
+            query = f"""
+                SELECT town_uuid, county_uuid FROM county_towns
+                WHERE town_uuid IN ({','.join('?' * len(chunk))})
+            """
+            rows = await self._fetchall(query, tuple(chunk))
+            counties.update((row['town_uuid'], row['county_uuid']) for row in rows)
+        return counties
     
     async def get_towns_in_county(self, county_uuid: str) -> List[str]:
         """Get all town UUIDs in a county."""
@@ -206,22 +567,45 @@ class DatabaseManager:
     
     # ========== NATION CACHE OPERATIONS ==========
     
+    _NATION_CACHE_UPSERT = """
+        INSERT INTO nation_cache (nation_uuid, nation_name)
+        VALUES (?, ?)
+        ON CONFLICT(nation_uuid) DO UPDATE SET
+            nation_name = excluded.nation_name,
+            last_scanned = CURRENT_TIMESTAMP
+    """
+    
     async def upsert_nation_cache(self, nation_data: dict) -> bool:
         """Insert or update nation cache."""
         try:
-            query = """
-                INSERT INTO nation_cache (nation_uuid, nation_name)
-                VALUES (?, ?)
-                ON CONFLICT(nation_uuid) DO UPDATE SET
-                    nation_name = excluded.nation_name,
-                    last_scanned = CURRENT_TIMESTAMP
-            """
-            await self._execute(query, (nation_data['uuid'], nation_data['name']))
+            await self._execute(self._NATION_CACHE_UPSERT, (nation_data['uuid'], nation_data['name']))
             return True
         except Exception as e:
             logger.error(f"Error upserting nation cache: {e}")
             return False
     
+    async def bulk_upsert_nation_cache(self, nations: List[dict]) -> bool:
+        """Insert or update many nation cache rows in one transaction.
+        
+        Args:
+            nations: Nation data in the format accepted by ``upsert_nation_cache``
+            
+        Returns:
+            True if all rows were written
+        """
+        if not nations:
+            return True
+        try:
+            async with self._transaction() as db:
+                await db.executemany(
+                    self._NATION_CACHE_UPSERT,
+                    [(nation['uuid'], nation['name']) for nation in nations]
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting {len(nations)} nation cache rows: {e}")
+            return False
+    
     async def get_nation_cache(self, nation_uuid: str) -> Optional[dict]:
         """Get cached nation data."""
         query = "SELECT * FROM nation_cache WHERE nation_uuid = ?"
@@ -234,130 +618,244 @@ class DatabaseManager:
     
     # ========== TOWN CACHE OPERATIONS ==========
     
+    _TOWN_CACHE_UPSERT = """
+        INSERT INTO town_cache (
+            town_uuid, town_name, nation_uuid, mayor_uuid, board, residents, residents_hash,
+            payload_hash, is_public, is_open, is_overclaimed, is_for_sale, has_overclaim_shield,
+            num_town_blocks, num_residents, balance
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(town_uuid) DO UPDATE SET
+            town_name = excluded.town_name,
+            nation_uuid = excluded.nation_uuid,
+            mayor_uuid = excluded.mayor_uuid,
+            board = excluded.board,
+            residents = excluded.residents,
+            residents_hash = excluded.residents_hash,
+            payload_hash = excluded.payload_hash,
+            is_public = excluded.is_public,
+            is_open = excluded.is_open,
+            is_overclaimed = excluded.is_overclaimed,
+            is_for_sale = excluded.is_for_sale,
+            has_overclaim_shield = excluded.has_overclaim_shield,
+            num_town_blocks = excluded.num_town_blocks,
+            num_residents = excluded.num_residents,
+            balance = excluded.balance,
+            last_scanned = CURRENT_TIMESTAMP
+    """
+    
+    @staticmethod
+    def _town_cache_params(town_data: dict) -> tuple:
+        """Build upsert parameters for a town cache row."""
+        return (
+            town_data.get('uuid'),
+            town_data.get('name'),
+            town_data.get('nation_uuid'),  # ← Already extracted
+            town_data.get('mayor_uuid'),  # ← Already extracted
+            town_data.get('board'),  # ← Already a string (not JSON)
+            '',  # Residents live in town_residents
+            town_data.get('residents_hash'),
+            town_data.get('payload_hash'),
+            town_data.get('is_public'),  # ← Already extracted
+            town_data.get('is_open'),
+            town_data.get('is_overclaimed'),
+            town_data.get('is_for_sale'),
+            town_data.get('has_overclaim_shield'),
+            town_data.get('num_town_blocks'),
+            town_data.get('num_residents'),
+            town_data.get('balance')
+        )
+    
+    # A town's residents are stored only in town_residents, one row each,
+    # and replaced wholesale with the town_cache row
+    _TOWN_RESIDENTS_DELETE = "DELETE FROM town_residents WHERE town_uuid = ?"
+    _TOWN_RESIDENTS_INSERT = "INSERT OR IGNORE INTO town_residents (town_uuid, resident_uuid) VALUES (?, ?)"
+    
+    @staticmethod
+    def _town_residents_params(towns: List[dict]) -> List[tuple]:
+        """Build town_residents rows from towns' resident UUID lists."""
+        return [
+            (town.get('uuid'), resident_uuid)
+            for town in towns
+            for resident_uuid in town.get('residents') or ()
+        ]
+    
     async def upsert_town_cache(self, town_data: dict) -> bool:
         """Insert or update town cache."""
         try:
-            query = """
-                INSERT INTO town_cache (
-                    town_uuid, town_name, nation_uuid, mayor_uuid, board, residents,
-                    is_public, is_open, is_overclaimed, is_for_sale, has_overclaim_shield,
-                    num_town_blocks, num_residents, balance
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(town_uuid) DO UPDATE SET
-                    town_name = excluded.town_name,
-                    nation_uuid = excluded.nation_uuid,
-                    mayor_uuid = excluded.mayor_uuid,
-                    board = excluded.board,
-                    residents = excluded.residents,
-                    is_public = excluded.is_public,
-                    is_open = excluded.is_open,
-                    is_overclaimed = excluded.is_overclaimed,
-                    is_for_sale = excluded.is_for_sale,
-                    has_overclaim_shield = excluded.has_overclaim_shield,
-                    num_town_blocks = excluded.num_town_blocks,
-                    num_residents = excluded.num_residents,
-                    balance = excluded.balance,
-                    last_scanned = CURRENT_TIMESTAMP
-            """
-            params = (
-                town_data.get('uuid'),
-                town_data.get('name'),
-                town_data.get('nation_uuid'),  # ← Already extracted
-                town_data.get('mayor_uuid'),  # ← Already extracted
-                town_data.get('board'),  # ← Already a string (not JSON)
-                town_data.get('residents'),  # ← Already JSON string of UUIDs
-                town_data.get('is_public'),  # ← Already extracted
-                town_data.get('is_open'),
-                town_data.get('is_overclaimed'),
-                town_data.get('is_for_sale'),
-                town_data.get('has_overclaim_shield'),
-                town_data.get('num_town_blocks'),
-                town_data.get('num_residents'),
-                town_data.get('balance')
-            )
-            await self._execute(query, params)
+            async with self._transaction() as db:
+                await db.execute(self._TOWN_CACHE_UPSERT, self._town_cache_params(town_data))
+                await db.execute(self._TOWN_RESIDENTS_DELETE, (town_data.get('uuid'),))
+                await db.executemany(
+                    self._TOWN_RESIDENTS_INSERT,
+                    self._town_residents_params([town_data])
+                )
             return True
         except Exception as e:
             logger.error(f"Error upserting town cache: {e}")
             return False
     
-    def _parse_residents_json(self, residents_str: str, town_uuid: str = "unknown") -> list:
-        """Safely parse residents JSON string.
+    async def bulk_upsert_town_cache(self, towns: List[dict]) -> bool:
+        """Insert or update many town cache rows in one transaction.
         
         Args:
-            residents_str: JSON string of resident UUIDs
-            town_uuid: Town UUID for logging
+            towns: Town data in the format accepted by ``upsert_town_cache``
             
         Returns:
-            List of resident UUIDs
+            True if all rows were written
         """
-        if not residents_str:
-            return []
+        if not towns:
+            return True
+        try:
+            async with self._transaction() as db:
+                await db.executemany(
+                    self._TOWN_CACHE_UPSERT,
+                    [self._town_cache_params(town) for town in towns]
+                )
+                await db.executemany(
+                    self._TOWN_RESIDENTS_DELETE,
+                    [(town.get('uuid'),) for town in towns]
+                )
+                await db.executemany(
+                    self._TOWN_RESIDENTS_INSERT,
+                    self._town_residents_params(towns)
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting {len(towns)} town cache rows: {e}")
+            return False
+    
+    async def _parse_rows_off_loop(self, parse, rows: List[dict]) -> List[dict]:
+        """Run a row parser, in a worker thread for large result sets.
         
-        # Handle whitespace-only strings
-        if not residents_str.strip():
-            return []
+        Decoding thousands of JSON columns is CPU-bound and would otherwise
+        stall the event loop (and the Discord heartbeat with it).
+        """
+        if len(rows) > self.THREAD_PARSE_THRESHOLD:
+            return await asyncio.to_thread(parse, rows)
+        return parse(rows)
+    
+    async def _attach_residents(self, rows: List[dict], all_towns: bool = False) -> List[dict]:
+        """Replace each town row's residents with its town_residents rows.
         
-        try:
-            parsed = json.loads(residents_str)
-            # Ensure it's a list
-            if not isinstance(parsed, list):
-                logger.warning(f"Residents data for town {town_uuid} is not a list: {type(parsed)}")
-                return []
-            return parsed
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.warning(f"Failed to parse residents JSON for town {town_uuid}: {e}")
-            logger.debug(f"Residents value: '{residents_str[:100]}'")
-            return []
+        Args:
+            rows: Town cache rows
+            all_towns: Whether ``rows`` is the whole town cache, in which
+                case town_residents is read without a filter
+                
+        Returns:
+            The same rows, with 'residents' as a list of resident UUIDs
+        """
+        by_town: Dict[str, dict] = {}
+        for row in rows:
+            row['residents'] = []
+            by_town[row['town_uuid']] = row
+        if not by_town:
+            return rows
+        
+        if all_towns:
+            queries = [("SELECT town_uuid, resident_uuid FROM town_residents", ())]
+        else:
+            town_uuids = list(by_town)
+            queries = [
+                (
+                    "SELECT town_uuid, resident_uuid FROM town_residents "
+                    f"WHERE town_uuid IN ({','.join('?' * len(chunk))})",
+                    tuple(chunk)
+                )
+                for chunk in (
+                    town_uuids[i:i + self.IN_QUERY_CHUNK]
+                    for i in range(0, len(town_uuids), self.IN_QUERY_CHUNK)
+                )
+            ]
+        async with self._reader() as db:
+            for query, params in queries:
+                for town_uuid, resident_uuid in await db.execute_fetchall(query, params):
+                    row = by_town.get(town_uuid)
+                    if row is not None:
+                        row['residents'].append(resident_uuid)
+        return rows
     
     async def get_town_cache(self, town_uuid: str) -> Optional[dict]:
         """Get cached town data."""
         result = await self._fetchone("SELECT * FROM town_cache WHERE town_uuid = ?", (town_uuid,))
         if result:
-            # Parse JSON fields
-            # IMPORTANT: 'board' is a plain string (town motto), NOT JSON
-            # Only 'residents' needs JSON parsing (it's a JSON array of UUID strings)
-            if result.get('residents'):
-                result['residents'] = self._parse_residents_json(result['residents'], town_uuid)
-            else:
-                result['residents'] = []
+            # 'board' is a plain string (town motto), NOT JSON
+            await self._attach_residents([result])
         return result
     
+    async def get_town_caches(self, town_uuids: List[str], parse_residents: bool = True) -> Dict[str, dict]:
+        """Get cached data for many towns at once.
+        
+        Args:
+            town_uuids: Town UUIDs to look up
+            parse_residents: Whether to load residents as a list of UUIDs; if
+                False they are left out, to be read with
+                ``get_town_residents`` if needed
+            
+        Returns:
+            Dict of town UUID to cached town data; uncached towns are omitted
+        """
+        unique = list(dict.fromkeys(town_uuids))
+        rows: List[dict] = []
+        for i in range(0, len(unique), self.IN_QUERY_CHUNK):
+            chunk = unique[i:i + self.IN_QUERY_CHUNK]
+            rows.extend(await self._fetchall(
+                f"SELECT * FROM town_cache WHERE town_uuid IN ({','.join('?' * len(chunk))})",
+                tuple(chunk)
+            ))
+        if parse_residents:
+            await self._attach_residents(rows)
+        return {row['town_uuid']: row for row in rows}
+    
     async def get_towns_by_nation_cache(self, nation_uuid: str) -> List[dict]:
         """Get all cached towns in a nation."""
         results = await self._fetchall(
             "SELECT * FROM town_cache WHERE nation_uuid = ?",
             (nation_uuid,)
         )
-        # Parse JSON fields for each result
-        for result in results:
-            town_uuid = result.get('town_uuid', 'unknown')
-            # 'board' is a plain string, don't parse it
-            # Only parse 'residents' as JSON
-            if result.get('residents'):
-                result['residents'] = self._parse_residents_json(result['residents'], town_uuid)
-            else:
-                result['residents'] = []
-        return results
+        return await self._attach_residents(results)
     
     async def get_all_town_caches(self) -> List[dict]:
         """Get all cached towns."""
         results = await self._fetchall("SELECT * FROM town_cache")
-        # Parse JSON fields for each result
-        for result in results:
-            town_uuid = result.get('town_uuid', 'unknown')
-            # 'board' is a plain string, don't parse it
-            # Only parse 'residents' as JSON
-            if result.get('residents'):
-                result['residents'] = self._parse_residents_json(result['residents'], town_uuid)
-            else:
-                result['residents'] = []
-        return results
+        return await self._attach_residents(results, all_towns=True)
+    
+    async def get_town_residents(self, town_uuid: str) -> List[str]:
+        """Get the resident UUIDs of a cached town.
+        
+        Args:
+            town_uuid: Town UUID
+            
+        Returns:
+            Resident UUIDs
+        """
+        results = await self._fetchall(
+            "SELECT resident_uuid FROM town_residents WHERE town_uuid = ?",
+            (town_uuid,)
+        )
+        return [result['resident_uuid'] for result in results]
+    
+    async def get_towns_for_resident(self, resident_uuid: str) -> List[str]:
+        """Get the cached towns a player is a resident of.
+        
+        Args:
+            resident_uuid: Minecraft UUID of the player
+            
+        Returns:
+            Town UUIDs
+        """
+        results = await self._fetchall(
+            "SELECT town_uuid FROM town_residents WHERE resident_uuid = ?",
+            (resident_uuid,)
+        )
+        return [result['town_uuid'] for result in results]
     
     async def delete_town_cache(self, town_uuid: str) -> bool:
         """Delete town from cache."""
         try:
-            await self._execute("DELETE FROM town_cache WHERE town_uuid = ?", (town_uuid,))
+            async with self._transaction() as db:
+                await db.execute("DELETE FROM town_cache WHERE town_uuid = ?", (town_uuid,))
+                await db.execute(self._TOWN_RESIDENTS_DELETE, (town_uuid,))
             return True
         except Exception as e:
             logger.error(f"Error deleting town cache: {e}")
@@ -365,29 +863,58 @@ class DatabaseManager:
     
     # ========== AUDIT LOG OPERATIONS ==========
     
+    _AUDIT_LOG_INSERT = """
+        INSERT INTO audit_log (
+            action_type, actor_id, target_discord_id, target_minecraft_uuid,
+            details, success
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _audit_log_params(log_data: dict) -> tuple:
+        """Build insert parameters for an audit log entry."""
+        return (
+            log_data['action_type'],
+            log_data.get('actor_id'),
+            log_data.get('target_discord_id'),
+            log_data.get('target_minecraft_uuid'),
+            _dumps_details(log_data.get('details', {})),
+            log_data.get('success', True)
+        )
+    
     async def add_audit_log(self, log_data: dict) -> bool:
         """Add an audit log entry."""
         try:
-            query = """
-                INSERT INTO audit_log (
-                    action_type, actor_id, target_discord_id, target_minecraft_uuid,
-                    details, success
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            params = (
-                log_data['action_type'],
-                log_data.get('actor_id'),
-                log_data.get('target_discord_id'),
-                log_data.get('target_minecraft_uuid'),
-                json.dumps(log_data.get('details', {})),
-                log_data.get('success', True)
-            )
-            await self._execute(query, params)
+            await self._execute(self._AUDIT_LOG_INSERT, self._audit_log_params(log_data))
             return True
         except Exception as e:
             logger.error(f"Error adding audit log: {e}")
             return False
     
+    async def add_audit_logs_bulk(self, logs: List[dict]) -> bool:
+        """Add several audit log entries in one transaction."""
+        try:
+            async with self._transaction() as db:
+                await db.executemany(
+                    self._AUDIT_LOG_INSERT,
+                    [self._audit_log_params(log_data) for log_data in logs]
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error adding {len(logs)} audit logs: {e}")
+            return False
+    
+    @staticmethod
+    def _parse_audit_rows(rows: List[dict]) -> List[dict]:
+        """Decode the JSON details of audit log rows in place."""
+        for row in rows:
+            if row.get('details'):
+                try:
+                    row['details'] = _json_loads(row['details'])
+                except (json.JSONDecodeError, ValueError):
+                    row['details'] = {}
+        return rows
+    
     async def get_audit_logs(self, limit: int = 100, action_type: Optional[str] = None) -> List[dict]:
         """Get audit logs with optional filtering."""
         if action_type:
@@ -402,14 +929,7 @@ class DatabaseManager:
             query = "SELECT * FROM audit_log ORDER BY timestamp DESC LIMIT ?"
             results = await self._fetchall(query, (limit,))
         
-        # Parse JSON details
-        for result in results:
-            if result.get('details'):
-                try:
-                    result['details'] = json.loads(result['details'])
-                except (json.JSONDecodeError, ValueError):
-                    result['details'] = {}
-        return results
+        return await self._parse_rows_off_loop(self._parse_audit_rows, results)
     
     async def get_user_audit_logs(self, discord_id: str, limit: int = 50) -> List[dict]:
         """Get audit logs for a specific user."""
@@ -421,11 +941,41 @@ class DatabaseManager:
         """
         results = await self._fetchall(query, (discord_id, limit))
         
-        # Parse JSON details
-        for result in results:
-            if result.get('details'):
-                try:
-                    result['details'] = json.loads(result['details'])
-                except (json.JSONDecodeError, ValueError):
-                    result['details'] = {}
-        return results
\ No newline at end of file
+        return await self._parse_rows_off_loop(self._parse_audit_rows, results)
+    
+    # ========== MAINTENANCE ==========
+    
+    async def optimize(self) -> bool:
+        """Refresh query planner statistics that have gone stale.
+        
+        Cheap enough to run after every scan: SQLite only analyzes tables
+        whose statistics it considers out of date, sampling at most
+        ``ANALYSIS_LIMIT`` rows per index.
+        
+        Returns:
+            True if successful
+        """
+        try:
+            async with self._transaction() as db:
+                await db.execute(f"PRAGMA analysis_limit={self.ANALYSIS_LIMIT}")
+                await db.execute("PRAGMA optimize")
+            return True
+        except Exception as e:
+            logger.error(f"Error optimizing database: {e}")
+            return False
+    
+    async def analyze(self) -> bool:
+        """Recompute query planner statistics for every table and index.
+        
+        Returns:
+            True if successful
+        """
+        try:
+            async with self._transaction() as db:
+                # Full scans, not the sampling used by optimize()
+                await db.execute("PRAGMA analysis_limit=0")
+                await db.execute("ANALYZE")
+            return True
+        except Exception as e:
+            logger.error(f"Error analyzing database: {e}")
+            return False
@@ -5,9 +5,129 @@ import logging
 import os
 from pathlib import Path
 
+from .manager import DatabaseManager
+
 logger = logging.getLogger('EMCBot.Database')
 
 
+# Tables, created in one script. Changes to existing tables are applied
+# separately in init_database
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        discord_id TEXT PRIMARY KEY,
+        minecraft_uuid TEXT NOT NULL UNIQUE,
+        minecraft_ign TEXT NOT NULL,
+        town_uuid TEXT,
+        town_name TEXT,
+        nation_uuid TEXT,
+        nation_name TEXT,
+        county_uuid TEXT,
+        emc_verified BOOLEAN NOT NULL DEFAULT 0,
+        verified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        verified_by TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS counties (
+        county_uuid TEXT PRIMARY KEY,
+        county_name TEXT NOT NULL,
+        nation_uuid TEXT NOT NULL,
+        nation_name TEXT NOT NULL,
+        discord_role_id TEXT,
+        flag_url TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- A pure pair table, so the pair is the primary key and there is no
+    -- separate rowid B-tree to maintain
+    CREATE TABLE IF NOT EXISTS county_towns (
+        county_uuid TEXT NOT NULL,
+        town_uuid TEXT NOT NULL,
+        PRIMARY KEY (county_uuid, town_uuid),
+        FOREIGN KEY (county_uuid) REFERENCES counties(county_uuid) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+    
+    CREATE TABLE IF NOT EXISTS nation_cache (
+        nation_uuid TEXT PRIMARY KEY,
+        nation_name TEXT NOT NULL,
+        last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    CREATE TABLE IF NOT EXISTS town_cache (
+        town_uuid TEXT PRIMARY KEY,
+        town_name TEXT NOT NULL,
+        nation_uuid TEXT,
+        mayor_uuid TEXT,
+        board TEXT,
+        residents TEXT,
+        residents_hash INTEGER,
+        payload_hash INTEGER,
+        is_public BOOLEAN,
+        is_open BOOLEAN,
+        is_overclaimed BOOLEAN,
+        is_for_sale BOOLEAN,
+        has_overclaim_shield BOOLEAN,
+        num_town_blocks INTEGER,
+        num_residents INTEGER,
+        balance REAL,
+        last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (nation_uuid) REFERENCES nation_cache(nation_uuid)
+    );
+    
+    -- Residents of cached towns, one row per membership, so "which town is
+    -- this player in" is an index lookup instead of a scan of every
+    -- residents JSON array
+    CREATE TABLE IF NOT EXISTS town_residents (
+        town_uuid TEXT NOT NULL,
+        resident_uuid TEXT NOT NULL,
+        PRIMARY KEY (town_uuid, resident_uuid)
+    ) WITHOUT ROWID;
+    
+    CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        action_type TEXT NOT NULL,
+        actor_id TEXT,
+        target_discord_id TEXT,
+        target_minecraft_uuid TEXT,
+        details TEXT,
+        success BOOLEAN DEFAULT 1
+    );
+"""
+
+# Secondary indexes, and drops of the ones they replaced
+_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_minecraft_uuid ON users(minecraft_uuid);
+    CREATE INDEX IF NOT EXISTS idx_town_uuid ON users(town_uuid);
+    -- Serves nation lookups as a prefix, and nation + town filters in full
+    CREATE INDEX IF NOT EXISTS idx_users_nation_town ON users(nation_uuid, town_uuid);
+    DROP INDEX IF EXISTS idx_nation_uuid;
+    CREATE INDEX IF NOT EXISTS idx_users_county ON users(county_uuid);
+    
+    CREATE INDEX IF NOT EXISTS idx_county_nation ON counties(nation_uuid);
+    
+    -- Covers town -> county lookups and joins without reading the table
+    CREATE INDEX IF NOT EXISTS idx_county_towns_town ON county_towns(town_uuid, county_uuid);
+    DROP INDEX IF EXISTS idx_county_towns_uuid;
+    
+    CREATE INDEX IF NOT EXISTS idx_town_nation ON town_cache(nation_uuid);
+    CREATE INDEX IF NOT EXISTS idx_town_residents_resident ON town_residents(resident_uuid);
+    
+    -- Filtered audit queries return the newest entries first; with the
+    -- timestamp in the index they stop after LIMIT rows without sorting
+    CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_audit_action_time ON audit_log(action_type, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_audit_target_time ON audit_log(target_discord_id, timestamp);
+    DROP INDEX IF EXISTS idx_audit_action;
+    DROP INDEX IF EXISTS idx_audit_target_discord;
+"""
+
+
+async def _table_columns(db: aiosqlite.Connection, table: str) -> set:
+    """Get the column names of a table; empty if it doesn't exist."""
+    return {row[1] for row in await db.execute_fetchall(f"PRAGMA table_info({table})")}
+
+
 async def init_database(db_path: str = "database.db") -> None:
     """Initialize database schema."""
     
@@ -17,145 +137,83 @@ async def init_database(db_path: str = "database.db") -> None:
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
     
     async with aiosqlite.connect(db_path) as db:
-        # Create users table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                discord_id TEXT PRIMARY KEY,
-                minecraft_uuid TEXT NOT NULL UNIQUE,
-                minecraft_ign TEXT NOT NULL,
-                town_uuid TEXT,
-                town_name TEXT,
-                nation_uuid TEXT,
-                nation_name TEXT,
-                county_uuid TEXT,
-                emc_verified BOOLEAN NOT NULL DEFAULT 0,
-                verified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                verified_by TEXT
-            )
-        """)
+        # Same settings as the bot's connections, so the schema is built in WAL mode
+        for pragma in DatabaseManager.CONNECTION_PRAGMAS:
+            await db.execute(pragma)
         
-        # Create indexes for users
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_minecraft_uuid ON users(minecraft_uuid)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_town_uuid ON users(town_uuid)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_nation_uuid ON users(nation_uuid)
-        """)
+        # town_residents is backfilled from town_cache when first created
+        backfill_residents = not await _table_columns(db, 'town_residents')
         
-        # Create counties table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS counties (
-                county_uuid TEXT PRIMARY KEY,
-                county_name TEXT NOT NULL,
-                nation_uuid TEXT NOT NULL,
-                nation_name TEXT NOT NULL,
-                discord_role_id TEXT,
-                flag_url TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # county_towns used to have a surrogate id column; such a table is
+        # moved aside and copied into the new layout below
+        if 'id' in await _table_columns(db, 'county_towns'):
+            logger.info("Rebuilding county_towns as a WITHOUT ROWID table")
+            await db.execute("ALTER TABLE county_towns RENAME TO county_towns_old")
         
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_county_nation ON counties(nation_uuid)
-        """)
+        await db.executescript(_SCHEMA_SQL)
         
-        # Create county_towns table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS county_towns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                county_uuid TEXT NOT NULL,
-                town_uuid TEXT NOT NULL,
-                FOREIGN KEY (county_uuid) REFERENCES counties(county_uuid) ON DELETE CASCADE,
-                UNIQUE(county_uuid, town_uuid)
-            )
-        """)
+        # Add columns introduced after town_cache was first created
+        town_cache_columns = await _table_columns(db, 'town_cache')
+        for column in ('residents_hash', 'payload_hash'):
+            if column not in town_cache_columns:
+                logger.info(f"Adding {column} column to town_cache")
+                await db.execute(f"ALTER TABLE town_cache ADD COLUMN {column} INTEGER")
         
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_county_towns_uuid ON county_towns(town_uuid)
-        """)
-        
-        # Create nation_cache table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS nation_cache (
-                nation_uuid TEXT PRIMARY KEY,
-                nation_name TEXT NOT NULL,
-                last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create town_cache table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS town_cache (
-                town_uuid TEXT PRIMARY KEY,
-                town_name TEXT NOT NULL,
-                nation_uuid TEXT,
-                mayor_uuid TEXT,
-                board TEXT,
-                residents TEXT,
-                is_public BOOLEAN,
-                is_open BOOLEAN,
-                is_overclaimed BOOLEAN,
-                is_for_sale BOOLEAN,
-                has_overclaim_shield BOOLEAN,
-                num_town_blocks INTEGER,
-                num_residents INTEGER,
-                balance REAL,
-                last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (nation_uuid) REFERENCES nation_cache(nation_uuid)
-            )
-        """)
+        # Checked by name, so a rebuild interrupted after the rename is finished
+        if await _table_columns(db, 'county_towns_old'):
+            await db.execute("""
+                INSERT OR IGNORE INTO county_towns (county_uuid, town_uuid)
+                SELECT county_uuid, town_uuid FROM county_towns_old
+            """)
+            await db.execute("DROP TABLE county_towns_old")
         
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_town_nation ON town_cache(nation_uuid)
-        """)
+        if backfill_residents:
+            logger.info("Populating town_residents from town_cache")
+            await db.execute("""
+                INSERT OR IGNORE INTO town_residents (town_uuid, resident_uuid)
+                SELECT town_cache.town_uuid, json_each.value
+                FROM town_cache, json_each(town_cache.residents)
+                WHERE json_valid(town_cache.residents)
+            """)
         
-        # Create audit_log table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                action_type TEXT NOT NULL,
-                actor_id TEXT,
-                target_discord_id TEXT,
-                target_minecraft_uuid TEXT,
-                details TEXT,
-                success BOOLEAN DEFAULT 1
-            )
-        """)
+        # Indexes are built last, so a backfill above fills bare tables and
+        # each index is then built in one sorted pass
+        await create_indexes(db)
         
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log(timestamp)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action_type)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_audit_target_discord ON audit_log(target_discord_id)
-        """)
+        # Give the query planner statistics for new tables and indexes
+        await db.execute(f"PRAGMA analysis_limit={DatabaseManager.ANALYSIS_LIMIT}")
+        await db.execute("PRAGMA optimize")
         
         await db.commit()
         logger.info("Database schema initialized successfully")
 
 
+async def create_indexes(db: aiosqlite.Connection) -> None:
+    """Create secondary indexes, dropping ones they replace.
+    
+    Safe to run repeatedly; existing indexes are left as they are. Like any
+    ``executescript``, pending changes on ``db`` are committed first.
+    
+    Args:
+        db: Open connection
+    """
+    await db.executescript(_INDEX_SQL)
+
+
 async def check_database_version(db_path: str = "database.db") -> str:
     """Check database schema version."""
     
     async with aiosqlite.connect(db_path) as db:
         # Check if all tables exist
-        cursor = await db.execute("""
+        tables = await db.execute_fetchall("""
             SELECT name FROM sqlite_master 
             WHERE type='table' 
             ORDER BY name
         """)
-        tables = await cursor.fetchall()
         
         expected_tables = {
             'audit_log', 'counties', 'county_towns', 
-            'nation_cache', 'town_cache', 'users'
+            'nation_cache', 'town_cache', 'town_residents', 'users'
         }
         
         existing_tables = {table[0] for table in tables}
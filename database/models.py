@@ -1,12 +1,26 @@
 """Data models for database tables."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
 from typing import Optional
 
 
-@dataclass
-class User:
+class _Row:
+    """Shared behaviour of the table dataclasses."""
+    
+    # Empty so the slotted subclasses don't get a __dict__ from the base
+    __slots__ = ()
+    
+    def to_dict(self) -> dict:
+        """Convert to dictionary.
+        
+        Shallow, unlike ``dataclasses.asdict``, which deep-copies every value.
+        """
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+@dataclass(slots=True)
+class User(_Row):
     """User verification record."""
     discord_id: str
     minecraft_uuid: str
@@ -21,26 +35,9 @@ class User:
     last_updated: Optional[datetime] = None
     verified_by: Optional[str] = None
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary."""
-        return {
-            'discord_id': self.discord_id,
-            'minecraft_uuid': self.minecraft_uuid,
-            'minecraft_ign': self.minecraft_ign,
-            'town_uuid': self.town_uuid,
-            'town_name': self.town_name,
-            'nation_uuid': self.nation_uuid,
-            'nation_name': self.nation_name,
-            'county_uuid': self.county_uuid,
-            'emc_verified': self.emc_verified,
-            'verified_at': self.verified_at,
-            'last_updated': self.last_updated,
-            'verified_by': self.verified_by
-        }
 
-
-@dataclass
-class County:
+@dataclass(slots=True)
+class County(_Row):
     """County definition."""
     county_uuid: str
     county_name: str
@@ -50,44 +47,26 @@ class County:
     flag_url: Optional[str] = None
     created_at: Optional[datetime] = None
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary."""
-        return {
-            'county_uuid': self.county_uuid,
-            'county_name': self.county_name,
-            'nation_uuid': self.nation_uuid,
-            'nation_name': self.nation_name,
-            'discord_role_id': self.discord_role_id,
-            'flag_url': self.flag_url,
-            'created_at': self.created_at
-        }
-
 
-@dataclass
-class NationCache:
+@dataclass(slots=True)
+class NationCache(_Row):
     """Cached nation data."""
     nation_uuid: str
     nation_name: str
     last_scanned: Optional[datetime] = None
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary."""
-        return {
-            'nation_uuid': self.nation_uuid,
-            'nation_name': self.nation_name,
-            'last_scanned': self.last_scanned
-        }
-
 
-@dataclass
-class TownCache:
+@dataclass(slots=True)
+class TownCache(_Row):
     """Cached town data."""
     town_uuid: str
     town_name: str
     nation_uuid: Optional[str] = None
     mayor_uuid: Optional[str] = None
     board: Optional[str] = None  # JSON string
-    residents: Optional[str] = None  # JSON string
+    residents: Optional[str] = None  # Legacy JSON string; see town_residents
+    residents_hash: Optional[int] = None
+    payload_hash: Optional[int] = None
     is_public: Optional[bool] = None
     is_open: Optional[bool] = None
     is_overclaimed: Optional[bool] = None
@@ -98,29 +77,9 @@ class TownCache:
     balance: Optional[float] = None
     last_scanned: Optional[datetime] = None
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary."""
-        return {
-            'town_uuid': self.town_uuid,
-            'town_name': self.town_name,
-            'nation_uuid': self.nation_uuid,
-            'mayor_uuid': self.mayor_uuid,
-            'board': self.board,
-            'residents': self.residents,
-            'is_public': self.is_public,
-            'is_open': self.is_open,
-            'is_overclaimed': self.is_overclaimed,
-            'is_for_sale': self.is_for_sale,
-            'has_overclaim_shield': self.has_overclaim_shield,
-            'num_town_blocks': self.num_town_blocks,
-            'num_residents': self.num_residents,
-            'balance': self.balance,
-            'last_scanned': self.last_scanned
-        }
-
 
-@dataclass
-class AuditLog:
+@dataclass(slots=True)
+class AuditLog(_Row):
     """Audit log entry."""
     id: Optional[int] = None
     timestamp: Optional[datetime] = None
@@ -130,16 +89,3 @@ class AuditLog:
     target_minecraft_uuid: Optional[str] = None
     details: Optional[str] = None  # JSON string
     success: bool = True
-
-    def to_dict(self) -> dict:
-        """Convert to dictionary."""
-        return {
-            'id': self.id,
-            'timestamp': self.timestamp,
-            'action_type': self.action_type,
-            'actor_id': self.actor_id,
-            'target_discord_id': self.target_discord_id,
-            'target_minecraft_uuid': self.target_minecraft_uuid,
-            'details': self.details,
-            'success': self.success
-        }
@@ -1,12 +1,20 @@
 """Main entry point for EMC Verification Bot."""
 
 import asyncio
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
 import sys
 from pathlib import Path
 
+# Optional faster event loop (uvloop is not available on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -16,36 +24,29 @@ sys.path.insert(0, SCRIPT_DIR)
 # Change to script directory so all relative paths work correctly
 os.chdir(SCRIPT_DIR)
 
-print("Starting EMC Verification Bot...")
-print(f"Python: {sys.version}")
-print(f"Script directory: {SCRIPT_DIR}")
-print(f"Working directory: {os.getcwd()}")
-print()
+# Config file location, overridable with the EMCBOT_CONFIG environment variable
+CONFIG_PATH = Path(os.environ.get('EMCBOT_CONFIG', os.path.join(SCRIPT_DIR, 'config.yaml'))).resolve()
 
-# Try importing the bot
-try:
-    from bot import EMCBot
-    print("✓ Bot module imported successfully")
-except ImportError as e:
-    print(f"✗ Failed to import bot module: {e}")
-    print()
-    print("Please run the diagnostic script to identify the issue:")
-    print("  python diagnose.py")
+# Startup diagnostics, enabled by setting the EMC_DEBUG environment variable
+DEBUG = bool(os.environ.get('EMC_DEBUG'))
+
+if DEBUG:
+    print("Starting EMC Verification Bot...")
+    print(f"Python: {sys.version}")
+    print(f"Script directory: {SCRIPT_DIR}")
+    print(f"Working directory: {os.getcwd()}")
     print()
-    print("Common fixes:")
-    print("  1. Install dependencies: pip install -r requirements.txt")
-    print("  2. Check all __init__.py files exist")
-    print("  3. Check for syntax errors: python -m py_compile bot/client.py")
-    sys.exit(1)
-except Exception as e:
-    print(f"✗ Unexpected error importing bot: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
 
 
 def setup_logging():
-    """Set up logging configuration."""
+    """Set up logging configuration.
+    
+    Records are put on a queue and written to the file and console by a
+    background listener thread, so logging never blocks the event loop.
+    
+    Returns:
+        The started QueueListener
+    """
     # Create logs directory if it doesn't exist (relative to script dir)
     log_dir = os.path.join(SCRIPT_DIR, "logs")
     Path(log_dir).mkdir(exist_ok=True)
@@ -72,11 +73,21 @@ def setup_logging():
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
     
+    # Hand records to a listener thread that owns the real handlers
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(
+        log_queue,
+        file_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
     # Set up root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(QueueHandler(log_queue))
     
     # Set up discord.py logger
     discord_logger = logging.getLogger('discord')
@@ -86,7 +97,9 @@ def setup_logging():
     aiohttp_logger = logging.getLogger('aiohttp')
     aiohttp_logger.setLevel(logging.WARNING)
     
-    logging.info(f"Logging configured - log file: {log_file}")
+    logging.info("Logging configured - log file: %s", log_file)
+    
+    return listener
 
 
 async def main():
@@ -101,8 +114,8 @@ async def main():
     logger.info(f"Script directory: {SCRIPT_DIR}")
     logger.info(f"Working directory: {os.getcwd()}")
     
-    # Check for config file (relative to script directory)
-    config_path = os.path.join(SCRIPT_DIR, 'config.yaml')
+    # Check for config file
+    config_path = str(CONFIG_PATH)
     if not os.path.exists(config_path):
         logger.error(f"config.yaml not found at: {config_path}")
         print()
@@ -112,6 +125,20 @@ async def main():
     
     logger.info(f"Loading config from: {config_path}")
     
+    # Imported here so failures go through the logger
+    try:
+        from bot import EMCBot
+    except ImportError as e:
+        logger.error(
+            f"Failed to import bot module: {e}. Run 'python diagnose.py' to identify "
+            "the issue; common fixes are 'pip install -r requirements.txt', checking "
+            "that all __init__.py files exist, and 'python -m py_compile bot/client.py'"
+        )
+        return
+    except Exception as e:
+        logger.error(f"Unexpected error importing bot: {e}", exc_info=True)
+        return
+    
     # Create and run bot (pass config path)
     bot = EMCBot(config_path=config_path)
     
@@ -120,11 +147,12 @@ async def main():
         token = bot.config['bot']['token']
         
         # Debug: Show token info (masked for security)
-        logger.info(f"Token type: {type(token)}")
-        logger.info(f"Token length: {len(token) if token else 0}")
-        if token:
-            # Show first 10 chars for debugging
-            logger.info(f"Token starts with: {token[:10]}...")
+        if DEBUG:
+            logger.info(f"Token type: {type(token)}")
+            logger.info(f"Token length: {len(token) if token else 0}")
+            if token:
+                # Show first 10 chars for debugging
+                logger.info(f"Token starts with: {token[:10]}...")
         
         if not token or token == "YOUR_BOT_TOKEN_HERE":
             logger.error("Please set your bot token in config.yaml!")
@@ -150,14 +178,9 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\nShutting down...")
-
-
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        print("\nShutting down...")
\ No newline at end of file
@@ -4,7 +4,8 @@ from .embeds import (
     create_verification_embed,
     create_notification_embed,
     create_purge_confirmation_embed,
-    create_scan_status_embed
+    create_scan_status_embed,
+    scan_timestamps
 )
 from .roles import determine_roles, get_county_roles
 from .nicknames import format_nickname
@@ -13,6 +14,7 @@ from .validators import (
     validate_minecraft_username,
     sanitize_nickname
 )
+from .checks import is_admin_check
 from .helpers import (
     format_timestamp,
     parse_timestamp,
@@ -29,6 +31,7 @@ __all__ = [
     'create_notification_embed',
     'create_purge_confirmation_embed',
     'create_scan_status_embed',
+    'scan_timestamps',
     'determine_roles',
     'get_county_roles',
     'format_nickname',
@@ -42,5 +45,6 @@ __all__ = [
     'compare_lists',
     'is_main_nation',
     'is_allied_nation',
-    'get_nation_flag_url'
+    'get_nation_flag_url',
+    'is_admin_check'
 ]
\ No newline at end of file
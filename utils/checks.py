@@ -0,0 +1,13 @@
+"""Shared app command checks."""
+
+import discord
+from discord import app_commands
+
+
+async def _admin_predicate(interaction: discord.Interaction) -> bool:
+    """Check if the invoking user is an admin."""
+    return interaction.client.is_admin(interaction.user.id)
+
+
+# Reusable decorator: apply as ``@is_admin_check`` (no call)
+is_admin_check = app_commands.check(_admin_predicate)
@@ -1,13 +1,61 @@
 """Helper functions for processing EarthMC API data."""
 
+import hashlib
 import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+
+from api.models import Town
 
 logger = logging.getLogger('EMCBot.DataProcessor')
 
 
-def prepare_town_for_cache(town_data: Dict[str, Any]) -> Dict[str, Any]:
+def extract_player_fields(
+    player_data: Dict[str, Any]
+) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Pull the identity and town/nation fields out of player data in one pass.
+    
+    Args:
+        player_data: Raw player data from API
+        
+    Returns:
+        Tuple of (uuid, name, town_uuid, town_name, nation_uuid, nation_name)
+    """
+    get = player_data.get
+    town = get('town') or {}
+    nation = get('nation') or {}
+    return (
+        get('uuid'),
+        get('name'),
+        town.get('uuid'),
+        town.get('name'),
+        nation.get('uuid'),
+        nation.get('name')
+    )
+
+
+def _stable_hash(data: bytes) -> int:
+    """Hash bytes to a signed 64-bit integer that is stable across restarts."""
+    digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def residents_hash(resident_uuids: Iterable[str]) -> int:
+    """Hash a town's set of resident UUIDs.
+    
+    The hash ignores order and duplicates, so equal hashes mean the same
+    residents. It is stable across restarts, unlike ``hash()``.
+    
+    Args:
+        resident_uuids: Resident UUID strings
+        
+    Returns:
+        Signed 64-bit integer, storable in an SQLite INTEGER column
+    """
+    return _stable_hash('\n'.join(sorted(set(resident_uuids))).encode('utf-8'))
+
+
+def prepare_town_for_cache(town: Union[Town, Dict[str, Any]]) -> Dict[str, Any]:
     """Prepare town data from API for database storage.
     
     The API returns:
@@ -16,70 +64,37 @@ def prepare_town_for_cache(town_data: Dict[str, Any]) -> Dict[str, Any]:
     
     We need to store:
     - board: string as-is (NOT JSON serialized)
-    - residents: JSON list of UUID strings
+    - residents: list of UUID strings, written to the town_residents table
+    - residents_hash: hash of the resident UUIDs, see ``residents_hash``
+    - payload_hash: hash of all the fields above, equal only if nothing changed
     
     Args:
-        town_data: Raw town data from API
+        town: Town parsed with ``Town.from_api``, or raw town data from API
         
     Returns:
         Processed town data ready for database
     """
-    # Extract basic info
-    town_uuid = town_data.get('uuid')
-    town_name = town_data.get('name')
-    
-    # Extract nation info
-    nation = town_data.get('nation', {})
-    nation_uuid = nation.get('uuid') if isinstance(nation, dict) else None
-    
-    # Extract mayor info
-    mayor = town_data.get('mayor', {})
-    mayor_uuid = mayor.get('uuid') if isinstance(mayor, dict) else None
-    
-    # Board is a string (town motto), not a list
-    board_message = town_data.get('board', '')
-    
-    # Extract resident UUIDs from list of objects
-    residents_data = town_data.get('residents', [])
-    resident_uuids = []
-    
-    if isinstance(residents_data, list):
-        for resident in residents_data:
-            if isinstance(resident, dict):
-                uuid = resident.get('uuid')
-                if uuid:
-                    resident_uuids.append(uuid)
-            elif isinstance(resident, str):
-                # Already a UUID string
-                resident_uuids.append(resident)
-    
-    # Extract status flags
-    status = town_data.get('status', {})
-    is_public = status.get('isPublic')
-    is_open = status.get('isOpen')
-    is_overclaimed = status.get('isOverClaimed')
-    is_for_sale = status.get('isForSale')
-    has_overclaim_shield = status.get('hasOverclaimShield')
-    
-    # Extract stats
-    stats = town_data.get('stats', {})
-    num_town_blocks = stats.get('numTownBlocks')
-    num_residents = stats.get('numResidents')
-    balance = stats.get('balance')
+    if not isinstance(town, Town):
+        town = Town.from_api(town)
     
-    return {
-        'uuid': town_uuid,
-        'name': town_name,
-        'nation_uuid': nation_uuid,
-        'mayor_uuid': mayor_uuid,
-        'board': board_message or '',  # Ensure string, not None
-        'residents': json.dumps(resident_uuids) if resident_uuids else '[]',  # Always valid JSON
-        'is_public': is_public,
-        'is_open': is_open,
-        'is_overclaimed': is_overclaimed,
-        'is_for_sale': is_for_sale,
-        'has_overclaim_shield': has_overclaim_shield,
-        'num_town_blocks': num_town_blocks,
-        'num_residents': num_residents,
-        'balance': balance
-    }
\ No newline at end of file
+    town_row = {
+        'uuid': town.uuid,
+        'name': town.name,
+        'nation_uuid': town.nation_uuid,
+        'mayor_uuid': town.mayor_uuid,
+        'board': town.board,
+        'residents': town.residents,
+        'residents_hash': residents_hash(town.residents),
+        'is_public': town.is_public,
+        'is_open': town.is_open,
+        'is_overclaimed': town.is_overclaimed,
+        'is_for_sale': town.is_for_sale,
+        'has_overclaim_shield': town.has_overclaim_shield,
+        'num_town_blocks': town.num_town_blocks,
+        'num_residents': town.num_residents,
+        'balance': town.balance
+    }
+    town_row['payload_hash'] = _stable_hash(
+        json.dumps(town_row, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    )
+    return town_row
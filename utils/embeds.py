@@ -1,9 +1,71 @@
 """Embed generation utilities."""
 
 import discord
-from datetime import datetime
-from typing import Optional, Dict, Any
-from .helpers import format_timestamp, get_avatar_url
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Iterator, Tuple
+from .helpers import format_timestamp, get_avatar_url, get_nation_flag_url
+
+# Embed colors per notification type; anything else gets blurple
+_NOTIFICATION_COLORS = {
+    'government': discord.Color.blue(),
+    'status': discord.Color.orange(),
+    'milestone': discord.Color.gold()
+}
+_DEFAULT_NOTIFICATION_COLOR = discord.Color.blurple()
+
+# Field names for town status flags
+_STATUS_LABELS = {
+    'is_public': 'Public Status',
+    'is_open': 'Open Status',
+    'is_overclaimed': 'Overclaimed Status',
+    'is_for_sale': 'For Sale Status',
+    'has_overclaim_shield': 'Overclaim Shield'
+}
+
+# Footer timestamp formats
+_VERIFICATION_FOOTER_FMT = '%m/%d/%Y %I:%M %p'
+_NOTIFICATION_FOOTER_FMT = 'Updated at %I:%M %p'
+
+# (time, footer format -> formatted text) shared by the embeds built inside
+# a scan_timestamps block
+_scan_clock: ContextVar[Optional[Tuple[datetime, Dict[str, str]]]] = ContextVar(
+    '_scan_clock', default=None
+)
+
+
+@contextmanager
+def scan_timestamps() -> Iterator[None]:
+    """Give every embed built inside the block the same timestamp.
+    
+    A scan can build many notification embeds within a second; this takes
+    the time once and formats each footer once for all of them. Tasks
+    started inside the block see the same time.
+    """
+    token = _scan_clock.set((datetime.now(timezone.utc), {}))
+    try:
+        yield
+    finally:
+        _scan_clock.reset(token)
+
+
+def _now() -> datetime:
+    """Get the embed timestamp (UTC), shared within a scan_timestamps block."""
+    clock = _scan_clock.get()
+    return clock[0] if clock is not None else datetime.now(timezone.utc)
+
+
+def _footer_text(fmt: str) -> str:
+    """Format the embed time in local time, once per format within a scan_timestamps block."""
+    clock = _scan_clock.get()
+    if clock is None:
+        return datetime.now().strftime(fmt)
+    now, footers = clock
+    text = footers.get(fmt)
+    if text is None:
+        text = footers[fmt] = now.astimezone().strftime(fmt)
+    return text
 
 
 def create_verification_embed(
@@ -25,93 +87,49 @@ def create_verification_embed(
     emc_verified = user_data.get('emc_verified', False)
     color = discord.Color.green() if emc_verified else discord.Color.red()
     
-    # Create embed
-    embed = discord.Embed(
-        title="User Information [ Minecraft & Discord ]",
-        color=color,
-        timestamp=datetime.utcnow()
-    )
-    
     # Get nation info for author
     nation_name = user_data.get('nation_name', 'Unknown')
-    nation_flag = None
-    
-    # Try to find nation flag from config
-    for nation in config.get('main_nations', []):
-        if nation['name'] == nation_name:
-            nation_flag = nation.get('flag_url')
-            break
+    nation_flag = get_nation_flag_url(nation_name, config)
     
     if nation_flag:
-        embed.set_author(
-            name=f"Republic of {nation_name}",
-            icon_url=nation_flag
-        )
+        author = {'name': f"Republic of {nation_name}", 'icon_url': nation_flag}
     else:
-        embed.set_author(name=f"Nation: {nation_name}")
+        author = {'name': f"Nation: {nation_name}"}
+    
+    verified_at = user_data.get('verified_at')
+    
+    # (name, value) pairs; optional fields have a None value and are dropped
+    fields = [
+        ("IGN", user_data.get('minecraft_ign', 'Unknown')),
+        ("Discord", f"{member.mention} ({member.display_name})"),
+        ("Discord ID", str(member.id)),
+        ("Discord Created", format_timestamp(member.created_at)),
+        ("Town", user_data.get('town_name') or "No town"),
+        ("Nation", nation_name or "No nation"),
+        ("Verified At", format_timestamp(verified_at) if verified_at else None),
+        ("Joined Discord", format_timestamp(member.joined_at) if member.joined_at else None),
+    ]
+    
+    # Built as one payload rather than through the setter methods, which
+    # matters when scans post many of these
+    payload = {
+        'title': "User Information [ Minecraft & Discord ]",
+        'color': color.value,
+        'timestamp': _now().isoformat(),
+        'author': author,
+        'fields': [
+            {'name': name, 'value': value, 'inline': False}
+            for name, value in fields if value is not None
+        ],
+        'footer': {'text': _footer_text(_VERIFICATION_FOOTER_FMT)}
+    }
     
     # Set thumbnail to Minecraft avatar
     minecraft_uuid = user_data.get('minecraft_uuid', '')
     if minecraft_uuid:
-        embed.set_thumbnail(url=get_avatar_url(minecraft_uuid))
-    
-    # Add fields
-    embed.add_field(
-        name="IGN",
-        value=user_data.get('minecraft_ign', 'Unknown'),
-        inline=False
-    )
+        payload['thumbnail'] = {'url': get_avatar_url(minecraft_uuid)}
     
-    embed.add_field(
-        name="Discord",
-        value=f"{member.mention} ({member.display_name})",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="Discord ID",
-        value=str(member.id),
-        inline=False
-    )
-    
-    embed.add_field(
-        name="Discord Created",
-        value=format_timestamp(member.created_at),
-        inline=False
-    )
-    
-    # Town info
-    town_name = user_data.get('town_name')
-    if town_name:
-        embed.add_field(name="Town", value=town_name, inline=False)
-    else:
-        embed.add_field(name="Town", value="No town", inline=False)
-    
-    # Nation info
-    if nation_name:
-        embed.add_field(name="Nation", value=nation_name, inline=False)
-    else:
-        embed.add_field(name="Nation", value="No nation", inline=False)
-    
-    # Verification timestamps
-    if user_data.get('verified_at'):
-        embed.add_field(
-            name="Verified At",
-            value=format_timestamp(user_data['verified_at']),
-            inline=False
-        )
-    
-    if member.joined_at:
-        embed.add_field(
-            name="Joined Discord",
-            value=format_timestamp(member.joined_at),
-            inline=False
-        )
-    
-    # Footer
-    embed.set_footer(text=datetime.now().strftime('%m/%d/%Y %I:%M %p'))
-    
-    return embed
+    return discord.Embed.from_dict(payload)
 
 
 def create_notification_embed(
@@ -138,17 +156,12 @@ def create_notification_embed(
     nation_name = town_data.get('nation_name', 'Unknown Nation')
     
     # Set color based on type
-    color_map = {
-        'government': discord.Color.blue(),
-        'status': discord.Color.orange(),
-        'milestone': discord.Color.gold()
-    }
-    color = color_map.get(notification_type, discord.Color.blurple())
+    color = _NOTIFICATION_COLORS.get(notification_type, _DEFAULT_NOTIFICATION_COLOR)
     
     embed = discord.Embed(
         title=f"🏛️ {town_name} Update",
         color=color,
-        timestamp=datetime.utcnow()
+        timestamp=_now()
     )
     
     embed.set_author(name=nation_name)
@@ -196,16 +209,8 @@ def create_notification_embed(
             )
     
     elif notification_type == 'status':
-        status_labels = {
-            'is_public': 'Public Status',
-            'is_open': 'Open Status',
-            'is_overclaimed': 'Overclaimed Status',
-            'is_for_sale': 'For Sale Status',
-            'has_overclaim_shield': 'Overclaim Shield'
-        }
-        
         for key, (old, new) in changes.items():
-            label = status_labels.get(key, key)
+            label = _STATUS_LABELS.get(key, key)
             embed.add_field(
                 name=label,
                 value=f"{old} → {new}",
@@ -229,7 +234,7 @@ def create_notification_embed(
                 inline=False
             )
     
-    embed.set_footer(text=f"Updated at {datetime.now().strftime('%I:%M %p')}")
+    embed.set_footer(text=_footer_text(_NOTIFICATION_FOOTER_FMT))
     
     return embed
 
@@ -309,7 +314,7 @@ def create_scan_status_embed(
     embed = discord.Embed(
         title=f"📊 {scan_type.title()} Scan Complete",
         color=discord.Color.green(),
-        timestamp=datetime.utcnow()
+        timestamp=_now()
     )
     
     embed.add_field(
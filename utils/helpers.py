@@ -1,12 +1,21 @@
 """Helper utility functions."""
 
 import logging
+from bisect import bisect_right
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from itertools import islice
+from typing import Optional, List, Dict, Any, FrozenSet, Iterable, Iterator, Tuple
 from dateutil import parser as dateutil_parser
 
 logger = logging.getLogger('EMCBot.Helpers')
 
+# (config, main nation names, allied nation names, main nation name -> flag
+# URL) for the last config seen
+_nation_lookup: Tuple[Optional[Dict[str, Any]], FrozenSet[str], FrozenSet[str], Dict[str, Optional[str]]] = (
+    None, frozenset(), frozenset(), {}
+)
+
 
 def format_timestamp(dt: datetime) -> str:
     """Format datetime object to readable string.
@@ -32,6 +41,12 @@ def parse_timestamp(timestamp_str: str) -> Optional[datetime]:
     Returns:
         Datetime object or None if parsing fails
     """
+    # ISO 8601, the usual format, is parsed in C; dateutil handles the rest
+    try:
+        return datetime.fromisoformat(timestamp_str)
+    except (TypeError, ValueError):
+        pass
+    
     try:
         return dateutil_parser.parse(timestamp_str)
     except Exception as e:
@@ -51,8 +66,14 @@ def get_avatar_url(minecraft_uuid: str, size: int = 128, overlay: bool = True) -
         Avatar URL
     """
     # Remove dashes from UUID if present
-    uuid_clean = minecraft_uuid.replace('-', '')
+    uuid_clean = minecraft_uuid.replace('-', '') if '-' in minecraft_uuid else minecraft_uuid
     
+    return _avatar_url(uuid_clean, size, overlay)
+
+
+@lru_cache(maxsize=4096)
+def _avatar_url(uuid_clean: str, size: int, overlay: bool) -> str:
+    """Build a Crafatar avatar URL; see ``get_avatar_url``."""
     overlay_param = "true" if overlay else "false"
     return f"https://crafatar.com/avatars/{uuid_clean}?size={size}&overlay={overlay_param}"
 
@@ -72,12 +93,21 @@ def detect_milestone(
     Returns:
         The milestone threshold crossed, or None
     """
-    for threshold in sorted(thresholds):
-        if old_value < threshold <= new_value:
-            return threshold
+    ordered = _sorted_thresholds(tuple(thresholds))
+    
+    # The lowest threshold above the old value is the only candidate
+    i = bisect_right(ordered, old_value)
+    if i < len(ordered) and ordered[i] <= new_value:
+        return ordered[i]
     return None
 
 
+@lru_cache(maxsize=32)
+def _sorted_thresholds(thresholds: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Sort milestone thresholds once per distinct set; see ``detect_milestone``."""
+    return tuple(sorted(thresholds))
+
+
 def compare_lists(old_list: List[str], new_list: List[str]) -> Dict[str, List[str]]:
     """Compare two lists and return additions and removals.
     
@@ -86,14 +116,21 @@ def compare_lists(old_list: List[str], new_list: List[str]) -> Dict[str, List[st
         new_list: Current list
         
     Returns:
-        Dictionary with 'added' and 'removed' keys
+        Dictionary with 'added' and 'removed' keys, each without duplicates
+        and in input order
     """
-    old_set = set(old_list or [])
-    new_set = set(new_list or [])
+    # A side that is empty needs no hashing of the other against it
+    if not old_list:
+        return {'added': list(dict.fromkeys(new_list or [])), 'removed': []}
+    if not new_list:
+        return {'added': [], 'removed': list(dict.fromkeys(old_list))}
+    
+    old_set = set(old_list)
+    new_set = set(new_list)
     
     return {
-        'added': list(new_set - old_set),
-        'removed': list(old_set - new_set)
+        'added': [item for item in dict.fromkeys(new_list) if item not in old_set],
+        'removed': [item for item in dict.fromkeys(old_list) if item not in new_set]
     }
 
 
@@ -107,7 +144,25 @@ def chunk_list(lst: List[Any], chunk_size: int) -> List[List[Any]]:
     Returns:
         List of chunks
     """
-    return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
+    return list(iter_chunks(lst, chunk_size))
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Yield successive chunks of an iterable.
+    
+    Only one chunk is held at a time, so callers that go through the
+    chunks once don't copy the whole input up front.
+    
+    Args:
+        items: Items to chunk; any iterable, including generators
+        chunk_size: Size of each chunk
+        
+    Yields:
+        Lists of up to ``chunk_size`` items
+    """
+    it = iter(items)
+    while batch := list(islice(it, chunk_size)):
+        yield batch
 
 
 def format_duration(seconds: float) -> str:
@@ -166,11 +221,11 @@ def format_list(items: List[str], max_items: int = 10, conjunction: str = "and")
     if len(items) <= max_items:
         if len(items) == 2:
             return f"{items[0]} {conjunction} {items[1]}"
-        return f"{', '.join(items[:-1])}, {conjunction} {items[-1]}"
+        # The conjunction goes in as the last part, so one join builds it all
+        return ', '.join([*items[:-1], f"{conjunction} {items[-1]}"])
     
-    shown = items[:max_items]
     remaining = len(items) - max_items
-    return f"{', '.join(shown)}, and {remaining} more"
+    return ', '.join([*items[:max_items], f"and {remaining} more"])
 
 
 def is_main_nation(nation_name: str, config: Dict[str, Any]) -> bool:
@@ -183,8 +238,7 @@ def is_main_nation(nation_name: str, config: Dict[str, Any]) -> bool:
     Returns:
         True if main nation, False otherwise
     """
-    main_nations = [n['name'] for n in config.get('main_nations', [])]
-    return nation_name in main_nations
+    return nation_name in _nation_sets(config)[0]
 
 
 def is_allied_nation(nation_name: str, config: Dict[str, Any]) -> bool:
@@ -197,7 +251,36 @@ def is_allied_nation(nation_name: str, config: Dict[str, Any]) -> bool:
     Returns:
         True if allied nation, False otherwise
     """
-    return nation_name in config.get('allied_nations', [])
+    return nation_name in _nation_sets(config)[1]
+
+
+def _refresh_nation_lookup(config: Dict[str, Any]) -> None:
+    """Rebuild the nation lookup tables if ``config`` is a different object."""
+    global _nation_lookup
+    if _nation_lookup[0] is not config:
+        main_nations = config.get('main_nations', [])
+        _nation_lookup = (
+            config,
+            frozenset(n['name'] for n in main_nations),
+            frozenset(config.get('allied_nations', [])),
+            {n['name']: n.get('flag_url') for n in main_nations}
+        )
+
+
+def _nation_sets(config: Dict[str, Any]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Get the main and allied nation name sets for a config.
+    
+    The sets are rebuilt only when a different config object is passed,
+    so lookups on the hot path are a single set membership test.
+    
+    Args:
+        config: Bot configuration
+        
+    Returns:
+        Tuple of (main nation names, allied nation names)
+    """
+    _refresh_nation_lookup(config)
+    return _nation_lookup[1], _nation_lookup[2]
 
 
 def get_nation_flag_url(nation_name: str, config: Dict[str, Any]) -> Optional[str]:
@@ -210,7 +293,5 @@ def get_nation_flag_url(nation_name: str, config: Dict[str, Any]) -> Optional[st
     Returns:
         Flag URL or None
     """
-    for nation in config.get('main_nations', []):
-        if nation['name'] == nation_name:
-            return nation.get('flag_url')
-    return None
+    _refresh_nation_lookup(config)
+    return _nation_lookup[3].get(nation_name)
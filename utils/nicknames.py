@@ -6,6 +6,9 @@ import discord
 
 logger = logging.getLogger('EMCBot.Nicknames')
 
+# Characters removed from nickname components, applied with str.translate
+_NICKNAME_DELETE = str.maketrans('', '', '@#:`')
+
 
 def format_nickname(
     minecraft_ign: str,
@@ -30,28 +33,22 @@ def format_nickname(
     # Format: [IGN] | Town/Nation
     if is_main_nation and town_name:
         # Main nation citizen with town
-        location = sanitize_nickname_component(town_name)
-        nickname = f"[{ign}] | {location}"
+        location = town_name
     elif nation_name:
         # Has nation but not main nation, or no town
-        location = sanitize_nickname_component(nation_name)
-        nickname = f"[{ign}] | {location}"
+        location = nation_name
     else:
         # No town or nation
-        nickname = f"[{ign}]"
+        return f"[{ign}]"[:32]
     
-    # Discord nickname limit is 32 characters
-    if len(nickname) > 32:
-        # Truncate location part if needed
-        max_location = 32 - len(f"[{ign}] | ")
-        if is_main_nation and town_name:
-            nickname = f"[{ign}] | {town_name[:max_location]}"
-        elif nation_name:
-            nickname = f"[{ign}] | {nation_name[:max_location]}"
-        else:
-            nickname = f"[{ign}]"
+    # Discord nickname limit is 32 characters; the location is cut to
+    # what is left after "[IGN] | " so the nickname is built once
+    budget = 32 - len(ign) - len("[] | ")
+    location = sanitize_nickname_component(location)[:max(budget, 0)]
+    nickname = f"[{ign}] | {location}"
     
-    return nickname[:32]  # Ensure we don't exceed limit
+    # Only an IGN too long for any location can still exceed the limit
+    return nickname if budget >= 0 else nickname[:32]
 
 
 def sanitize_nickname_component(component: str) -> str:
@@ -63,11 +60,11 @@ def sanitize_nickname_component(component: str) -> str:
     Returns:
         Sanitized string
     """
-    # Remove problematic characters
-    sanitized = ''.join(
-        c for c in component
-        if c.isprintable() and c not in '@#:```'
-    )
+    # Remove problematic characters; non-printable ones are filtered
+    # per character only if there are any
+    sanitized = component.translate(_NICKNAME_DELETE)
+    if not sanitized.isprintable():
+        sanitized = ''.join(filter(str.isprintable, sanitized))
     return sanitized
 
 
@@ -85,6 +82,10 @@ async def set_nickname(
         Success status
     """
     try:
+        # Already set; skip the API call
+        if member.nick == nickname:
+            return True
+        
         # Can't change nickname of server owner
         if member.id == member.guild.owner_id:
             logger.warning(f"Cannot change nickname of server owner {member.display_name}")
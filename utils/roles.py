@@ -1,11 +1,47 @@
 """Role assignment logic."""
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import discord
 
+from .helpers import is_main_nation, is_allied_nation
+
 logger = logging.getLogger('EMCBot.Roles')
 
+# Role IDs by (nation name, town UUID, county UUID) for the last config seen.
+# The result only depends on these and the config, and a scan asks for the
+# same few combinations over and over
+_ROLE_CACHE_MAX = 4096
+_role_cache: Tuple[Optional[Dict[str, Any]], Dict[Tuple, Tuple[str, ...]]] = (None, {})
+
+# Verification role IDs as ints for the last config seen
+_verification_ids: Tuple[Optional[Dict[str, Any]], Tuple[int, ...]] = (None, ())
+
+
+def _verification_role_ids(config: Dict[str, Any]) -> Tuple[int, ...]:
+    """Get the configured citizen, allied and foreigner role IDs as ints.
+    
+    Parsed once per config object rather than on every purge.
+    
+    Args:
+        config: Bot configuration
+        
+    Returns:
+        Role IDs that are set in the config
+    """
+    global _verification_ids
+    if _verification_ids[0] is not config:
+        roles = config['roles']
+        _verification_ids = (
+            config,
+            tuple(
+                int(role_id)
+                for role_id in (roles.get('citizen'), roles.get('allied'), roles.get('foreigner'))
+                if role_id
+            )
+        )
+    return _verification_ids[1]
+
 
 def determine_roles(
     nation_name: Optional[str],
@@ -15,6 +51,8 @@ def determine_roles(
 ) -> List[str]:
     """Determine which role IDs should be assigned to a user.
     
+    Results are memoized per config object; see ``_compute_roles``.
+    
     Args:
         nation_name: User's nation name
         town_uuid: User's town UUID
@@ -24,20 +62,42 @@ def determine_roles(
     Returns:
         List of role IDs to assign
     """
+    global _role_cache
+    cached_config, results = _role_cache
+    if cached_config is not config:
+        results = {}
+        _role_cache = (config, results)
+    
+    key = (nation_name, town_uuid, county_uuid)
+    role_ids = results.get(key)
+    if role_ids is None:
+        if len(results) >= _ROLE_CACHE_MAX:
+            results.clear()
+        role_ids = results[key] = tuple(_compute_roles(nation_name, town_uuid, config, county_uuid))
+    return list(role_ids)
+
+
+def _compute_roles(
+    nation_name: Optional[str],
+    town_uuid: Optional[str],
+    config: Dict[str, Any],
+    county_uuid: Optional[str] = None
+) -> List[str]:
+    """Work out the role IDs for a user; see ``determine_roles``."""
     role_ids = []
+    roles = config['roles']
+    foreigner_id = roles.get('foreigner')
     
     if not nation_name:
         # No nation = foreigner only
-        foreigner_id = config['roles'].get('foreigner')
         if foreigner_id:
             role_ids.append(foreigner_id)
         return role_ids
     
     # Check if main nation
-    main_nation_names = [n['name'] for n in config.get('main_nations', [])]
-    if nation_name in main_nation_names:
+    if is_main_nation(nation_name, config):
         # Citizen role
-        citizen_id = config['roles'].get('citizen')
+        citizen_id = roles.get('citizen')
         if citizen_id:
             role_ids.append(citizen_id)
         
@@ -47,24 +107,22 @@ def determine_roles(
             role_ids.extend(county_role_ids)
     
     # Check if allied nation
-    elif nation_name in config.get('allied_nations', []):
+    elif is_allied_nation(nation_name, config):
         # Allied role
-        allied_id = config['roles'].get('allied')
+        allied_id = roles.get('allied')
         if allied_id:
             role_ids.append(allied_id)
         
         # Also foreigner role
-        foreigner_id = config['roles'].get('foreigner')
         if foreigner_id:
             role_ids.append(foreigner_id)
     
     else:
         # Other nation = foreigner
-        foreigner_id = config['roles'].get('foreigner')
         if foreigner_id:
             role_ids.append(foreigner_id)
     
-    logger.debug(f"Determined roles for nation {nation_name}: {role_ids}")
+    logger.debug("Determined roles for nation %s: %s", nation_name, role_ids)
     return role_ids
 
 
@@ -148,21 +206,12 @@ async def remove_verification_roles(
         Success status
     """
     try:
-        # Get all verification role IDs
-        role_ids = [
-            config['roles'].get('citizen'),
-            config['roles'].get('allied'),
-            config['roles'].get('foreigner')
-        ]
-        
-        # Filter out None values
-        role_ids = [rid for rid in role_ids if rid]
-        
-        # Get role objects
+        # Get the member's verification roles. member.get_role is a direct
+        # lookup, unlike building member.roles and scanning it per role
         roles_to_remove = []
-        for role_id in role_ids:
-            role = member.guild.get_role(int(role_id))
-            if role and role in member.roles:
+        for role_id in _verification_role_ids(config):
+            role = member.get_role(role_id)
+            if role:
                 roles_to_remove.append(role)
         
         if roles_to_remove:
@@ -197,26 +246,38 @@ async def update_roles(
         Success status
     """
     try:
-        # Get roles to remove
+        old_ids = {int(role_id) for role_id in old_role_ids}
+        new_ids = {int(role_id) for role_id in new_role_ids}
+        
+        # Get roles to remove; roles kept by the update are left alone.
+        # member.get_role is a direct lookup, unlike scanning member.roles
         roles_to_remove = []
-        for role_id in old_role_ids:
-            role = guild.get_role(int(role_id))
-            if role and role in member.roles:
+        for role_id in old_ids - new_ids:
+            role = member.get_role(role_id)
+            if role:
                 roles_to_remove.append(role)
         
         # Get roles to add
         roles_to_add = []
-        for role_id in new_role_ids:
-            role = guild.get_role(int(role_id))
-            if role and role not in member.roles:
-                roles_to_add.append(role)
+        for role_id in new_ids:
+            if member.get_role(role_id) is None:
+                role = guild.get_role(role_id)
+                if role:
+                    roles_to_add.append(role)
         
-        # Remove old roles
-        if roles_to_remove:
+        if roles_to_remove and roles_to_add:
+            # Swap roles with one request instead of a remove and an add.
+            # This sends the whole role list, so unlike add_roles/remove_roles
+            # it isn't atomic: a role change Discord has applied but our cache
+            # hasn't seen yet is reverted. member.roles[0] is @everyone, which
+            # is implicit and must not be sent
+            removed = set(roles_to_remove)
+            final_roles = [role for role in member.roles[1:] if role not in removed]
+            final_roles.extend(roles_to_add)
+            await member.edit(roles=final_roles, reason="EMC Verification Update")
+        elif roles_to_remove:
             await member.remove_roles(*roles_to_remove, reason="EMC Verification Update")
-        
-        # Add new roles
-        if roles_to_add:
+        elif roles_to_add:
             await member.add_roles(*roles_to_add, reason="EMC Verification Update")
         
         logger.info(
@@ -5,6 +5,27 @@ import logging
 
 logger = logging.getLogger('EMCBot.Validators')
 
+# Compiled once at import
+_USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]+$')
+_URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
+    r'localhost|'  # localhost
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE
+)
+
+# Characters removed from nicknames, applied with str.translate
+_NICKNAME_DELETE = str.maketrans('', '', '@#:`')
+
+
+def _printable(text: str) -> str:
+    """Remove non-printable characters, skipping the per-character pass when there are none."""
+    if text.isprintable():
+        return text
+    return ''.join(filter(str.isprintable, text))
+
 
 def validate_discord_id(discord_id: str) -> bool:
     """Validate Discord ID format.
@@ -18,14 +39,12 @@ def validate_discord_id(discord_id: str) -> bool:
     if not discord_id:
         return False
     
-    # Discord IDs are numeric and at least 17 characters
-    if not discord_id.isdigit():
+    # Discord IDs are 17-20 digits; the length is checked first since it
+    # doesn't scan the string
+    if not 17 <= len(discord_id) <= 20:
         return False
     
-    if len(discord_id) < 17 or len(discord_id) > 20:
-        return False
-    
-    return True
+    return discord_id.isdigit()
 
 
 def validate_minecraft_username(username: str) -> bool:
@@ -45,7 +64,7 @@ def validate_minecraft_username(username: str) -> bool:
         return False
     
     # Check if alphanumeric and underscores only
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
+    if not _USERNAME_PATTERN.match(username):
         return False
     
     return True
@@ -65,15 +84,15 @@ def validate_minecraft_uuid(uuid: str) -> bool:
     
     # Minecraft UUIDs are 32 hex characters (without dashes) or 36 with dashes
     # Remove dashes for validation
-    uuid_clean = uuid.replace('-', '')
+    uuid_clean = uuid if len(uuid) == 32 else uuid.replace('-', '')
     
     if len(uuid_clean) != 32:
         return False
     
-    # Check if hex
+    # Check if hex; fromhex skips whitespace, so the decoded length is
+    # checked too
     try:
-        int(uuid_clean, 16)
-        return True
+        return len(bytes.fromhex(uuid_clean)) == 16
     except ValueError:
         return False
 
@@ -88,10 +107,7 @@ def sanitize_nickname(nickname: str) -> str:
         Sanitized nickname
     """
     # Remove problematic characters
-    sanitized = ''.join(
-        c for c in nickname
-        if c.isprintable() and c not in '@#:```'
-    )
+    sanitized = _printable(nickname.translate(_NICKNAME_DELETE))
     
     # Limit to Discord's 32 character limit
     return sanitized[:32]
@@ -111,7 +127,7 @@ def sanitize_input(text: str, max_length: int = 100) -> str:
         return ""
     
     # Remove non-printable characters
-    sanitized = ''.join(c for c in text if c.isprintable())
+    sanitized = _printable(text)
     
     # Trim to max length
     return sanitized[:max_length]
@@ -130,13 +146,4 @@ def is_valid_url(url: str) -> bool:
         return False
     
     # Basic URL validation
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
-        r'localhost|'  # localhost
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE
-    )
-    
-    return bool(url_pattern.match(url))
+    return bool(_URL_PATTERN.match(url))